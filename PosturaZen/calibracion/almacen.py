@@ -0,0 +1,144 @@
+"""Almacen de calibraciones por usuario y camara.
+
+Cada calibracion queda guardada en una base SQLite indexada por
+``(usuario, camara)`` junto con la dispersion observada y el momento en que
+se tomo. Al reiniciar, una calibracion vigente se recupera con una sola
+consulta por clave, sin volver a pedir al usuario que se siente quieto.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+
+RUTA_CALIBRACIONES = os.path.join(
+    os.path.expanduser("~"), ".local", "share", "posturazen", "calibraciones.sqlite3"
+)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS calibraciones (
+    usuario TEXT NOT NULL,
+    camara TEXT NOT NULL,
+    neck_back_angle REAL NOT NULL,
+    shoulder_hip_angle REAL NOT NULL,
+    center_x REAL NOT NULL,
+    desv_cuello REAL NOT NULL,
+    desv_cadera REAL NOT NULL,
+    desv_centro REAL NOT NULL,
+    muestras INTEGER NOT NULL,
+    creada REAL NOT NULL,
+    PRIMARY KEY (usuario, camara)
+)
+"""
+
+
+@dataclass
+class Calibracion:
+    """Calibracion guardada de un usuario frente a una camara."""
+
+    usuario: str
+    camara: str
+    postura: PosturaBase
+    # Desviacion tipica de (angulo_cuello, angulo_cadera, centro_x)
+    desviaciones: Tuple[float, float, float]
+    muestras: int
+    creada: float
+
+    @property
+    def edad_dias(self) -> float:
+        return (time.time() - self.creada) / 86400.0
+
+
+class AlmacenCalibraciones:
+    """Guarda y recupera calibraciones indexadas por usuario y camara.
+
+    Args:
+        ruta: Archivo SQLite; se crea junto con su directorio si no existe.
+        max_edad_dias: Antiguedad a partir de la cual una calibracion deja de
+            considerarse valida. ``None`` para no caducar nunca.
+    """
+
+    def __init__(self, ruta: str = RUTA_CALIBRACIONES, max_edad_dias: Optional[float] = 30.0) -> None:
+        self.ruta = ruta
+        self.max_edad_dias = max_edad_dias
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conectar() as con:
+            con.execute(_ESQUEMA)
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.ruta, timeout=5.0)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def guardar(
+        self,
+        usuario: str,
+        camara: str,
+        postura: PosturaBase,
+        desviaciones: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        muestras: int = 0,
+    ) -> Calibracion:
+        """Guarda (o reemplaza) la calibracion de ``usuario`` en ``camara``."""
+        calibracion = Calibracion(
+            usuario, str(camara), postura, tuple(float(d) for d in desviaciones), muestras, time.time()
+        )
+        with self._conectar() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO calibraciones VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    usuario,
+                    str(camara),
+                    postura.neck_back_angle,
+                    postura.shoulder_hip_angle,
+                    postura.center_x,
+                    *calibracion.desviaciones,
+                    muestras,
+                    calibracion.creada,
+                ),
+            )
+        return calibracion
+
+    def obtener(self, usuario: str, camara: str) -> Optional[Calibracion]:
+        """Devuelve la calibracion vigente de ``usuario`` en ``camara``, si la hay."""
+        with self._conectar() as con:
+            fila = con.execute(
+                "SELECT * FROM calibraciones WHERE usuario = ? AND camara = ?", (usuario, str(camara))
+            ).fetchone()
+        if fila is None:
+            return None
+        calibracion = self._desde_fila(fila)
+        if not all(math.isfinite(v) for v in vars(calibracion.postura).values()):
+            return None
+        if self.max_edad_dias is not None and calibracion.edad_dias > self.max_edad_dias:
+            return None
+        return calibracion
+
+    def eliminar(self, usuario: str, camara: str) -> None:
+        with self._conectar() as con:
+            con.execute("DELETE FROM calibraciones WHERE usuario = ? AND camara = ?", (usuario, str(camara)))
+
+    def listar(self) -> List[Calibracion]:
+        """Todas las calibraciones guardadas, vigentes o no."""
+        with self._conectar() as con:
+            filas = con.execute("SELECT * FROM calibraciones ORDER BY usuario, camara").fetchall()
+        return [self._desde_fila(f) for f in filas]
+
+    @staticmethod
+    def _desde_fila(fila: tuple) -> Calibracion:
+        usuario, camara, cuello, cadera, centro, d_cuello, d_cadera, d_centro, muestras, creada = fila
+        return Calibracion(
+            usuario, camara, PosturaBase(cuello, cadera, centro), (d_cuello, d_cadera, d_centro), muestras, creada
+        )
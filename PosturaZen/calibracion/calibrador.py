@@ -5,12 +5,18 @@ from __future__ import annotations
 import json
 import time
 from dataclasses import dataclass
-from typing import Dict, Tuple, List, Any
+from typing import TYPE_CHECKING, Dict, Tuple, Any, Optional, Union
 
 import cv2
-from ultralytics import YOLO
+import numpy as np
 
-from PosturaZen.utils.angulos import calcular_angulo
+from PosturaZen.deteccion.backends import BackendPose
+from PosturaZen.deteccion.pipeline import Paquete, Pipeline
+from PosturaZen.deteccion.registro import BackendCompartido
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, EstadisticasEnLinea, metricas_frame
+
+if TYPE_CHECKING:
+    from PosturaZen.calibracion.almacen import AlmacenCalibraciones
 
 
 @dataclass
@@ -57,78 +63,142 @@ class PosturaBase:
         return cls(**parsed)
 
 
-KEYPOINT_INDEX = {
-    "left_shoulder": 5,
-    "right_shoulder": 6,
-    "left_hip": 11,
-    "right_hip": 12,
-    "nose": 0,
-}
-
-
 class Calibrador:
-    """Realiza la calibracion inicial capturando la postura ideal."""
-
-    def __init__(self, segundos: int = 10, fps: int = 30) -> None:
+    """Realiza la calibracion inicial capturando la postura ideal.
+
+    La captura y la inferencia corren en hilos separados (ver
+    :class:`~PosturaZen.deteccion.pipeline.Pipeline`) y cada frame con
+    persona actualiza la media y la varianza en linea de las tres metricas
+    de :class:`PosturaBase`. La calibracion termina en cuanto el error
+    estandar de las tres medias baja de su tolerancia, normalmente en uno o
+    dos segundos, y ``segundos`` es solo el tiempo maximo de cada intento.
+
+    Args:
+        segundos: Duracion maxima de cada intento.
+        fps: FPS de referencia de la camara.
+        backend: Backend de pose; por defecto el compartido del proceso.
+        minimo_muestras: Frames con persona necesarios antes de aceptar.
+        tolerancias: Error estandar maximo de ``(angulo_cuello,
+            angulo_cadera, centro_x)`` para dar la media por convergida.
+        dispersion_maxima: Desviacion tipica maxima de cada metrica; por
+            encima el usuario se esta moviendo y la muestra no se acepta.
+        intentos: Intentos antes de rendirse.
+    """
+
+    def __init__(
+        self,
+        segundos: int = 10,
+        fps: int = 30,
+        backend: Optional[BackendPose] = None,
+        minimo_muestras: int = 15,
+        tolerancias: Tuple[float, float, float] = (0.5, 0.5, 0.005),
+        dispersion_maxima: Tuple[float, float, float] = (6.0, 6.0, 0.05),
+        intentos: int = 3,
+    ) -> None:
         self.segundos = segundos
         self.fps = fps
-        self.model = YOLO("yolov8n-pose.pt")
+        self.backend = backend if backend is not None else BackendCompartido()
+        self.minimo_muestras = minimo_muestras
+        self.tolerancias = np.asarray(tolerancias, dtype=np.float64)
+        self.dispersion_maxima = np.asarray(dispersion_maxima, dtype=np.float64)
+        self.intentos = intentos
+        # Estadisticas del ultimo intento, para diagnostico
+        self.estadisticas: Optional[EstadisticasEnLinea] = None
+        self.duracion = 0.0
 
     def _obtener_puntos(self, frame) -> Dict[str, Tuple[float, float]]:
-        resultados = self.model(frame, verbose=False)[0]
-        if resultados.keypoints is None or len(resultados.keypoints) == 0:
+        personas = self.backend.inferir([frame])[0]
+        if len(personas) == 0:
             return {}
-        kp = resultados.keypoints.xyn[0]
+        kp = personas[0]
         puntos = {n: (float(kp[idx][0]), float(kp[idx][1])) for n, idx in KEYPOINT_INDEX.items()}
         return puntos
 
-    def calibrar(self) -> PosturaBase:
-        print("Si\u00e9ntate bien por 10 segundos para calibrar")
-        cap = cv2.VideoCapture(0)
-
-        start_time = time.time()
-        buenos_frames: List[float] = []
-        angulos_cuello: List[float] = []
-        angulos_cadera: List[float] = []
-        centros_x: List[float] = []
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                continue
-            puntos = self._obtener_puntos(frame)
-            if len(puntos) == len(KEYPOINT_INDEX):
-                shoulder_mid = (
-                    (puntos["left_shoulder"][0] + puntos["right_shoulder"][0]) / 2,
-                    (puntos["left_shoulder"][1] + puntos["right_shoulder"][1]) / 2,
-                )
-                hip_mid = (
-                    (puntos["left_hip"][0] + puntos["right_hip"][0]) / 2,
-                    (puntos["left_hip"][1] + puntos["right_hip"][1]) / 2,
-                )
-                nose = (puntos["nose"][0], puntos["nose"][1])
-
-                angulo_cuello = calcular_angulo(nose, shoulder_mid, hip_mid)
-                angulo_cadera = calcular_angulo(shoulder_mid, hip_mid, (hip_mid[0], hip_mid[1] + 0.1))
-                angulos_cuello.append(angulo_cuello)
-                angulos_cadera.append(angulo_cadera)
-                centros_x.append(hip_mid[0])
-                buenos_frames.append(1)
-
-            if time.time() - start_time >= self.segundos:
-                break
-
-        cap.release()
-
-        if len(buenos_frames) < self.segundos * self.fps * 0.5:
-            print("No se detect\u00f3 suficiente visibilidad. Reiniciando calibraci\u00f3n...")
-            return self.calibrar()
+    def _aceptable(self, estadisticas: EstadisticasEnLinea) -> bool:
+        return estadisticas.n >= self.minimo_muestras and bool(
+            np.all(estadisticas.desviacion <= self.dispersion_maxima)
+        )
 
-        promedio = PosturaBase(
-            neck_back_angle=sum(angulos_cuello) / len(angulos_cuello),
-            shoulder_hip_angle=sum(angulos_cadera) / len(angulos_cadera),
-            center_x=sum(centros_x) / len(centros_x),
+    def convergio(self, estadisticas: EstadisticasEnLinea) -> bool:
+        """Indica si las medias ya son estables con las tolerancias dadas."""
+        return self._aceptable(estadisticas) and bool(
+            np.all(estadisticas.error_estandar <= self.tolerancias)
         )
-        with open("PosturaZen/postura_base.json", "w", encoding="utf-8") as f:
-            json.dump(promedio.__dict__, f, indent=4)
+
+    def _intento(self, fuente: Union[int, str]) -> EstadisticasEnLinea:
+        estadisticas = EstadisticasEnLinea(3)
+
+        def analizar(paquete: Paquete) -> bool:
+            if len(paquete.puntos) == len(KEYPOINT_INDEX):
+                estadisticas.agregar(metricas_frame(paquete.puntos))
+            return not self.convergio(estadisticas)
+
+        cap = cv2.VideoCapture(fuente)
+        try:
+            Pipeline(cap, self._obtener_puntos, analizar, en_vivo=not isinstance(fuente, str)).ejecutar(
+                limite=self.segundos
+            )
+        finally:
+            cap.release()
+        return estadisticas
+
+    def calibrar(
+        self,
+        fuente: Union[int, str] = 0,
+        almacen: Optional["AlmacenCalibraciones"] = None,
+        usuario: Optional[str] = None,
+        camara: Optional[str] = None,
+        ruta_json: Optional[str] = None,
+    ) -> Optional[PosturaBase]:
+        """Calibra frente a ``fuente`` y guarda el resultado.
+
+        Args:
+            fuente: Indice de camara o ruta de video.
+            almacen: Almacen donde guardar la calibracion de ``usuario`` en
+                ``camara`` (por defecto ``str(fuente)``).
+            usuario: Usuario calibrado; obligatorio si se pasa ``almacen``.
+            camara: Identificador de la camara en el almacen.
+            ruta_json: Si se indica, tambien se escribe la calibracion en ese
+                archivo JSON (el formato de :func:`cargar_postura`).
+
+        Returns:
+            La postura de referencia, o ``None`` si ningun intento consiguio
+            una muestra suficiente.
+
+        Raises:
+            ValueError: Si se pasa ``almacen`` sin ``usuario``.
+        """
+        if almacen is not None and usuario is None:
+            raise ValueError("Para guardar en el almacen hace falta el usuario")
+        print(f"Si\u00e9ntate bien hasta {self.segundos} segundos para calibrar")
+        for intento in range(1, self.intentos + 1):
+            inicio = time.perf_counter()
+            estadisticas = self._intento(fuente)
+            self.estadisticas = estadisticas
+            self.duracion = time.perf_counter() - inicio
+            if self._aceptable(estadisticas):
+                break
+            print(
+                "No se detect\u00f3 suficiente visibilidad o hubo movimiento. "
+                f"Reiniciando calibraci\u00f3n ({intento}/{self.intentos})..."
+            )
+        else:
+            return None
+
+        if not self.convergio(estadisticas):
+            print("La calibraci\u00f3n no termin\u00f3 de estabilizarse; se usa la media obtenida.")
+        print(f"Calibraci\u00f3n completada en {self.duracion:.1f} s con {estadisticas.n} frames")
+
+        promedio = PosturaBase(*(float(v) for v in estadisticas.media))
+        if almacen is not None:
+            almacen.guardar(
+                usuario,
+                str(fuente) if camara is None else camara,
+                promedio,
+                tuple(estadisticas.desviacion),
+                estadisticas.n,
+            )
+        if ruta_json is not None:
+            with open(ruta_json, "w", encoding="utf-8") as f:
+                json.dump(promedio.__dict__, f, indent=4)
         return promedio
@@ -0,0 +1,197 @@
+"""Maquina de estados de alertas de postura con histeresis.
+
+Cada frame se clasifica como malo o bueno comparando la desviacion de cada
+metrica respecto a la calibracion con su tolerancia. Para no oscilar en el
+borde, un frame deja de ser malo solo cuando todas las desviaciones bajan de
+``histeresis`` veces la tolerancia. El numero de frames malos en la ventana
+se lleva como contador sobre un anillo (O(1) por frame, sin recorrerla) y la
+alerta tiene dos estados: entra cuando la fraccion de frames malos llega a
+``entrada`` y sale cuando baja de ``salida``.
+
+:class:`MotorAlertas` emite eventos discretos en lugar de una comprobacion
+por frame: ``inicio`` al entrar en mala postura (respetando un tiempo de
+enfriamiento entre avisos), ``recordatorio`` si se mantiene, ``fin`` al
+corregirla y ``felicitacion`` tras un periodo largo de buena postura.
+
+Para contar las alertas de una grabacion de puntos se usa
+``PosturaZen.deteccion.reproduccion``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from PosturaZen.utils.metricas import TOLERANCIA_CADERA, TOLERANCIA_CENTRO, TOLERANCIA_CUELLO
+
+INICIO = "inicio"
+RECORDATORIO = "recordatorio"
+FIN = "fin"
+FELICITACION = "felicitacion"
+
+
+@dataclass
+class Tolerancias:
+    """Desviacion maxima de cada metrica respecto a la calibracion."""
+
+    cuello: float = TOLERANCIA_CUELLO
+    cadera: float = TOLERANCIA_CADERA
+    centro: float = TOLERANCIA_CENTRO
+
+    @classmethod
+    def desde_calibracion(cls, desviaciones: Sequence[float], factor: float = 3.0) -> "Tolerancias":
+        """Amplia las tolerancias por defecto a ``factor`` desviaciones tipicas de la calibracion.
+
+        Un usuario cuya postura de referencia ya oscila mucho no recibe
+        alertas por ese mismo ruido; nunca se baja de los valores por defecto.
+        """
+        cuello, cadera, centro = (float(d) * factor for d in desviaciones)
+        base = cls()
+        return cls(max(base.cuello, cuello), max(base.cadera, cadera), max(base.centro, centro))
+
+    @classmethod
+    def desde_texto(cls, texto: str) -> "Tolerancias":
+        """Lee ``"cuello,cadera,centro"`` (por ejemplo de una variable de entorno)."""
+        partes = [float(v) for v in texto.split(",")]
+        if len(partes) != 3:
+            raise ValueError(f"Se esperaban tres tolerancias separadas por comas: '{texto}'")
+        return cls(*partes)
+
+
+@dataclass
+class EventoAlerta:
+    """Cambio de estado de la alerta de postura."""
+
+    tipo: str
+    t: float
+    # Segundos en mala postura (inicio: 0) o en buena (felicitacion)
+    duracion: float = 0.0
+
+
+class MotorAlertas:
+    """Alertas de postura con histeresis, enfriamiento y recordatorios.
+
+    Args:
+        postura_base: Calibracion con ``neck_back_angle``,
+            ``shoulder_hip_angle`` y ``center_x``.
+        fps: FPS de referencia para el tamaño de la ventana.
+        tolerancias: Tolerancias por metrica; por defecto las de ``metricas``.
+        ventana_s: Segundos de la ventana de frames.
+        entrada: Fraccion de frames malos de la ventana para entrar en alerta.
+        salida: Fraccion por debajo de la cual la alerta termina.
+        histeresis: Fraccion de la tolerancia bajo la que un frame malo vuelve
+            a ser bueno.
+        enfriamiento_s: Minimo entre dos avisos de ``inicio``.
+        recordatorio_s: Repetir el aviso cada tantos segundos en alerta
+            (``0`` lo desactiva).
+        felicitacion_s: Segundos seguidos de buena postura para felicitar.
+    """
+
+    def __init__(
+        self,
+        postura_base: Any,
+        fps: int = 30,
+        tolerancias: Optional[Tolerancias] = None,
+        ventana_s: float = 5.0,
+        entrada: float = 0.9,
+        salida: float = 0.5,
+        histeresis: float = 0.8,
+        enfriamiento_s: float = 60.0,
+        recordatorio_s: float = 120.0,
+        felicitacion_s: float = 600.0,
+    ) -> None:
+        if not 0.0 <= salida < entrada <= 1.0:
+            raise ValueError("Se requiere 0 <= salida < entrada <= 1")
+        self.postura_base = postura_base
+        self.fps = fps
+        self.tolerancias = tolerancias if tolerancias is not None else Tolerancias()
+        self.tamano = max(int(round(ventana_s * fps)), 1)
+        self.umbral_entrada = int(np.ceil(entrada * self.tamano))
+        self.umbral_salida = int(salida * self.tamano)
+        self.histeresis = histeresis
+        self.enfriamiento_s = enfriamiento_s
+        self.recordatorio_s = recordatorio_s
+        self.felicitacion_s = felicitacion_s
+        self.alertas = 0
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self._anillo = bytearray(self.tamano)
+        self._posicion = 0
+        self._llenos = 0
+        self.malos = 0
+        self.frame_malo = False
+        self.en_alerta = False
+        self._frames = 0
+        self._desde_alerta = 0.0
+        self._ultimo_aviso: Optional[float] = None
+        self._ultimo_recordatorio = 0.0
+        self._desde_buena: Optional[float] = None
+
+    def clasificar(self, angulo_cuello: float, angulo_cadera: float, centro_x: float) -> bool:
+        """Clasifica un frame como malo aplicando la histeresis."""
+        base, tol = self.postura_base, self.tolerancias
+        exceso = max(
+            abs(angulo_cuello - base.neck_back_angle) / tol.cuello,
+            abs(angulo_cadera - base.shoulder_hip_angle) / tol.cadera,
+            abs(centro_x - base.center_x) / tol.centro,
+        )
+        self.frame_malo = bool(exceso > (self.histeresis if self.frame_malo else 1.0))
+        return self.frame_malo
+
+    def actualizar(
+        self, angulo_cuello: float, angulo_cadera: float, centro_x: float, t: Optional[float] = None
+    ) -> Optional[EventoAlerta]:
+        """Procesa las metricas de un frame y devuelve el evento que provoque, si hay.
+
+        ``t`` es el instante del frame en segundos; sin el se usa el numero
+        de frames entre ``fps``.
+        """
+        self._frames += 1
+        if t is None:
+            t = self._frames / self.fps
+        malo = self.clasificar(angulo_cuello, angulo_cadera, centro_x)
+
+        # Contador de malos en la ventana: entra el frame nuevo, sale el mas viejo
+        if self._llenos == self.tamano:
+            self.malos -= self._anillo[self._posicion]
+        else:
+            self._llenos += 1
+        self._anillo[self._posicion] = int(malo)
+        self.malos += int(malo)
+        self._posicion = (self._posicion + 1) % self.tamano
+
+        if malo:
+            self._desde_buena = None
+        elif self._desde_buena is None:
+            self._desde_buena = t
+
+        if self.en_alerta:
+            if self.malos <= self.umbral_salida:
+                self.en_alerta = False
+                return EventoAlerta(FIN, t, t - self._desde_alerta)
+            if self.recordatorio_s and t - self._ultimo_recordatorio >= self.recordatorio_s:
+                return self._avisar(RECORDATORIO, t)
+            return None
+
+        if self._llenos == self.tamano and self.malos >= self.umbral_entrada:
+            self.en_alerta = True
+            self._desde_alerta = self._ultimo_recordatorio = t
+            if self._ultimo_aviso is None or t - self._ultimo_aviso >= self.enfriamiento_s:
+                return self._avisar(INICIO, t)
+            # En enfriamiento: se entra en alerta sin volver a avisar
+            return None
+
+        if self._desde_buena is not None and t - self._desde_buena >= self.felicitacion_s:
+            duracion = t - self._desde_buena
+            self._desde_buena = t
+            return EventoAlerta(FELICITACION, t, duracion)
+        return None
+
+    def _avisar(self, tipo: str, t: float) -> EventoAlerta:
+        self.alertas += 1
+        self._ultimo_aviso = self._ultimo_recordatorio = t
+        return EventoAlerta(tipo, t, t - self._desde_alerta)
+
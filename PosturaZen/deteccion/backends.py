@@ -0,0 +1,253 @@
+"""Backends intercambiables para la inferencia de pose.
+
+Todos los backends reciben una lista de frames BGR y devuelven, por frame, un
+arreglo ``(personas, 17, 2)`` con los puntos COCO normalizados a ``[0, 1]``,
+ordenados por confianza de la deteccion. Asi ``Detector`` y ``Calibrador`` no
+dependen de PyTorch y pueden usar ONNX Runtime (opcionalmente cuantizado a
+int8 u OpenVINO como proveedor) en equipos solo con CPU.
+
+Uso para comprobar la paridad entre backends con frames grabados::
+
+    python -m PosturaZen.deteccion.backends sesion.mp4 --backend onnx-int8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+import cv2
+import numpy as np
+
+MODELO_POR_DEFECTO = "yolov8n-pose.pt"
+CACHE_MODELOS = os.path.join(os.path.expanduser("~"), ".cache", "posturazen")
+# Visibilidad minima de un punto; por debajo ultralytics lo deja en (0, 0)
+VISIBILIDAD_MINIMA = 0.5
+
+
+class BackendPose(Protocol):
+    """Interfaz comun de los backends de pose."""
+
+    def inferir(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        ...
+
+
+class BackendUltralytics:
+    """Inferencia con el modelo PyTorch a traves de ``ultralytics``."""
+
+    def __init__(self, ruta: str = MODELO_POR_DEFECTO) -> None:
+        from ultralytics import YOLO
+
+        self.model = YOLO(ruta)
+
+    def inferir(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        resultados = self.model(list(frames), verbose=False)
+        salida = []
+        for r in resultados:
+            if r.keypoints is None or len(r.keypoints) == 0:
+                salida.append(np.empty((0, 17, 2), dtype=np.float32))
+            else:
+                salida.append(r.keypoints.xyn.cpu().numpy().astype(np.float32))
+        return salida
+
+
+def exportar_onnx(
+    ruta_pt: str = MODELO_POR_DEFECTO,
+    int8: bool = False,
+    cache: str = CACHE_MODELOS,
+    imgsz: int = 640,
+) -> str:
+    """Exporta ``ruta_pt`` a ONNX una sola vez y devuelve la ruta en cache.
+
+    Con ``int8`` se aplica cuantizacion dinamica de pesos sobre el modelo
+    exportado. Las llamadas siguientes reutilizan los archivos ya generados.
+    """
+    os.makedirs(cache, exist_ok=True)
+    base = os.path.splitext(os.path.basename(ruta_pt))[0]
+    ruta_onnx = os.path.join(cache, f"{base}-{imgsz}.onnx")
+    if not os.path.exists(ruta_onnx):
+        from ultralytics import YOLO
+
+        exportado = YOLO(ruta_pt).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        os.replace(exportado, ruta_onnx)
+    if not int8:
+        return ruta_onnx
+
+    ruta_int8 = os.path.join(cache, f"{base}-{imgsz}-int8.onnx")
+    if not os.path.exists(ruta_int8):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(ruta_onnx, ruta_int8, weight_type=QuantType.QUInt8)
+    return ruta_int8
+
+
+class BackendOnnx:
+    """Inferencia con ONNX Runtime sobre un modelo YOLOv8-pose exportado.
+
+    Args:
+        ruta: Modelo ``.onnx``. Si es ``None`` se exporta y cachea el modelo
+            por defecto.
+        int8: Usar la variante cuantizada al exportar.
+        proveedores: Proveedores de ejecucion de ONNX Runtime, por ejemplo
+            ``["OpenVINOExecutionProvider"]``. Por defecto, CPU.
+        confianza: Confianza minima de una deteccion de persona.
+        visibilidad: Visibilidad minima de cada punto; los demas quedan en
+            ``(0, 0)``, como en ``BackendUltralytics``.
+    """
+
+    def __init__(
+        self,
+        ruta: Optional[str] = None,
+        int8: bool = False,
+        proveedores: Optional[Sequence[str]] = None,
+        hilos: int = 0,
+        imgsz: int = 640,
+        confianza: float = 0.25,
+        iou: float = 0.7,
+        visibilidad: float = VISIBILIDAD_MINIMA,
+    ) -> None:
+        import onnxruntime as ort
+
+        self.ruta = ruta or exportar_onnx(int8=int8, imgsz=imgsz)
+        opciones = ort.SessionOptions()
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        disponibles = ort.get_available_providers()
+        elegidos = [p for p in (proveedores or []) if p in disponibles] + ["CPUExecutionProvider"]
+        self.sesion = ort.InferenceSession(self.ruta, opciones, providers=elegidos)
+        self.entrada = self.sesion.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.confianza = confianza
+        self.iou = iou
+        self.visibilidad = visibilidad
+
+    def _letterbox(self, frame: np.ndarray) -> tuple:
+        h, w = frame.shape[:2]
+        if h == w == self.imgsz:
+            # Ya viene a la medida del modelo (ver ``preproceso.Preprocesador``)
+            return frame, 1.0, 0, 0
+        escala = min(self.imgsz / h, self.imgsz / w)
+        nh, nw = int(round(h * escala)), int(round(w * escala))
+        lienzo = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        top, left = (self.imgsz - nh) // 2, (self.imgsz - nw) // 2
+        lienzo[top : top + nh, left : left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        return lienzo, escala, left, top
+
+    def inferir(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        if not frames:
+            return []
+        lote = np.empty((len(frames), 3, self.imgsz, self.imgsz), dtype=np.float32)
+        geometria = []
+        for i, frame in enumerate(frames):
+            lienzo, escala, left, top = self._letterbox(frame)
+            lote[i] = lienzo[:, :, ::-1].transpose(2, 0, 1) / 255.0
+            geometria.append((escala, left, top, frame.shape[1], frame.shape[0]))
+        salida = self.sesion.run(None, {self.entrada: lote})[0]
+        return [self._postprocesar(pred.T, *geo) for pred, geo in zip(salida, geometria)]
+
+    def _postprocesar(
+        self, pred: np.ndarray, escala: float, left: int, top: int, w: int, h: int
+    ) -> np.ndarray:
+        # pred: (candidatos, 4 caja + 1 confianza + 17*3 puntos)
+        pred = pred[pred[:, 4] > self.confianza]
+        if len(pred) == 0:
+            return np.empty((0, 17, 2), dtype=np.float32)
+        cajas = pred[:, :4].copy()
+        cajas[:, 0] -= cajas[:, 2] / 2
+        cajas[:, 1] -= cajas[:, 3] / 2
+        indices = cv2.dnn.NMSBoxes(cajas.tolist(), pred[:, 4].tolist(), self.confianza, self.iou)
+        indices = np.array(indices, dtype=int).reshape(-1)
+        indices = indices[np.argsort(-pred[indices, 4])]
+        puntos = pred[indices, 5:].reshape(-1, 17, 3)
+        kps = np.empty(puntos.shape[:2] + (2,), dtype=np.float32)
+        kps[:, :, 0] = (puntos[:, :, 0] - left) / escala / w
+        kps[:, :, 1] = (puntos[:, :, 1] - top) / escala / h
+        np.clip(kps, 0.0, 1.0, out=kps)
+        # La visibilidad ya sale del modelo exportado con la sigmoide aplicada
+        kps[puntos[:, :, 2] < self.visibilidad] = 0.0
+        return kps
+
+
+BACKENDS = {
+    "ultralytics": lambda: BackendUltralytics(),
+    "onnx": lambda: BackendOnnx(),
+    "onnx-int8": lambda: BackendOnnx(int8=True),
+    "openvino": lambda: BackendOnnx(proveedores=["OpenVINOExecutionProvider"]),
+}
+
+
+def crear_backend(nombre: str = "ultralytics") -> BackendPose:
+    """Crea un backend por nombre (``ultralytics``, ``onnx``, ``onnx-int8``, ``openvino``).
+
+    ``"modulo:Clase"`` instancia sin argumentos una clase propia con
+    ``inferir``; sirve tambien en los procesos del pool de ingesta, que solo
+    reciben el nombre.
+    """
+    if ":" in nombre:
+        import importlib
+
+        modulo, _, clase = nombre.partition(":")
+        return getattr(importlib.import_module(modulo), clase)()
+    try:
+        return BACKENDS[nombre]()
+    except KeyError:
+        raise ValueError(f"Backend de pose desconocido: '{nombre}'") from None
+
+
+def comparar_backends(
+    referencia: BackendPose, candidato: BackendPose, frames: Sequence[np.ndarray]
+) -> Dict[str, Any]:
+    """Compara los puntos de la persona principal entre dos backends.
+
+    Returns:
+        Diccionario con el error absoluto maximo y medio (en coordenadas
+        normalizadas) y el numero de frames donde solo uno detecto persona.
+    """
+    errores: List[float] = []
+    discrepancias = 0
+    for frame in frames:
+        a = referencia.inferir([frame])[0]
+        b = candidato.inferir([frame])[0]
+        if len(a) == 0 or len(b) == 0:
+            discrepancias += int(len(a) != len(b))
+            continue
+        errores.append(float(np.abs(a[0] - b[0]).max()))
+    return {
+        "frames": len(frames),
+        "discrepancias": discrepancias,
+        "error_max": max(errores) if errores else 0.0,
+        "error_medio": float(np.mean(errores)) if errores else 0.0,
+    }
+
+
+def _leer_frames(ruta: str, maximo: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(ruta)
+    frames = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Paridad de backends de pose")
+    parser.add_argument("video", help="Video grabado con frames de referencia")
+    parser.add_argument("--backend", default="onnx", choices=sorted(BACKENDS))
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--tolerancia", type=float, default=0.02)
+    args = parser.parse_args()
+
+    frames = _leer_frames(args.video, args.frames)
+    resultado = comparar_backends(crear_backend("ultralytics"), crear_backend(args.backend), frames)
+    print(resultado)
+    if resultado["error_max"] > args.tolerancia or resultado["discrepancias"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+"""Bus de frames en memoria compartida para varios modelos en procesos propios.
+
+Una sola camara no puede abrirse desde dos bucles, y dos modelos en hilos del
+mismo proceso se estorban por el GIL. Aqui un unico proceso captura y publica
+cada frame en un anillo de :class:`~multiprocessing.shared_memory.SharedMemory`
+con numero de secuencia; los consumidores (pose, malla facial + rPPG,
+grabacion...) corren en procesos aparte, se adjuntan por nombre y leen los
+frames sin copiarlos. Cada resultado vuelve etiquetado con la secuencia del
+frame y :class:`Fusionador` los une por frame.
+
+Cada ranura lleva su secuencia, escrita como un seqlock: se pone a cero antes
+de copiar el frame y se fija al terminar. Un lector que se retrasa mas de
+``ranuras`` frames ve su ranura sobrescrita; por eso, tras usar la vista,
+comprueba con :meth:`BusFrames.vigente` que sigue siendo el mismo frame y
+descarta el resultado si no.
+
+Uso (camara 0, pose y HRV en paralelo, grabando a la vez)::
+
+    python -m PosturaZen.deteccion.bus --consumidores pose cara grabacion --grabar sesion.avi
+
+Con Python anterior a 3.13 los consumidores deben ser procesos hijos del que
+crea el bus (como en :func:`ejecutar`), para compartir su ``resource_tracker``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+from PosturaZen.deteccion.detector import puntos_por_persona
+from PosturaZen.deteccion.preproceso import Preprocesador
+from PosturaZen.utils.metricas import metricas_frame
+
+MAGIA = 0x50535A42  # "PSZB"
+# Cabecera: magia, ranuras, alto, ancho, canales, ultima secuencia, cerrado
+_CABECERA = 8
+_META = np.dtype([("secuencia", "<u8"), ("t", "<f8")])
+ESPERA_SONDEO = 0.001
+
+
+@dataclass
+class FrameBus:
+    """Frame leido del bus; ``frame`` es una vista sobre la memoria compartida."""
+
+    secuencia: int
+    t: float
+    frame: np.ndarray
+    # Frames publicados que este lector no llego a ver antes de este
+    omitidos: int = 0
+
+
+class BusFrames:
+    """Anillo de frames de tamaño fijo en memoria compartida.
+
+    Usar :meth:`crear` en el proceso que captura y :meth:`adjuntar` en los
+    consumidores. Solo hay un escritor.
+    """
+
+    def __init__(self, memoria: shared_memory.SharedMemory, propietario: bool) -> None:
+        self.memoria = memoria
+        self.propietario = propietario
+        self._cabecera = np.ndarray((_CABECERA,), dtype=np.uint64, buffer=memoria.buf)
+        if int(self._cabecera[0]) != MAGIA:
+            raise ValueError(f"'{memoria.name}' no es un bus de frames")
+        ranuras, alto, ancho, canales = (int(v) for v in self._cabecera[1:5])
+        self.ranuras = ranuras
+        self.forma = (alto, ancho, canales)
+        inicio = _CABECERA * 8
+        self._meta = np.ndarray((ranuras,), dtype=_META, buffer=memoria.buf, offset=inicio)
+        inicio += _alinear(ranuras * _META.itemsize)
+        self._frames = np.ndarray((ranuras, alto, ancho, canales), dtype=np.uint8, buffer=memoria.buf, offset=inicio)
+
+    @property
+    def nombre(self) -> str:
+        return self.memoria.name
+
+    @classmethod
+    def crear(
+        cls, alto: int, ancho: int, canales: int = 3, ranuras: int = 8, nombre: Optional[str] = None
+    ) -> "BusFrames":
+        tamano = _CABECERA * 8 + _alinear(ranuras * _META.itemsize) + ranuras * alto * ancho * canales
+        memoria = shared_memory.SharedMemory(name=nombre, create=True, size=tamano)
+        cabecera = np.ndarray((_CABECERA,), dtype=np.uint64, buffer=memoria.buf)
+        cabecera[:] = (MAGIA, ranuras, alto, ancho, canales, 0, 0, 0)
+        del cabecera
+        bus = cls(memoria, propietario=True)
+        bus._meta["secuencia"] = 0
+        return bus
+
+    @classmethod
+    def adjuntar(cls, nombre: str) -> "BusFrames":
+        if sys.version_info >= (3, 13):
+            memoria = shared_memory.SharedMemory(name=nombre, track=False)
+        else:
+            memoria = shared_memory.SharedMemory(name=nombre)
+        return cls(memoria, propietario=False)
+
+    # --- Escritor -------------------------------------------------------
+
+    def publicar(self, frame: np.ndarray, t: float) -> int:
+        """Copia ``frame`` en la siguiente ranura y devuelve su secuencia."""
+        secuencia = int(self._cabecera[5]) + 1
+        ranura = secuencia % self.ranuras
+        meta = self._meta[ranura : ranura + 1]
+        meta["secuencia"] = 0
+        self._frames[ranura] = frame
+        meta["t"] = t
+        meta["secuencia"] = secuencia
+        self._cabecera[5] = secuencia
+        return secuencia
+
+    def terminar(self) -> None:
+        """Avisa a los consumidores de que no habra mas frames."""
+        self._cabecera[6] = 1
+
+    # --- Lectores -------------------------------------------------------
+
+    @property
+    def ultima(self) -> int:
+        return int(self._cabecera[5])
+
+    @property
+    def terminado(self) -> bool:
+        return bool(self._cabecera[6])
+
+    def leer(self, secuencia: int) -> Optional[FrameBus]:
+        """Frame ``secuencia`` si sigue en el anillo, o ``None``."""
+        ranura = secuencia % self.ranuras
+        meta = self._meta[ranura]
+        if int(meta["secuencia"]) != secuencia:
+            return None
+        return FrameBus(secuencia, float(meta["t"]), self._frames[ranura])
+
+    def vigente(self, leido: FrameBus) -> bool:
+        """``True`` si la ranura de ``leido`` no se sobrescribio desde que se leyo."""
+        return int(self._meta[leido.secuencia % self.ranuras]["secuencia"]) == leido.secuencia
+
+    def siguiente(self, anterior: int, todos: bool = False, espera: float = 1.0) -> Optional[FrameBus]:
+        """Espera un frame posterior a ``anterior``.
+
+        Por defecto devuelve el mas reciente (un consumidor lento salta
+        frames); con ``todos`` devuelve el siguiente que siga en el anillo.
+        Devuelve ``None`` si vence ``espera`` o el bus termino.
+        """
+        limite = time.monotonic() + espera
+        while True:
+            ultima = self.ultima
+            if ultima > anterior:
+                secuencia = anterior + 1 if todos else ultima
+                # Con todos, si el lector se quedo atras se salta al frame mas viejo seguro
+                secuencia = max(secuencia, ultima - self.ranuras + 2)
+                leido = self.leer(secuencia)
+                if leido is not None:
+                    leido.omitidos = secuencia - anterior - 1
+                    return leido
+            elif self.terminado or time.monotonic() > limite:
+                return None
+            else:
+                time.sleep(ESPERA_SONDEO)
+
+    def cerrar(self) -> None:
+        # Las vistas deben soltarse antes de cerrar el mapeo
+        self._cabecera = self._meta = self._frames = None
+        self.memoria.close()
+        if self.propietario:
+            self.memoria.unlink()
+
+
+def _alinear(n: int, bloque: int = 64) -> int:
+    return (n + bloque - 1) // bloque * bloque
+
+
+# --- Fusion de resultados -------------------------------------------------
+
+
+@dataclass
+class Fusion:
+    """Resultados de varios consumidores para un mismo frame."""
+
+    secuencia: int
+    t: float
+    resultados: Dict[str, Any] = field(default_factory=dict)
+
+
+class Fusionador:
+    """Une por secuencia los resultados que llegan de cada consumidor.
+
+    Un frame se emite en cuanto todos los consumidores lo reportan. Como los
+    consumidores lentos saltan frames, un frame que queda ``retraso``
+    secuencias por detras del mas reciente se emite con los resultados que
+    tenga (``parciales``).
+    """
+
+    def __init__(self, consumidores: Sequence[str], retraso: int = 30) -> None:
+        self.consumidores = frozenset(consumidores)
+        self.retraso = retraso
+        self.pendientes: Dict[int, Fusion] = {}
+        self.mas_reciente = 0
+        self.completas = 0
+        self.parciales = 0
+
+    def agregar(self, nombre: str, secuencia: int, t: float, resultado: Any) -> List[Fusion]:
+        """Registra un resultado y devuelve las fusiones listas, en orden de secuencia."""
+        fusion = self.pendientes.get(secuencia)
+        if fusion is None:
+            fusion = self.pendientes[secuencia] = Fusion(secuencia, t)
+        fusion.resultados[nombre] = resultado
+        self.mas_reciente = max(self.mas_reciente, secuencia)
+
+        listas = []
+        if self.consumidores.issubset(fusion.resultados):
+            listas.append(self.pendientes.pop(secuencia))
+            self.completas += 1
+        vencidas = [s for s in self.pendientes if s <= self.mas_reciente - self.retraso]
+        for s in vencidas:
+            listas.append(self.pendientes.pop(s))
+            self.parciales += 1
+        listas.sort(key=lambda f: f.secuencia)
+        return listas
+
+    def vaciar(self) -> List[Fusion]:
+        """Emite todo lo pendiente (al terminar)."""
+        listas = sorted(self.pendientes.values(), key=lambda f: f.secuencia)
+        self.parciales += len(listas)
+        self.pendientes = {}
+        return listas
+
+
+# --- Consumidores -----------------------------------------------------------
+
+# Un procesador recibe (frame, t) y devuelve un resultado serializable;
+# si tiene metodo ``cerrar`` se llama al terminar
+Procesador = Callable[[np.ndarray, float], Any]
+
+
+def procesador_pose(backend: str = "ultralytics") -> Procesador:
+    """Puntos y angulos de la persona principal con el modelo de pose."""
+    from PosturaZen.deteccion.registro import obtener_backend
+
+    modelo = obtener_backend(backend)
+    preproceso = Preprocesador()
+
+    def procesar(frame: np.ndarray, t: float) -> Dict[str, Any]:
+        lienzo, transformacion = preproceso.preparar(frame)
+        keypoints = preproceso.restaurar(modelo.inferir([lienzo])[0], transformacion)
+        preproceso.seguir(keypoints[0] if len(keypoints) else (), frame.shape[1], frame.shape[0])
+        if not len(keypoints):
+            return {"persona": False}
+        angulo_cuello, angulo_cadera, centro_x = metricas_frame(puntos_por_persona(keypoints[:1])[0])
+        return {
+            "persona": True,
+            "keypoints": keypoints[0],
+            "angulo_cuello": angulo_cuello,
+            "angulo_cadera": angulo_cadera,
+            "centro_x": centro_x,
+        }
+
+    return procesar
+
+
+def procesador_cara(fps: int = 30) -> Procesador:
+    """Malla facial de MediaPipe, inclinacion de la cabeza y HRV por rPPG."""
+    import mediapipe as mp
+
+    from modules.hrv_rppg import HRVEstimator
+    from modules.posture_analysis import measure_head_inclination
+    from modules.rppg import FACE_REGIONS
+
+    malla_facial = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1)
+    estimador = HRVEstimator(fps=fps, regions=FACE_REGIONS)
+    entrada = Preprocesador(lado=480, recorte=False, rgb=True)
+    estado = {"frames": 0, "bpm": 0.0, "hrv": 0.0}
+
+    def procesar(frame: np.ndarray, t: float) -> Dict[str, Any]:
+        rgb, transformacion = entrada.preparar(frame)
+        resultados = malla_facial.process(rgb)
+        inclinacion = None
+        if resultados.multi_face_landmarks:
+            malla = np.array([(p.x, p.y) for p in resultados.multi_face_landmarks[0].landmark], dtype=np.float32)
+            landmarks = entrada.restaurar(malla, transformacion)
+            estimador.update(frame, landmarks, t)
+            medida = measure_head_inclination(landmarks, frame.shape[1], frame.shape[0])
+            inclinacion = medida.angle if medida is not None else None
+        if estado["frames"] % fps == 0:
+            datos = estimador.compute()
+            estado["bpm"], estado["hrv"] = datos["bpm"], datos["hrv"]
+        estado["frames"] += 1
+        return {"cara": inclinacion is not None, "inclinacion": inclinacion, "bpm": estado["bpm"], "hrv": estado["hrv"]}
+
+    procesar.cerrar = malla_facial.close  # type: ignore[attr-defined]
+    return procesar
+
+
+class _Grabador:
+    def __init__(self, ruta: str, fps: float) -> None:
+        self.ruta = ruta
+        self.fps = fps
+        self.escritor: Optional[cv2.VideoWriter] = None
+        self.frames = 0
+
+    def __call__(self, frame: np.ndarray, t: float) -> Dict[str, Any]:
+        if self.escritor is None:
+            codec = cv2.VideoWriter_fourcc(*"MJPG")
+            self.escritor = cv2.VideoWriter(self.ruta, codec, self.fps, (frame.shape[1], frame.shape[0]))
+        self.escritor.write(frame)
+        self.frames += 1
+        return {"grabados": self.frames}
+
+    def cerrar(self) -> None:
+        if self.escritor is not None:
+            self.escritor.release()
+
+
+def procesador_grabacion(ruta: str, fps: float = 30.0) -> Procesador:
+    """Escribe cada frame del bus en un video."""
+    return _Grabador(ruta, fps)
+
+
+def _consumir(nombre: str, nombre_bus: str, fabrica: Callable[[], Procesador], todos: bool, cola) -> None:
+    """Bucle de un proceso consumidor: lee del bus y envia ``(nombre, secuencia, t, resultado)``."""
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    bus = BusFrames.adjuntar(nombre_bus)
+    procesar = fabrica()
+    # Secuencia 0: modelo cargado, listo para consumir
+    cola.put((nombre, 0, 0.0, None))
+    estadisticas = {"procesados": 0, "omitidos": 0, "sobrescritos": 0}
+    anterior = bus.ultima
+    try:
+        while True:
+            leido = bus.siguiente(anterior, todos=todos)
+            if leido is None:
+                if bus.terminado:
+                    break
+                continue
+            anterior = leido.secuencia
+            estadisticas["omitidos"] += leido.omitidos
+            resultado = procesar(leido.frame, leido.t)
+            if not bus.vigente(leido):
+                # El escritor reutilizo la ranura mientras se procesaba
+                estadisticas["sobrescritos"] += 1
+                continue
+            estadisticas["procesados"] += 1
+            cola.put((nombre, leido.secuencia, leido.t, resultado))
+    finally:
+        cerrar = getattr(procesar, "cerrar", None)
+        if cerrar is not None:
+            cerrar()
+        cola.put((nombre, None, 0.0, estadisticas))
+        bus.cerrar()
+
+
+@dataclass
+class Consumidor:
+    """Proceso consumidor del bus.
+
+    Args:
+        nombre: Clave de sus resultados en cada :class:`Fusion`.
+        fabrica: Funcion serializable (de modulo o ``functools.partial``) que
+            crea el procesador ya dentro del proceso hijo.
+        todos: Procesar cada frame en orden (grabacion) en lugar del mas
+            reciente.
+    """
+
+    nombre: str
+    fabrica: Callable[[], Procesador]
+    todos: bool = False
+
+
+def ejecutar(
+    fuente: Union[int, str],
+    consumidores: Sequence[Consumidor],
+    al_fusionar: Optional[Callable[[Fusion], None]] = None,
+    ranuras: int = 8,
+    max_frames: int = 0,
+) -> Dict[str, Dict[str, int]]:
+    """Captura ``fuente`` en este proceso y reparte los frames por el bus.
+
+    Espera a que todos los consumidores tengan su modelo cargado y reproduce
+    los videos a su velocidad nominal. Devuelve las estadisticas de cada
+    consumidor.
+    """
+    cap = cv2.VideoCapture(fuente)
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        raise RuntimeError(f"No se pudo leer de la fuente {fuente!r}")
+    periodo = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if isinstance(fuente, str) else 0.0
+
+    bus = BusFrames.crear(*frame.shape, ranuras=ranuras)
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    procesos = [
+        contexto.Process(
+            target=_consumir, args=(c.nombre, bus.nombre, c.fabrica, c.todos, cola), name=f"bus-{c.nombre}", daemon=True
+        )
+        for c in consumidores
+    ]
+    for p in procesos:
+        p.start()
+
+    fusionador = Fusionador([c.nombre for c in consumidores])
+    estadisticas: Dict[str, Dict[str, int]] = {}
+
+    # No capturar hasta que todos los modelos esten cargados
+    listos = set()
+    while len(listos) < len(consumidores):
+        try:
+            nombre, secuencia, _, _ = cola.get(timeout=1.0)
+        except queue.Empty:
+            if not all(p.is_alive() for p in procesos):
+                bus.terminar()
+                bus.cerrar()
+                cap.release()
+                raise RuntimeError("Un consumidor del bus termino antes de estar listo")
+            continue
+        listos.add(nombre)
+
+    def recibir(bloquear: bool) -> None:
+        while True:
+            try:
+                nombre, secuencia, t, resultado = cola.get(timeout=1.0) if bloquear else cola.get_nowait()
+            except queue.Empty:
+                return
+            if secuencia is None:
+                estadisticas[nombre] = resultado
+                if bloquear and len(estadisticas) == len(consumidores):
+                    return
+                continue
+            for fusion in fusionador.agregar(nombre, secuencia, t, resultado):
+                if al_fusionar is not None:
+                    al_fusionar(fusion)
+
+    publicados = 0
+    try:
+        while ret:
+            t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if isinstance(fuente, str) else time.perf_counter()
+            inicio = time.perf_counter()
+            bus.publicar(frame, t)
+            publicados += 1
+            recibir(bloquear=False)
+            if max_frames and publicados >= max_frames:
+                break
+            if periodo:
+                time.sleep(max(periodo - (time.perf_counter() - inicio), 0.0))
+            ret, frame = cap.read()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        bus.terminar()
+        # Esperar los ultimos resultados y las estadisticas de cada consumidor
+        while len(estadisticas) < len(consumidores) and any(p.is_alive() for p in procesos):
+            recibir(bloquear=True)
+        recibir(bloquear=False)
+        for fusion in fusionador.vaciar():
+            if al_fusionar is not None:
+                al_fusionar(fusion)
+        for p in procesos:
+            p.join(timeout=5.0)
+        bus.cerrar()
+    estadisticas["fusion"] = {"publicados": publicados, "completas": fusionador.completas, "parciales": fusionador.parciales}
+    return estadisticas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fuente", nargs="?", default="0", help="indice de camara o ruta de video")
+    parser.add_argument("--consumidores", nargs="+", default=["pose", "cara"], choices=["pose", "cara", "grabacion"])
+    parser.add_argument("--backend", default=os.environ.get("POSTURAZEN_BACKEND", "ultralytics"))
+    parser.add_argument("--grabar", default="sesion.avi", help="video de salida del consumidor de grabacion")
+    parser.add_argument("--ranuras", type=int, default=8)
+    args = parser.parse_args()
+
+    fuente: Union[int, str] = int(args.fuente) if args.fuente.isdigit() else args.fuente
+    fabricas = {
+        "pose": Consumidor("pose", functools.partial(procesador_pose, args.backend)),
+        "cara": Consumidor("cara", procesador_cara),
+        "grabacion": Consumidor("grabacion", functools.partial(procesador_grabacion, args.grabar), todos=True),
+    }
+    ultimo = [0.0]
+
+    def mostrar(fusion: Fusion) -> None:
+        # Una linea por segundo con lo ultimo de cada modelo
+        if fusion.t - ultimo[0] < 1.0:
+            return
+        ultimo[0] = fusion.t
+        partes = [f"frame {fusion.secuencia}"]
+        pose = fusion.resultados.get("pose")
+        if pose and pose["persona"]:
+            partes.append(f"cuello {pose['angulo_cuello']:.1f} cadera {pose['angulo_cadera']:.1f}")
+        cara = fusion.resultados.get("cara")
+        if cara:
+            partes.append(f"BPM {cara['bpm']:.1f} HRV {cara['hrv']:.1f} ms")
+        print(" | ".join(partes))
+
+    estadisticas = ejecutar(fuente, [fabricas[n] for n in args.consumidores], mostrar, args.ranuras)
+    for nombre, datos in estadisticas.items():
+        print(f"{nombre}: " + ", ".join(f"{k} {v}" for k, v in datos.items()))
+
+
+if __name__ == "__main__":
+    main()
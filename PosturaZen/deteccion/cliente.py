@@ -0,0 +1,171 @@
+"""Cliente ligero para el servicio de ingesta del backend.
+
+Captura frames (camara, video o frames sinteticos), los comprime a JPEG y
+los envia a una sesion del backend, que infiere la pose y devuelve el
+veredicto. La estacion no carga ningun modelo; solo la libreria estandar y
+OpenCV para capturar y comprimir.
+
+Uso::
+
+    python -m PosturaZen.deteccion.cliente --url http://127.0.0.1:8000 --fuente 0
+    python -m PosturaZen.deteccion.cliente --sintetico --frames 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+
+
+class Rechazado(Exception):
+    """El servidor respondio 503: esta saturado y hay que reintentar luego."""
+
+    def __init__(self, mensaje: str, reintentar: float = 1.0) -> None:
+        super().__init__(mensaje)
+        self.reintentar = reintentar
+
+
+class ClienteIngesta:
+    """Sesion de una estacion en el servicio de ingesta.
+
+    Args:
+        url: URL base del backend.
+        calidad: Calidad JPEG (0-100) de los frames enviados.
+        timeout: Segundos maximos por peticion.
+    """
+
+    def __init__(self, url: str = "http://127.0.0.1:8000", calidad: int = 80, timeout: float = 5.0) -> None:
+        self.url = url.rstrip("/")
+        self.calidad = calidad
+        self.timeout = timeout
+        self.sesion: Optional[str] = None
+
+    def _peticion(self, metodo: str, ruta: str, cuerpo: bytes = b"", tipo: str = "application/json") -> Any:
+        peticion = urllib.request.Request(
+            self.url + ruta, data=cuerpo or None, method=metodo, headers={"Content-Type": tipo}
+        )
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout) as respuesta:
+                return json.loads(respuesta.read() or b"null")
+        except urllib.error.HTTPError as exc:
+            if exc.code == 503:
+                raise Rechazado(exc.read().decode(errors="replace"), float(exc.headers.get("Retry-After", 1)))
+            raise
+
+    def abrir(
+        self, usuario: Optional[str] = None, camara: str = "0", postura: Optional[PosturaBase] = None
+    ) -> str:
+        """Abre la sesion; sin ``postura`` el servidor usa la calibracion guardada."""
+        datos: Dict[str, Any] = {"usuario": usuario, "camara": camara}
+        if postura is not None:
+            datos["postura"] = vars(postura)
+        self.sesion = self._peticion("POST", "/sessions", json.dumps(datos).encode())["session"]
+        return self.sesion
+
+    def enviar(self, frame: np.ndarray, t_captura: Optional[float] = None) -> Dict[str, Any]:
+        """Envia un frame BGR y devuelve el veredicto del servidor."""
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.calidad])
+        if not ok:
+            raise ValueError("No se pudo comprimir el frame")
+        ruta = f"/sessions/{self.sesion}/frame"
+        if t_captura is not None:
+            ruta += f"?t_captura={t_captura}"
+        return self._peticion("POST", ruta, jpeg.tobytes(), "image/jpeg")
+
+    def cerrar(self) -> None:
+        if self.sesion is not None:
+            self._peticion("DELETE", f"/sessions/{self.sesion}")
+            self.sesion = None
+
+
+def frames_sinteticos(ancho: int = 640, alto: int = 480, semilla: int = 0) -> Iterator[np.ndarray]:
+    """Camara falsa: un fondo con ruido y un bloque que se desplaza."""
+    rng = np.random.default_rng(semilla)
+    fondo = rng.integers(0, 255, (alto, ancho, 3), dtype=np.uint8)
+    i = 0
+    while True:
+        frame = fondo.copy()
+        x = (i * 7) % (ancho - 120)
+        frame[alto // 4 : alto // 4 + 200, x : x + 120] = (90, 140, 200)
+        i += 1
+        yield frame
+
+
+def frames_captura(fuente: Union[int, str]) -> Iterator[np.ndarray]:
+    cap = cv2.VideoCapture(fuente)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estacion ligera del servicio de ingesta")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--fuente", default="0", help="indice de camara o ruta de video")
+    parser.add_argument("--sintetico", action="store_true", help="usar una camara falsa")
+    parser.add_argument("--frames", type=int, default=0, help="frames a enviar (0: sin limite)")
+    parser.add_argument("--usuario", default=None)
+    parser.add_argument(
+        "--calibracion",
+        default=None,
+        help="postura_base.json a enviar; por defecto la local, o la guardada en el servidor si hay --usuario",
+    )
+    parser.add_argument("--calidad", type=int, default=80)
+    args = parser.parse_args()
+
+    if args.sintetico:
+        frames = frames_sinteticos()
+    else:
+        frames = frames_captura(int(args.fuente) if args.fuente.isdigit() else args.fuente)
+    postura = None
+    if args.calibracion or not args.usuario:
+        # Sin usuario el servidor no tiene calibracion que buscar: se envia la local
+        from PosturaZen.deteccion.detector import cargar_postura
+        from PosturaZen.main import BASE_PATH
+
+        postura = cargar_postura(args.calibracion or BASE_PATH)
+    cliente = ClienteIngesta(args.url, args.calidad)
+    cliente.abrir(args.usuario, args.fuente, postura)
+    latencias: List[float] = []
+    rechazados = 0
+    alertas = 0
+    try:
+        for n, frame in enumerate(frames):
+            if args.frames and n >= args.frames:
+                break
+            inicio = time.perf_counter()
+            try:
+                veredicto = cliente.enviar(frame, inicio)
+            except Rechazado as exc:
+                rechazados += 1
+                time.sleep(exc.reintentar)
+                continue
+            latencias.append((time.perf_counter() - inicio) * 1000.0)
+            if veredicto["alertas"] > alertas:
+                alertas = veredicto["alertas"]
+                print("⚠️ Postura incorrecta")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cliente.cerrar()
+    if latencias:
+        p50, p95 = np.percentile(latencias, [50, 95])
+        print(f"frames: {len(latencias)}  rechazados: {rechazados}  p50: {p50:.1f} ms  p95: {p95:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
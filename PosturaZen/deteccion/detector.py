@@ -3,141 +3,239 @@
 from __future__ import annotations
 
 import json
-import hashlib
 import os
-from collections import deque
-from typing import Deque, Dict
+import time
+from typing import Dict, List, Optional, Union
 
 import cv2
-from ultralytics import YOLO
+import numpy as np
 
-from PosturaZen.utils.angulos import calcular_angulo
-from PosturaZen.utils.hrv import HRVEstimator
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, metricas_frame
+from PosturaZen.utils.grabacion import GrabadorPuntos
+from PosturaZen.utils.hrv import HRVEstimator, media_verde
+from PosturaZen.utils.perfil import PERFIL, Perfilador
 import PosturaZen.voz.feedback as feedback
-from modules.posture_analysis import is_posture_stable
+from modules.posture_analysis import StabilityTracker
 from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.alertas import FELICITACION, INICIO, RECORDATORIO, EventoAlerta, MotorAlertas, Tolerancias
+from PosturaZen.deteccion.backends import BackendPose
+from PosturaZen.deteccion.registro import BackendCompartido
+from PosturaZen.deteccion.pipeline import Paquete, Pipeline
+from PosturaZen.deteccion.preproceso import Preprocesador
+from PosturaZen.deteccion.roi import ProveedorROI
+from PosturaZen.deteccion.seguimiento import SeguidorPuntos
+from PosturaZen.utils.telemetria import RegistroFrame, Telemetria
+from PosturaZen.utils.tramas import PublicadorUDP
 
 
-KEYPOINT_INDEX = {
-    "left_shoulder": 5,
-    "right_shoulder": 6,
-    "left_hip": 11,
-    "right_hip": 12,
-    "nose": 0,
-}
+def puntos_por_persona(keypoints: np.ndarray) -> List[Dict[str, tuple]]:
+    """Extrae los puntos de interes de cada persona de un arreglo ``(personas, 17, 2)``."""
+    personas = []
+    for kp in keypoints:
+        personas.append({n: (float(kp[idx][0]), float(kp[idx][1])) for n, idx in KEYPOINT_INDEX.items()})
+    return personas
 
 
 class Detector:
     """Detecta postura en tiempo real bas\u00e1ndose en la calibraci\u00f3n."""
 
-    def __init__(self, postura_base: PosturaBase, fps: int = 30, no_molestar: bool = False) -> None:
+    def __init__(
+        self,
+        postura_base: PosturaBase,
+        fps: int = 30,
+        no_molestar: bool = False,
+        telemetria: Optional[Telemetria] = None,
+        backend: Optional[BackendPose] = None,
+        seguidor: Optional[SeguidorPuntos] = None,
+        t_lanzamiento: Optional[float] = None,
+        roi: Optional[ProveedorROI] = None,
+        publicador: Optional[PublicadorUDP] = None,
+        perfil: Optional[Perfilador] = None,
+        preproceso: Optional[Preprocesador] = None,
+        tolerancias: Optional[Tolerancias] = None,
+        grabador: Optional[GrabadorPuntos] = None,
+        silencioso: bool = False,
+    ) -> None:
         self.postura_base = postura_base
         self.fps = fps
         self.no_molestar = no_molestar
-        self.window: Deque[bool] = deque(maxlen=fps * 5)
-        self.model = YOLO("yolov8n-pose.pt")
+        # Alertas con histeresis sobre una ventana de 5 s; emite eventos, no un veredicto por frame
+        self.motor = MotorAlertas(postura_base, fps, tolerancias)
+        # Evento de alerta del ultimo frame procesado, si lo hubo
+        self.evento: Optional[EventoAlerta] = None
+        # Sin avisos por consola (al reproducir grabaciones)
+        self.silencioso = silencioso
+        # Permite compartir un mismo backend de pose entre varios detectores
+        self.backend = backend if backend is not None else BackendCompartido()
         self.hrv = HRVEstimator(fps)
-        self.alertas = 0
-        self.buenos_frames = 0
-        self._mov_hist: Deque[tuple] = deque(maxlen=10)
+        self._estabilidad = StabilityTracker(
+            window=10, num_points=len(KEYPOINT_INDEX), threshold=0.02
+        )
         self._frames_estables = 0
+        # Aviso de movimiento ya emitido; propio de cada detector (estacion o sesion)
+        self.alerta_movimiento_activa = False
+        # Histogramas de latencia por etapa; la tecla "p" los activa en caliente
+        self.perfil = perfil if perfil is not None else PERFIL
+        # Region de la cara para el HRV; por defecto derivada de la pose
+        self.roi = roi if roi is not None else ProveedorROI(perfil=self.perfil)
+        # Envio opcional del estado de cada frame al panel en vivo
+        self.publicador = publicador
+        self.pipeline: Optional[Pipeline] = None
+        self.telemetria = telemetria if telemetria is not None else Telemetria()
+        # Si hay seguidor, YOLO solo se ejecuta cada K frames
+        self.seguidor = seguidor
+        # Grabacion opcional de puntos y verde de la cara para reproducir sin camara
+        self.grabador = grabador
+        # Entrada del modelo a tamaño fijo, recortada a la persona
+        self.preproceso = preproceso
+        # Momento (perf_counter) desde el que se mide el primer frame analizado
+        self.t_lanzamiento = t_lanzamiento
+        self.tiempo_primer_frame: Optional[float] = None
+
+    @property
+    def alertas(self) -> int:
+        return self.motor.alertas
 
     def _obtener_puntos(self, frame) -> Dict[str, tuple]:
-        resultados = self.model(frame, verbose=False)[0]
-        if resultados.keypoints is None or len(resultados.keypoints) == 0:
-            return {}
-        kp = resultados.keypoints.xyn[0]
-        puntos = {n: (float(kp[idx][0]), float(kp[idx][1])) for n, idx in KEYPOINT_INDEX.items()}
-        return puntos
-
-    def detectar(self) -> None:
-        cap = cv2.VideoCapture(0)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                continue
-
-            frame_bytes = frame.tobytes()
-            hash_hex = hashlib.sha256(frame_bytes).hexdigest()
-            print(f"Frame hash: {hash_hex}")
-
-            puntos = self._obtener_puntos(frame)
-            if len(puntos) != len(KEYPOINT_INDEX):
-                continue
-
-            shoulder_mid = (
-                (puntos["left_shoulder"][0] + puntos["right_shoulder"][0]) / 2,
-                (puntos["left_shoulder"][1] + puntos["right_shoulder"][1]) / 2,
-            )
-            hip_mid = (
-                (puntos["left_hip"][0] + puntos["right_hip"][0]) / 2,
-                (puntos["left_hip"][1] + puntos["right_hip"][1]) / 2,
-            )
-            nose = (puntos["nose"][0], puntos["nose"][1])
-
-            # Control de movimiento y aviso por voz
-            marco_actual = [(0.0, 0.0)] * 11
-            marco_actual[10] = nose
-            estable = is_posture_stable(self._mov_hist, marco_actual, threshold=0.02)
-            self._mov_hist.append(marco_actual)
-            if not estable:
-                self._frames_estables = 0
-                if not feedback.alerta_movimiento_activa:
-                    feedback.speak(
-                        "Detecté movimiento. Recuerda mantener tu postura alineada."
-                    )
-                    feedback.alerta_movimiento_activa = True
-            else:
-                self._frames_estables += 1
-                if (
-                    feedback.alerta_movimiento_activa
-                    and self._frames_estables >= self.fps * 2
-                ):
-                    feedback.alerta_movimiento_activa = False
-
-            angulo_cuello = calcular_angulo(nose, shoulder_mid, hip_mid)
-            angulo_cadera = calcular_angulo(shoulder_mid, hip_mid, (hip_mid[0], hip_mid[1] + 0.1))
-            centro_x = hip_mid[0]
-
-            dif_cuello = abs(angulo_cuello - self.postura_base.neck_back_angle)
-            dif_cadera = abs(angulo_cadera - self.postura_base.shoulder_hip_angle)
-            dif_centro = abs(centro_x - self.postura_base.center_x)
-
-            mala_postura = dif_cuello > 10 or dif_cadera > 10 or dif_centro > 0.1
-            self.window.append(mala_postura)
-            if mala_postura:
-                self.buenos_frames = 0
-            else:
-                self.buenos_frames += 1
-
-            if len(self.window) == self.window.maxlen and all(self.window):
-                self.alertas += 1
+        if self.preproceso is None:
+            keypoints = self.backend.inferir([frame])[0]
+        else:
+            lienzo, transformacion = self.preproceso.preparar(frame)
+            keypoints = self.preproceso.restaurar(self.backend.inferir([lienzo])[0], transformacion)
+            self.preproceso.seguir(keypoints[0] if len(keypoints) else (), frame.shape[1], frame.shape[0])
+        personas = puntos_por_persona(keypoints)
+        return personas[0] if personas else {}
+
+    def _inferir(self, frame) -> Dict[str, tuple]:
+        if self.seguidor is None:
+            return self._obtener_puntos(frame)
+        return self.seguidor.actualizar(frame, self._obtener_puntos)
+
+    def preparar(self) -> None:
+        """Inicializa los recursos del analisis que no dependen de la camara."""
+        self.roi.preparar()
+
+    def detectar(self, fuente: Union[int, str] = 0) -> None:
+        """Ejecuta la deteccion en vivo mediante el pipeline por etapas.
+
+        Args:
+            fuente: Indice de camara o ruta de video para ``cv2.VideoCapture``.
+        """
+        if self.t_lanzamiento is None:
+            self.t_lanzamiento = time.perf_counter()
+        cap = cv2.VideoCapture(fuente)
+        self.preparar()
+        self.pipeline = Pipeline(
+            cap, self._inferir, self._analizar_paquete, perfil=self.perfil, en_vivo=not isinstance(fuente, str)
+        )
+        self.telemetria.iniciar()
+        try:
+            self.pipeline.ejecutar()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.telemetria.detener()
+            cap.release()
+            cv2.destroyAllWindows()
+            if self.perfil.activo:
+                print(self.perfil.informe())
+
+    def _analizar_paquete(self, paquete: Paquete) -> bool:
+        registro = RegistroFrame(indice=paquete.indice, timestamp=time.time())
+        inicio = time.perf_counter()
+        self.procesar(paquete.frame, paquete.puntos, registro, paquete.t_captura)
+        registro.etapas_ms = {
+            "inferencia": self.pipeline.etapas["inferencia"].ultima_ms,
+            "espera": (paquete.t_inferencia - paquete.t_captura) * 1000.0,
+            "analisis": (time.perf_counter() - inicio) * 1000.0,
+        }
+        with self.perfil.medir("telemetria"):
+            self.telemetria.registrar(registro, paquete.frame)
+            if self.publicador is not None:
+                self.publicador.publicar(registro)
+        if self.tiempo_primer_frame is None:
+            self.tiempo_primer_frame = time.perf_counter() - self.t_lanzamiento
+            print(f"Primer frame analizado a los {self.tiempo_primer_frame:.2f} s del arranque")
+        with self.perfil.medir("ventana"):
+            tecla = cv2.waitKey(1) & 0xFF
+        if tecla == ord("p"):
+            self.perfil.alternar()
+        return tecla != ord("q")
+
+    def procesar(
+        self,
+        frame,
+        puntos: Dict[str, tuple],
+        registro: RegistroFrame,
+        t_captura: Optional[float] = None,
+        verde: Optional[float] = None,
+    ) -> None:
+        """Analiza los puntos de un frame y actualiza alertas y HRV.
+
+        Los resultados del frame se anotan en ``registro`` para la telemetria.
+        Con ``frame`` en ``None`` (solo puntos, sin imagen) el HRV solo se
+        actualiza si se da ``verde``, la media del verde de la cara ya
+        calculada (al reproducir una grabacion). ``t_captura`` (segundos,
+        reloj monotono) permite al HRV remuestrear la señal aunque el
+        analisis vaya por detras de la camara.
+        """
+        self.evento = None
+        if len(puntos) != len(KEYPOINT_INDEX):
+            if self.grabador is not None:
+                self.grabador.escribir(registro.timestamp if t_captura is None else t_captura)
+            return
+
+        # Control de movimiento y aviso por voz
+        with self.perfil.medir("estabilidad"):
+            estable = self._estabilidad.update(list(puntos.values()))
+        inicio_voz = time.perf_counter()
+        if not estable:
+            self._frames_estables = 0
+            if not self.alerta_movimiento_activa:
+                feedback.speak(
+                    "Detecté movimiento. Recuerda mantener tu postura alineada."
+                )
+                self.alerta_movimiento_activa = True
+        else:
+            self._frames_estables += 1
+            if (
+                self.alerta_movimiento_activa
+                and self._frames_estables >= self.fps * 2
+            ):
+                self.alerta_movimiento_activa = False
+        self.perfil.registrar("voz", time.perf_counter() - inicio_voz)
+
+        with self.perfil.medir("metricas"):
+            angulo_cuello, angulo_cadera, centro_x = metricas_frame(puntos)
+        inicio_alertas = time.perf_counter()
+        evento = self.evento = self.motor.actualizar(angulo_cuello, angulo_cadera, centro_x, t_captura)
+        if evento is not None:
+            if evento.tipo in (INICIO, RECORDATORIO):
                 feedback.decir("Cuidado con tu postura", self.no_molestar)
-                print("\u26a0\ufe0f Postura incorrecta")
-
-            if self.buenos_frames >= self.fps * 60 * 10:
-                self.buenos_frames = 0
+                if not self.silencioso:
+                    print("\u26a0\ufe0f Postura incorrecta")
+            elif evento.tipo == FELICITACION:
                 feedback.decir("Excelente postura, sigue asi", self.no_molestar)
-
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-            hrv_val = None
-            for (x, y, w, h) in faces[:1]:
-                roi = frame[y : y + h, x : x + w]
-                hrv_val = self.hrv.update(roi)
-            estado = "\u2705" if not mala_postura else "\u26a0\ufe0f"
-            mensaje = f"Postura: {estado} | Alertas: {self.alertas}"
-            if hrv_val is not None:
-                mensaje += f" | HRV: {hrv_val:.2f}"
-            print(mensaje)
-
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
-
-        cap.release()
-        cv2.destroyAllWindows()
+        self.perfil.registrar("alertas", time.perf_counter() - inicio_alertas)
+
+        hrv_val = None
+        with self.perfil.medir("roi"):
+            roi = self.roi.obtener(frame, puntos) if frame is not None else None
+            if roi is not None:
+                verde = media_verde(roi)
+        if verde is not None:
+            with self.perfil.medir("hrv"):
+                hrv_val = self.hrv.update_valor(verde, t_captura)
+        if self.grabador is not None:
+            self.grabador.escribir(registro.timestamp if t_captura is None else t_captura, puntos, verde)
+
+        registro.angulo_cuello = angulo_cuello
+        registro.angulo_cadera = angulo_cadera
+        registro.centro_x = centro_x
+        registro.mala_postura = self.motor.frame_malo
+        registro.estable = estable
+        registro.alertas = self.alertas
+        registro.hrv = hrv_val
 
 
 def cargar_postura(path: str = "PosturaZen/postura_base.json") -> PosturaBase:
@@ -0,0 +1,152 @@
+"""Deteccion de postura en varias estaciones con inferencia por lotes.
+
+Agrupa los frames de varias camaras (o las personas de un mismo frame) en una
+sola pasada del modelo de pose y reparte cada resultado al :class:`Detector`
+correspondiente, que conserva su propia ventana, contadores de alertas y HRV.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import cv2
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.backends import BackendPose
+from PosturaZen.deteccion.registro import BackendCompartido
+from PosturaZen.deteccion.detector import Detector, puntos_por_persona
+from PosturaZen.deteccion.pipeline import BufferUltimo, Paquete, Pipeline
+from PosturaZen.utils.telemetria import RegistroFrame
+from PosturaZen.utils.tramas import PublicadorUDP
+
+Fuente = Union[int, str]
+
+
+class GrupoFuentes:
+    """Lee varias camaras en paralelo y entrega el ultimo frame de cada una.
+
+    Cada camara tiene su propio hilo de captura, asi una camara lenta no
+    retrasa a las demas. ``read()`` devuelve una lista con el frame mas
+    reciente de cada fuente (``None`` si esa fuente no tiene uno nuevo).
+    """
+
+    def __init__(self, fuentes: Sequence[Fuente]) -> None:
+        self.capturas = [cv2.VideoCapture(f) for f in fuentes]
+        self._buffers = [BufferUltimo(1) for _ in fuentes]
+        self._nuevo = threading.Event()
+        self._activo = threading.Event()
+        self._activo.set()
+        self._hilos = [
+            threading.Thread(target=self._leer, args=(i,), name=f"captura-{i}", daemon=True)
+            for i in range(len(fuentes))
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def _leer(self, i: int) -> None:
+        cap = self.capturas[i]
+        while self._activo.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.005)
+                continue
+            self._buffers[i].poner(frame)
+            self._nuevo.set()
+
+    def read(self) -> Tuple[bool, List[Any]]:
+        if not self._nuevo.wait(timeout=0.1):
+            return False, []
+        self._nuevo.clear()
+        frames = [b.tomar(timeout=0) for b in self._buffers]
+        return True, frames
+
+    def release(self) -> None:
+        self._activo.clear()
+        for hilo in self._hilos:
+            hilo.join(timeout=1.0)
+        for cap in self.capturas:
+            cap.release()
+
+
+class DetectorMultiple:
+    """Ejecuta varios :class:`Detector` compartiendo una pasada por lote.
+
+    Args:
+        postura_base: Calibracion de referencia comun a todas las estaciones.
+        fuentes: Indices o rutas de camara. Con ``personas`` mayor que cero se
+            usa solo la primera fuente.
+        personas: Si es mayor que cero, se vigilan hasta ``personas`` usuarios
+            en un mismo frame en lugar de varias camaras. Las personas se
+            asignan a los detectores de izquierda a derecha segun la nariz.
+        panel: ``"host:puerto"`` del backend al que enviar el estado de cada
+            estacion; la estacion ``i`` publica con identificador ``i``.
+    """
+
+    def __init__(
+        self,
+        postura_base: PosturaBase,
+        fuentes: Sequence[Fuente] = (0,),
+        fps: int = 30,
+        no_molestar: bool = False,
+        personas: int = 0,
+        backend: Optional[BackendPose] = None,
+        panel: Optional[str] = None,
+    ) -> None:
+        self.fuentes = list(fuentes[:1]) if personas else list(fuentes)
+        self.personas = personas
+        self.backend = backend if backend is not None else BackendCompartido()
+        total = personas if personas else len(self.fuentes)
+        self.detectores = [
+            Detector(
+                postura_base,
+                fps,
+                no_molestar,
+                backend=self.backend,
+                publicador=PublicadorUDP(panel, i) if panel else None,
+            )
+            for i in range(total)
+        ]
+        self.pipeline: Optional[Pipeline] = None
+
+    def _inferir_lote(self, frames: List[Any]) -> List[Any]:
+        validos = [i for i, f in enumerate(frames) if f is not None]
+        if not validos:
+            return []
+        resultados = self.backend.inferir([frames[i] for i in validos])
+        if self.personas:
+            personas = puntos_por_persona(resultados[0])
+            personas.sort(key=lambda p: p["nose"][0])
+            return [(i, frames[0], p) for i, p in enumerate(personas[: self.personas])]
+        return [
+            (i, frames[i], (puntos_por_persona(r) or [{}])[0])
+            for i, r in zip(validos, resultados)
+        ]
+
+    def _analizar_lote(self, paquete: Paquete) -> bool:
+        for i, frame, puntos in paquete.puntos:
+            detector = self.detectores[i]
+            registro = RegistroFrame(indice=paquete.indice, timestamp=time.time())
+            detector.procesar(frame, puntos, registro, paquete.t_captura)
+            detector.telemetria.registrar(registro, frame)
+            if detector.publicador is not None:
+                detector.publicador.publicar(registro)
+        return not (cv2.waitKey(1) & 0xFF == ord("q"))
+
+    def detectar(self) -> None:
+        """Ejecuta la deteccion de todas las estaciones hasta interrumpirse."""
+        grupo = GrupoFuentes(self.fuentes)
+        for detector in self.detectores:
+            detector.preparar()
+            detector.telemetria.iniciar()
+        self.pipeline = Pipeline(grupo, self._inferir_lote, self._analizar_lote)
+        try:
+            self.pipeline.ejecutar()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for detector in self.detectores:
+                detector.telemetria.detener()
+            grupo.release()
+            cv2.destroyAllWindows()
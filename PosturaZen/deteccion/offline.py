@@ -0,0 +1,294 @@
+"""Analisis por lotes de videos grabados, sin camara ni ventana.
+
+Procesa archivos de video (o directorios con ellos) tan rapido como lo
+permita el modelo: un hilo decodifica mientras el hilo principal infiere en
+lotes, sin pausas de ``waitKey``. Cada frame produce una fila con sus
+metricas de postura y las alertas que habria emitido ``Detector``, escrita
+de forma incremental en un archivo columnar. Con el mismo video y backend el
+resultado es siempre el mismo, lo que permite reproducir alertas.
+
+Uso::
+
+    python -m PosturaZen.deteccion.offline grabaciones/ -o sesiones.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.alertas import INICIO, RECORDATORIO, MotorAlertas, Tolerancias
+from PosturaZen.deteccion.backends import BackendPose
+from PosturaZen.deteccion.registro import BackendCompartido
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, metricas_lote
+from modules.posture_analysis import StabilityTracker
+
+try:  # pyarrow es opcional; sin el se escriben columnas binarias crudas
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende del entorno
+    pa = None
+
+EXTENSIONES_VIDEO = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+COLUMNAS = {
+    "frame": np.int64,
+    "t_ms": np.float64,
+    "persona": np.bool_,
+    "angulo_cuello": np.float32,
+    "angulo_cadera": np.float32,
+    "centro_x": np.float32,
+    "mala_postura": np.bool_,
+    "estable": np.bool_,
+    "alerta": np.bool_,
+}
+
+
+def listar_videos(rutas: Sequence[str]) -> List[str]:
+    """Expande directorios a los videos que contienen, en orden alfabetico."""
+    videos: List[str] = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            videos.extend(
+                os.path.join(ruta, nombre)
+                for nombre in sorted(os.listdir(ruta))
+                if nombre.lower().endswith(EXTENSIONES_VIDEO)
+            )
+        else:
+            videos.append(ruta)
+    return videos
+
+
+class EscritorColumnas:
+    """Escribe filas por bloques en Parquet o, sin ``pyarrow``, en columnas crudas.
+
+    En el formato crudo ``ruta`` es un directorio con un archivo binario por
+    columna y un ``esquema.json``; se lee con :func:`leer_columnas`. Si
+    ``ruta`` pide Parquet y falta ``pyarrow``, el directorio se crea sin la
+    extension ``.parquet``.
+    """
+
+    def __init__(self, ruta: str) -> None:
+        if pa is None and ruta.endswith(".parquet"):
+            ruta = ruta[: -len(".parquet")]
+            print(f"pyarrow no esta instalado: se escriben columnas crudas en {ruta}/ (pip install pyarrow)")
+        self.ruta = ruta
+        self.filas = 0
+        self._parquet = None
+        self._archivos: Dict[str, Any] = {}
+        if pa is not None and ruta.endswith(".parquet"):
+            esquema = pa.schema(
+                [("video", pa.string())]
+                + [(c, pa.from_numpy_dtype(np.dtype(t))) for c, t in COLUMNAS.items()]
+            )
+            self._parquet = pq.ParquetWriter(ruta, esquema)
+        else:
+            os.makedirs(ruta, exist_ok=True)
+            self._videos = open(os.path.join(ruta, "video.txt"), "w", encoding="utf-8")
+            self._archivos = {c: open(os.path.join(ruta, f"{c}.bin"), "wb") for c in COLUMNAS}
+            with open(os.path.join(ruta, "esquema.json"), "w", encoding="utf-8") as f:
+                json.dump({c: np.dtype(t).str for c, t in COLUMNAS.items()}, f, indent=4)
+
+    def escribir(self, video: str, bloque: Dict[str, np.ndarray]) -> None:
+        n = len(bloque["frame"])
+        if n == 0:
+            return
+        if self._parquet is not None:
+            datos = {"video": [video] * n, **{c: bloque[c].astype(t) for c, t in COLUMNAS.items()}}
+            self._parquet.write_table(pa.table(datos, schema=self._parquet.schema))
+        else:
+            self._videos.write((video + "\n") * n)
+            for c, t in COLUMNAS.items():
+                self._archivos[c].write(np.ascontiguousarray(bloque[c], dtype=t).tobytes())
+        self.filas += n
+
+    def cerrar(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        for f in self._archivos.values():
+            f.close()
+        if self._archivos:
+            self._videos.close()
+
+
+def leer_columnas(ruta: str) -> Dict[str, np.ndarray]:
+    """Lee un directorio escrito por :class:`EscritorColumnas` sin ``pyarrow``."""
+    with open(os.path.join(ruta, "esquema.json"), encoding="utf-8") as f:
+        esquema = json.load(f)
+    columnas = {c: np.fromfile(os.path.join(ruta, f"{c}.bin"), dtype=np.dtype(t)) for c, t in esquema.items()}
+    with open(os.path.join(ruta, "video.txt"), encoding="utf-8") as f:
+        columnas["video"] = np.array(f.read().splitlines())
+    return columnas
+
+
+def _decodificar(ruta: str, salida: "queue.Queue", detener: threading.Event) -> None:
+    cap = cv2.VideoCapture(ruta)
+    indice = 0
+    try:
+        while not detener.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            salida.put((indice, cap.get(cv2.CAP_PROP_POS_MSEC), frame))
+            indice += 1
+    finally:
+        cap.release()
+        salida.put(None)
+
+
+def _lotes(ruta: str, tamano: int, profundidad: int) -> Iterator[List[Tuple[int, float, np.ndarray]]]:
+    """Decodifica en un hilo aparte y entrega los frames en lotes."""
+    cola: "queue.Queue" = queue.Queue(maxsize=profundidad)
+    detener = threading.Event()
+    hilo = threading.Thread(target=_decodificar, args=(ruta, cola, detener), daemon=True)
+    hilo.start()
+    lote: List[Tuple[int, float, np.ndarray]] = []
+    try:
+        while True:
+            item = cola.get()
+            if item is None:
+                break
+            lote.append(item)
+            if len(lote) == tamano:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+    finally:
+        detener.set()
+        while hilo.is_alive():
+            try:
+                cola.get_nowait()
+            except queue.Empty:
+                hilo.join(timeout=0.05)
+
+
+class AnalizadorOffline:
+    """Reproduce sobre videos la logica de alertas de ``Detector``.
+
+    Args:
+        postura_base: Calibracion de referencia.
+        backend: Backend de pose; por defecto el compartido del proceso.
+        fps: FPS de referencia para el tamaño de la ventana de alertas.
+        lote: Frames por llamada al modelo.
+        tolerancias: Tolerancias de las alertas; usar las mismas que en vivo
+            para obtener los mismos avisos.
+    """
+
+    def __init__(
+        self,
+        postura_base: PosturaBase,
+        backend: Optional[BackendPose] = None,
+        fps: int = 30,
+        lote: int = 8,
+        tolerancias: Optional[Tolerancias] = None,
+    ) -> None:
+        self.postura_base = postura_base
+        self.tolerancias = tolerancias
+        self.backend = backend if backend is not None else BackendCompartido()
+        self.fps = fps
+        self.lote = lote
+
+    def analizar(self, ruta: str, escritor: EscritorColumnas) -> int:
+        """Analiza un video y devuelve cuantas alertas de postura produjo."""
+        # Mismo motor de alertas que Detector, con los tiempos del video
+        motor = MotorAlertas(self.postura_base, self.fps, self.tolerancias)
+        estabilidad = StabilityTracker(window=10, num_points=len(KEYPOINT_INDEX), threshold=0.02)
+        indices = list(KEYPOINT_INDEX.values())
+
+        for lote in _lotes(ruta, self.lote, self.lote * 4):
+            personas = self.backend.inferir([frame for _, _, frame in lote])
+            n = len(lote)
+            kp = np.zeros((n, 17, 2), dtype=np.float32)
+            hay = np.array([len(p) > 0 for p in personas])
+            for i, p in enumerate(personas):
+                if len(p):
+                    kp[i] = p[0]
+            metricas = metricas_lote(kp, self.postura_base)
+            estable = np.zeros(n, dtype=bool)
+            alerta = np.zeros(n, dtype=bool)
+            malo = np.zeros(n, dtype=bool)
+            for i in np.flatnonzero(hay):
+                estable[i] = estabilidad.update(kp[i, indices])
+                evento = motor.actualizar(
+                    float(metricas["angulo_cuello"][i]),
+                    float(metricas["angulo_cadera"][i]),
+                    float(metricas["centro_x"][i]),
+                    lote[i][1] / 1000.0,
+                )
+                malo[i] = motor.frame_malo
+                alerta[i] = evento is not None and evento.tipo in (INICIO, RECORDATORIO)
+
+            escritor.escribir(
+                ruta,
+                {
+                    "frame": np.array([idx for idx, _, _ in lote]),
+                    "t_ms": np.array([t for _, t, _ in lote]),
+                    "persona": hay,
+                    "angulo_cuello": np.where(hay, metricas["angulo_cuello"], np.nan),
+                    "angulo_cadera": np.where(hay, metricas["angulo_cadera"], np.nan),
+                    "centro_x": np.where(hay, metricas["centro_x"], np.nan),
+                    "mala_postura": malo,
+                    "estable": estable,
+                    "alerta": alerta,
+                },
+            )
+        return motor.alertas
+
+
+def main() -> None:
+    from PosturaZen.calibracion.almacen import RUTA_CALIBRACIONES, AlmacenCalibraciones
+    from PosturaZen.deteccion.detector import cargar_postura
+    from PosturaZen.main import BASE_PATH
+
+    parser = argparse.ArgumentParser(description="Analisis offline de videos de postura")
+    parser.add_argument("rutas", nargs="+", help="Videos o directorios de videos")
+    parser.add_argument("-o", "--salida", default="postura_offline.parquet")
+    parser.add_argument("--backend", default="ultralytics")
+    parser.add_argument("--calibracion", default=BASE_PATH)
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument(
+        "--tolerancias",
+        default=os.environ.get("POSTURAZEN_TOLERANCIAS"),
+        help="cuello,cadera,centro (por defecto POSTURAZEN_TOLERANCIAS)",
+    )
+    parser.add_argument("--usuario", help="usar la calibracion guardada de este usuario, como en vivo")
+    parser.add_argument("--camara", default="0")
+    args = parser.parse_args()
+
+    # Misma calibracion y tolerancias que PosturaZen.main para obtener las mismas alertas
+    postura_base = cargar_postura(args.calibracion)
+    tolerancias = Tolerancias.desde_texto(args.tolerancias) if args.tolerancias else None
+    if args.usuario:
+        almacen = AlmacenCalibraciones(os.environ.get("POSTURAZEN_CALIBRACIONES", RUTA_CALIBRACIONES))
+        guardada = almacen.obtener(args.usuario, args.camara)
+        if guardada is None:
+            parser.error(f"No hay calibracion vigente de '{args.usuario}' para la camara {args.camara}")
+        postura_base = guardada.postura
+        if tolerancias is None:
+            tolerancias = Tolerancias.desde_calibracion(guardada.desviaciones)
+
+    analizador = AnalizadorOffline(
+        postura_base, BackendCompartido(args.backend), args.fps, args.lote, tolerancias
+    )
+    escritor = EscritorColumnas(args.salida)
+    try:
+        for video in listar_videos(args.rutas):
+            alertas = analizador.analizar(video, escritor)
+            print(f"{video}: {alertas} alertas")
+    finally:
+        escritor.cerrar()
+    print(f"{escritor.filas} frames escritos en {escritor.ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Pipeline por etapas para la deteccion de postura.
+
+Separa la captura de la camara, la inferencia del modelo de pose y el
+analisis/retroalimentacion en etapas independientes. Cada etapa se comunica
+con la siguiente mediante un buffer acotado que conserva solo los elementos
+mas recientes, de modo que un modelo lento o una alerta de voz no frenan la
+captura ni acumulan frames atrasados.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+from PosturaZen.utils.perfil import PERFIL, Perfilador
+
+
+@dataclass
+class Paquete:
+    """Frame capturado junto con los resultados de las etapas posteriores."""
+
+    indice: int
+    t_captura: float
+    frame: Any
+    # Puntos por nombre; en modo por lotes, la lista de resultados por estacion
+    puntos: Any = field(default_factory=dict)
+    t_inferencia: float = 0.0
+
+
+class BufferUltimo:
+    """Buffer acotado que descarta los elementos antiguos al llenarse."""
+
+    def __init__(self, capacidad: int = 1) -> None:
+        self._items: Deque[Any] = deque(maxlen=capacidad)
+        self._cond = threading.Condition()
+        self.descartados = 0
+
+    def poner(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.descartados += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def tomar(self, timeout: Optional[float] = None) -> Any:
+        """Devuelve el elemento mas antiguo o ``None`` si vence ``timeout``."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def despertar(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+@dataclass
+class EstadisticasEtapa:
+    """Latencias acumuladas de una etapa del pipeline (en milisegundos)."""
+
+    procesados: int = 0
+    ultima_ms: float = 0.0
+    media_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def registrar(self, segundos: float) -> None:
+        ms = segundos * 1000.0
+        self.procesados += 1
+        self.ultima_ms = ms
+        # Media exponencial: barata y sigue los cambios de carga
+        self.media_ms = ms if self.procesados == 1 else 0.9 * self.media_ms + 0.1 * ms
+        self.max_ms = max(self.max_ms, ms)
+
+
+class Pipeline:
+    """Ejecuta captura, inferencia y analisis en etapas concurrentes.
+
+    Args:
+        fuente: Objeto con metodo ``read()`` compatible con ``cv2.VideoCapture``.
+        inferir: Funcion que recibe un frame y devuelve los puntos detectados.
+        analizar: Funcion que procesa un :class:`Paquete` ya inferido. Si
+            devuelve ``False`` el pipeline se detiene.
+        capacidad: Profundidad maxima de cada buffer entre etapas.
+        perfil: Perfilador que recibe la latencia de cada etapa; por defecto
+            el del proceso.
+        en_vivo: Si ``read()`` falla, una camara en vivo se reintenta; con
+            ``False`` (un archivo de video) la fuente se da por agotada y el
+            pipeline termina tras analizar los frames ya capturados.
+    """
+
+    def __init__(
+        self,
+        fuente: Any,
+        inferir: Callable[[Any], Any],
+        analizar: Callable[[Paquete], Optional[bool]],
+        capacidad: int = 1,
+        perfil: Optional[Perfilador] = None,
+        en_vivo: bool = True,
+    ) -> None:
+        self.fuente = fuente
+        self.en_vivo = en_vivo
+        self.inferir = inferir
+        self.analizar = analizar
+        self.buffer_captura = BufferUltimo(capacidad)
+        self.buffer_analisis = BufferUltimo(capacidad)
+        self.etapas: Dict[str, EstadisticasEtapa] = {
+            "captura": EstadisticasEtapa(),
+            "inferencia": EstadisticasEtapa(),
+            "analisis": EstadisticasEtapa(),
+            "total": EstadisticasEtapa(),
+        }
+        self.perfil = perfil if perfil is not None else PERFIL
+        self._activo = threading.Event()
+        self._captura_terminada = threading.Event()
+        self._inferencia_terminada = threading.Event()
+        # Primera excepcion de un hilo de trabajo; ``ejecutar`` la relanza
+        self._error: Optional[BaseException] = None
+        self._hilos: list = []
+
+    def iniciar(self) -> None:
+        """Arranca los hilos de captura e inferencia."""
+        if self._activo.is_set():
+            return
+        self._captura_terminada.clear()
+        self._inferencia_terminada.clear()
+        self._error = None
+        self._activo.set()
+        self._hilos = [
+            threading.Thread(
+                target=self._trabajar, args=(self._bucle_captura, self._captura_terminada), name="captura", daemon=True
+            ),
+            threading.Thread(
+                target=self._trabajar,
+                args=(self._bucle_inferencia, self._inferencia_terminada),
+                name="inferencia",
+                daemon=True,
+            ),
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self) -> None:
+        self._activo.clear()
+        self.buffer_captura.despertar()
+        self.buffer_analisis.despertar()
+        for hilo in self._hilos:
+            hilo.join(timeout=1.0)
+        self._hilos = []
+
+    @property
+    def activo(self) -> bool:
+        return self._activo.is_set()
+
+    def ejecutar(self, limite: Optional[float] = None) -> None:
+        """Inicia el pipeline y ejecuta la etapa de analisis en este hilo.
+
+        Con ``limite`` el pipeline se detiene pasados esos segundos aunque
+        ``analizar`` no lo haya pedido. Si la captura o la inferencia lanzan
+        una excepcion, el pipeline se detiene y se relanza aqui.
+        """
+        fin_limite = None if limite is None else time.perf_counter() + limite
+        self.iniciar()
+        try:
+            while self._activo.is_set():
+                if fin_limite is not None and time.perf_counter() >= fin_limite:
+                    break
+                paquete = self.buffer_analisis.tomar(timeout=0.1)
+                if paquete is None:
+                    if self._inferencia_terminada.is_set() and not len(self.buffer_analisis):
+                        break
+                    continue
+                inicio = time.perf_counter()
+                continuar = self.analizar(paquete)
+                fin = time.perf_counter()
+                self._registrar("analisis", fin - inicio)
+                self._registrar("total", fin - paquete.t_captura)
+                if continuar is False:
+                    break
+        finally:
+            self.detener()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _trabajar(self, bucle: Callable[[], None], terminada: threading.Event) -> None:
+        """Ejecuta el bucle de un hilo y, si falla, detiene el pipeline en lugar de morir en silencio."""
+        try:
+            bucle()
+        except BaseException as exc:
+            if self._error is None:
+                self._error = exc
+            self._activo.clear()
+            terminada.set()
+            self.buffer_captura.despertar()
+            self.buffer_analisis.despertar()
+
+    def _registrar(self, etapa: str, segundos: float) -> None:
+        self.etapas[etapa].registrar(segundos)
+        self.perfil.registrar(etapa, segundos)
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        """Devuelve profundidad de colas, descartes y latencias por etapa."""
+        datos: Dict[str, Dict[str, float]] = {
+            nombre: dict(vars(etapa)) for nombre, etapa in self.etapas.items()
+        }
+        datos["captura"].update(
+            cola=len(self.buffer_captura), descartados=self.buffer_captura.descartados
+        )
+        datos["inferencia"].update(
+            cola=len(self.buffer_analisis), descartados=self.buffer_analisis.descartados
+        )
+        return datos
+
+    def _bucle_captura(self) -> None:
+        indice = 0
+        while self._activo.is_set():
+            inicio = time.perf_counter()
+            ret, frame = self.fuente.read()
+            if not ret:
+                if not self.en_vivo:
+                    # Fin del video: las etapas siguientes vacian sus buffers y terminan
+                    self._captura_terminada.set()
+                    return
+                time.sleep(0.005)
+                continue
+            t_captura = time.perf_counter()
+            self._registrar("captura", t_captura - inicio)
+            self.buffer_captura.poner(Paquete(indice, t_captura, frame))
+            indice += 1
+
+    def _bucle_inferencia(self) -> None:
+        while self._activo.is_set():
+            paquete = self.buffer_captura.tomar(timeout=0.1)
+            if paquete is None:
+                if self._captura_terminada.is_set() and not len(self.buffer_captura):
+                    self._inferencia_terminada.set()
+                    return
+                continue
+            inicio = time.perf_counter()
+            paquete.puntos = self.inferir(paquete.frame)
+            paquete.t_inferencia = time.perf_counter()
+            self._registrar("inferencia", paquete.t_inferencia - inicio)
+            self.buffer_analisis.poner(paquete)
@@ -0,0 +1,154 @@
+"""Preparacion de la entrada del modelo de pose a tamaño fijo.
+
+Pasar al modelo el frame completo hace que el coste dependa de la camara: un
+frame 1080p se copia, se convierte y se reescala dentro del backend en cada
+inferencia. :class:`Preprocesador` reescala una sola vez (letterbox) a un
+lienzo cuadrado preasignado, opcionalmente recortando antes a la caja de la
+persona del resultado anterior, convierte el color sobre ese mismo lienzo y
+devuelve la transformacion para llevar los puntos de vuelta a coordenadas
+normalizadas del frame completo. El coste de la inferencia depende del lado
+del lienzo, no de la resolucion de la camara, y el recorte da mas pixeles
+a la persona.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# (x, y, ancho, alto) en pixeles del frame
+Caja = Tuple[int, int, int, int]
+
+
+@dataclass
+class Transformacion:
+    """Como se obtuvo el lienzo a partir del frame."""
+
+    # Region del frame que se reescalo
+    x0: int
+    y0: int
+    # Pixeles de lienzo por pixel de frame
+    escala: float
+    # Desplazamiento del contenido dentro del lienzo
+    pad_x: int
+    pad_y: int
+    ancho_frame: int
+    alto_frame: int
+    lado: int
+
+
+class Preprocesador:
+    """Letterbox a un lienzo preasignado con recorte opcional a la persona.
+
+    Args:
+        lado: Lado del lienzo cuadrado que recibe el modelo.
+        recorte: Recortar a la caja de la persona detectada en el frame
+            anterior; sin persona se usa el frame completo.
+        margen: Fraccion del lado mayor de la caja de la persona añadida a
+            cada lado del recorte.
+        lado_minimo: Lado minimo del recorte como fraccion del lado menor
+            del frame, para no ampliar de mas una persona lejana.
+        intervalo_completo: Cada cuantos frames se usa el frame completo aun
+            con recorte, para encontrar personas que entren en escena.
+        rgb: Convertir el lienzo de BGR a RGB sobre si mismo.
+        relleno: Valor de las bandas del letterbox.
+    """
+
+    def __init__(
+        self,
+        lado: int = 640,
+        recorte: bool = True,
+        margen: float = 0.25,
+        lado_minimo: float = 0.3,
+        intervalo_completo: int = 30,
+        rgb: bool = False,
+        relleno: int = 114,
+    ) -> None:
+        self.lado = lado
+        self.recorte = recorte
+        self.margen = margen
+        self.lado_minimo = lado_minimo
+        self.intervalo_completo = intervalo_completo
+        self.rgb = rgb
+        self.relleno = relleno
+        self.lienzo = np.full((lado, lado, 3), relleno, dtype=np.uint8)
+        self.caja: Optional[Caja] = None
+        self.recortados = 0
+        self._frames = 0
+        self._bandas: Optional[Tuple[int, int, int, int]] = None
+
+    def preparar(self, frame: np.ndarray) -> Tuple[np.ndarray, Transformacion]:
+        """Escribe en el lienzo la region de interes de ``frame``.
+
+        El lienzo se reutiliza: su contenido es valido hasta la siguiente
+        llamada.
+        """
+        alto, ancho = frame.shape[:2]
+        self._frames += 1
+        caja = self.caja
+        if caja is None or not self.recorte or (
+            self.intervalo_completo and self._frames % self.intervalo_completo == 0
+        ):
+            caja = (0, 0, ancho, alto)
+        else:
+            self.recortados += 1
+        x0, y0, w, h = caja
+        escala = min(self.lado / w, self.lado / h)
+        nw, nh = max(int(round(w * escala)), 1), max(int(round(h * escala)), 1)
+        pad_x, pad_y = (self.lado - nw) // 2, (self.lado - nh) // 2
+
+        # Solo se repintan las bandas, y solo si cambio la geometria del contenido
+        bandas = (pad_x, pad_y, nw, nh)
+        if bandas != self._bandas:
+            self.lienzo[:pad_y] = self.relleno
+            self.lienzo[pad_y + nh :] = self.relleno
+            self.lienzo[:, :pad_x] = self.relleno
+            self.lienzo[:, pad_x + nw :] = self.relleno
+            self._bandas = bandas
+        destino = self.lienzo[pad_y : pad_y + nh, pad_x : pad_x + nw]
+        # Bilineal: su coste depende del lienzo, no del tamaño del frame
+        cv2.resize(frame[y0 : y0 + h, x0 : x0 + w], (nw, nh), dst=destino, interpolation=cv2.INTER_LINEAR)
+        if self.rgb:
+            cv2.cvtColor(destino, cv2.COLOR_BGR2RGB, dst=destino)
+        return self.lienzo, Transformacion(x0, y0, escala, pad_x, pad_y, ancho, alto, self.lado)
+
+    @staticmethod
+    def restaurar(puntos: np.ndarray, t: Transformacion) -> np.ndarray:
+        """Lleva puntos normalizados al lienzo ``(..., 2)`` a normalizados del frame.
+
+        Los puntos ``(0, 0)`` (no vistos por el modelo) se conservan en cero.
+        """
+        puntos = np.asarray(puntos, dtype=np.float32)
+        salida = np.empty_like(puntos)
+        salida[..., 0] = ((puntos[..., 0] * t.lado - t.pad_x) / t.escala + t.x0) / t.ancho_frame
+        salida[..., 1] = ((puntos[..., 1] * t.lado - t.pad_y) / t.escala + t.y0) / t.alto_frame
+        no_vistos = (puntos[..., 0] <= 0) & (puntos[..., 1] <= 0)
+        salida[no_vistos] = 0.0
+        np.clip(salida, 0.0, 1.0, out=salida)
+        return salida
+
+    def seguir(self, puntos: np.ndarray, ancho: int, alto: int) -> Optional[Caja]:
+        """Actualiza la caja de recorte con los puntos ``(N, 2)`` de la persona principal."""
+        puntos = np.asarray(puntos).reshape(-1, 2)
+        vistos = puntos[(puntos[:, 0] > 0) | (puntos[:, 1] > 0)]
+        if len(vistos) < 3:
+            self.caja = None
+            return None
+        (x_min, y_min), (x_max, y_max) = vistos.min(axis=0) * (ancho, alto), vistos.max(axis=0) * (ancho, alto)
+        lado = max(x_max - x_min, y_max - y_min)
+        m = lado * self.margen
+        minimo = self.lado_minimo * min(ancho, alto)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        w = max(x_max - x_min + 2 * m, minimo)
+        h = max(y_max - y_min + 2 * m, minimo)
+        x0, y0 = max(int(cx - w / 2), 0), max(int(cy - h / 2), 0)
+        x1, y1 = min(int(np.ceil(cx + w / 2)), ancho), min(int(np.ceil(cy + h / 2)), alto)
+        self.caja = (x0, y0, x1 - x0, y1 - y0) if x1 > x0 and y1 > y0 else None
+        return self.caja
+
+    def reiniciar(self) -> None:
+        self.caja = None
+        self._frames = 0
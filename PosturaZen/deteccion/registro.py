@@ -0,0 +1,71 @@
+"""Registro de modelos de pose compartidos por todo el proceso.
+
+Cargar YOLO es lo mas costoso del arranque. El registro carga cada backend
+una sola vez, la primera vez que alguien lo necesita, lo calienta con una
+inferencia de prueba y lo comparte entre ``Calibrador``, ``Detector`` y
+cualquier otro consumidor. :func:`precalentar` permite iniciar esa carga en
+segundo plano mientras se abre la camara.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from PosturaZen.deteccion.backends import BackendPose, crear_backend
+
+_backends: Dict[str, BackendPose] = {}
+_locks: Dict[str, threading.Lock] = {}
+_lock_global = threading.Lock()
+
+# Segundos que tardo cada backend en cargarse y calentarse
+tiempos_carga: Dict[str, float] = {}
+
+
+def _lock_de(nombre: str) -> threading.Lock:
+    with _lock_global:
+        return _locks.setdefault(nombre, threading.Lock())
+
+
+def obtener_backend(nombre: str = "ultralytics") -> BackendPose:
+    """Devuelve el backend ``nombre``, cargandolo y calentandolo si hace falta."""
+    backend = _backends.get(nombre)
+    if backend is not None:
+        return backend
+    with _lock_de(nombre):
+        backend = _backends.get(nombre)
+        if backend is None:
+            inicio = time.perf_counter()
+            backend = crear_backend(nombre)
+            # La primera inferencia inicializa kernels y memoria; pagarla aqui
+            backend.inferir([np.zeros((480, 640, 3), dtype=np.uint8)])
+            tiempos_carga[nombre] = time.perf_counter() - inicio
+            _backends[nombre] = backend
+    return backend
+
+
+def precalentar(nombre: str = "ultralytics") -> threading.Thread:
+    """Carga el backend en un hilo de fondo y devuelve ese hilo."""
+    hilo = threading.Thread(target=obtener_backend, args=(nombre,), name=f"carga-{nombre}", daemon=True)
+    hilo.start()
+    return hilo
+
+
+class BackendCompartido:
+    """Referencia perezosa a un backend del registro.
+
+    No carga nada al construirse; el modelo se resuelve en la primera
+    llamada a :meth:`inferir`.
+    """
+
+    def __init__(self, nombre: str = "ultralytics") -> None:
+        self.nombre = nombre
+        self._backend: Optional[BackendPose] = None
+
+    def inferir(self, frames: Sequence[np.ndarray]) -> List[np.ndarray]:
+        if self._backend is None:
+            self._backend = obtener_backend(self.nombre)
+        return self._backend.inferir(frames)
@@ -0,0 +1,181 @@
+"""Reproduccion de grabaciones de puntos a traves del detector, sin camara ni modelo.
+
+Alimenta :meth:`Detector.procesar` con los puntos y la media del verde de la
+cara de una grabacion ``.bin`` de
+:class:`~PosturaZen.utils.grabacion.GrabadorPuntos` (o solo los puntos de un
+``.npz`` de ``benchmarks.bench_deteccion``), tan rapido como se pueda (sin esperar al ritmo de la camara) y con los
+instantes de captura originales, de modo que ventanas, alertas y HRV se
+comportan como en la sesion real. Sirve para ajustar tolerancias o la
+calibracion y para comprobar que un cambio no altera las alertas::
+
+    POSTURAZEN_GRABAR=grabaciones python -m PosturaZen.main
+    python -m PosturaZen.deteccion.reproduccion grabaciones/*.bin --tolerancias 12,10,0.08
+    python -m PosturaZen.deteccion.reproduccion sesion.bin --eventos
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import PosturaZen.voz.feedback as feedback
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.alertas import FELICITACION, FIN, INICIO, RECORDATORIO, EventoAlerta, MotorAlertas, Tolerancias
+from PosturaZen.deteccion.detector import Detector, puntos_por_persona
+from PosturaZen.deteccion.roi import ProveedorROI
+from PosturaZen.utils.grabacion import LectorPuntos
+from PosturaZen.utils.metricas import es_mala_postura
+from PosturaZen.utils.perfil import Perfilador
+from PosturaZen.utils.telemetria import RegistroFrame, Sumidero
+
+Frame = Tuple[float, Dict[str, Tuple[float, float]], Optional[float]]
+
+
+def leer_grabacion(ruta: str) -> Tuple[Iterator[Frame], float]:
+    """Frames ``(t, puntos, verde)`` de una grabacion y su duracion en segundos.
+
+    Un ``.npz`` con ``keypoints`` ``(frames, 17, 2)`` y ``t`` no tiene verde
+    de la cara; sus frames con todos los puntos en cero no tienen persona.
+    """
+    if not ruta.endswith(".npz"):
+        lector = LectorPuntos(ruta)
+        return lector.frames(), lector.duracion
+    with np.load(ruta) as datos:
+        keypoints, t = datos["keypoints"], datos["t"].astype(np.float64)
+
+    def frames() -> Iterator[Frame]:
+        persona = np.any(keypoints.reshape(len(keypoints), -1) > 0, axis=1)
+        for kp, instante, hay in zip(keypoints, t.tolist(), persona.tolist()):
+            yield instante, puntos_por_persona(kp[None])[0] if hay else {}, None
+
+    return frames(), float(t[-1] - t[0]) if len(t) > 1 else 0.0
+
+
+def reproducir(
+    ruta: str,
+    postura_base: PosturaBase,
+    fps: int = 30,
+    tolerancias: Optional[Tolerancias] = None,
+    sumidero: Optional[Sumidero] = None,
+    lote: int = 4096,
+    **opciones: Any,
+) -> Dict[str, Any]:
+    """Reproduce ``ruta`` en un :class:`Detector` nuevo y resume la sesion.
+
+    Mientras dura, la voz se sustituye por
+    :class:`~PosturaZen.voz.feedback.StubEngine` (al terminar vuelve la cola
+    anterior) y el detector no escribe sus avisos: una sesion de horas se
+    reproduce en segundos. ``opciones`` se pasan a
+    :class:`~PosturaZen.deteccion.alertas.MotorAlertas` (por ejemplo
+    ``enfriamiento_s``).
+
+    El resumen incluye los eventos de alerta y, para comparar, cuantos avisos
+    daba la regla anterior: uno por frame mientras los ultimos ``5 * fps``
+    frames fueran todos malos.
+
+    Si se indica ``sumidero`` (por ejemplo un
+    :class:`~PosturaZen.utils.series.EscritorSeries`), recibe los registros
+    de cada frame en lotes de ``lote``, en este mismo hilo: a velocidad
+    ilimitada el buffer de :class:`Telemetria` se desbordaria.
+    """
+    with feedback.motor_temporal(feedback.StubEngine):
+        grabacion, duracion = leer_grabacion(ruta)
+        perfil = Perfilador()
+        detector = Detector(
+            postura_base,
+            fps,
+            no_molestar=True,
+            roi=ProveedorROI(respaldo_haar=False, perfil=perfil),
+            perfil=perfil,
+            silencioso=True,
+        )
+        detector.motor = MotorAlertas(postura_base, fps, tolerancias, **opciones)
+        frames = persona = malos = hrv = 0
+        racha = anteriores = 0
+        suma_cuello = suma_cadera = 0.0
+        eventos: List[EventoAlerta] = []
+        pendientes: List[Dict[str, Any]] = []
+        inicio = time.perf_counter()
+        for i, (t, puntos, verde) in enumerate(grabacion):
+            registro = RegistroFrame(indice=i, timestamp=t)
+            detector.procesar(None, puntos, registro, t, verde)
+            frames += 1
+            if detector.evento is not None:
+                eventos.append(detector.evento)
+            if registro.angulo_cuello is not None:
+                persona += 1
+                malos += bool(registro.mala_postura)
+                suma_cuello += registro.angulo_cuello
+                suma_cadera += registro.angulo_cadera
+                malo = es_mala_postura(registro.angulo_cuello, registro.angulo_cadera, registro.centro_x, postura_base)
+                racha = racha + 1 if malo else 0
+                anteriores += racha >= 5 * fps
+            if registro.hrv is not None:
+                hrv += 1
+            if sumidero is not None:
+                pendientes.append(asdict(registro))
+                if len(pendientes) >= lote:
+                    sumidero.escribir(pendientes)
+                    pendientes = []
+        if sumidero is not None and pendientes:
+            sumidero.escribir(pendientes)
+        segundos = time.perf_counter() - inicio
+        return {
+            "frames": frames,
+            "persona": persona,
+            "mala_postura": malos,
+            "alertas": detector.alertas,
+            "alertas_anteriores": anteriores,
+            "eventos": eventos,
+            "conteo": {
+                tipo: sum(e.tipo == tipo for e in eventos) for tipo in (INICIO, RECORDATORIO, FIN, FELICITACION)
+            },
+            "frames_hrv": hrv,
+            "angulo_cuello": suma_cuello / persona if persona else math.nan,
+            "angulo_cadera": suma_cadera / persona if persona else math.nan,
+            "duracion_s": duracion,
+            "reproduccion_s": segundos,
+        }
+
+
+def main() -> None:
+    from PosturaZen.deteccion.detector import cargar_postura
+    from PosturaZen.main import BASE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rutas", nargs="+", help="grabaciones .bin de GrabadorPuntos o .npz con keypoints y t")
+    parser.add_argument("--calibracion", default=BASE_PATH)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--tolerancias", help="cuello,cadera,centro")
+    parser.add_argument("--enfriamiento", type=float, default=60.0, help="segundos minimos entre avisos")
+    parser.add_argument("--eventos", action="store_true", help="listar los eventos de alerta de cada grabacion")
+    args = parser.parse_args()
+
+    postura_base = cargar_postura(args.calibracion)
+    tolerancias = Tolerancias.desde_texto(args.tolerancias) if args.tolerancias else None
+    print(
+        f"{'grabacion':<32} {'frames':>8} {'minutos':>8} {'malos %':>8} {'alertas':>8} "
+        f"{'anterior':>8} {'hrv %':>6} {'x tiempo real':>14}"
+    )
+    for ruta in args.rutas:
+        r = reproducir(ruta, postura_base, args.fps, tolerancias, enfriamiento_s=args.enfriamiento)
+        malos = 100.0 * r["mala_postura"] / r["persona"] if r["persona"] else 0.0
+        hrv = 100.0 * r["frames_hrv"] / r["frames"] if r["frames"] else 0.0
+        velocidad = r["duracion_s"] / r["reproduccion_s"] if r["reproduccion_s"] else 0.0
+        print(
+            f"{ruta:<32} {r['frames']:>8} {r['duracion_s'] / 60.0:>8.1f} {malos:>8.1f} "
+            f"{r['alertas']:>8} {r['alertas_anteriores']:>8} {hrv:>6.1f} {velocidad:>14.0f}"
+        )
+        if args.eventos:
+            for evento in r["eventos"]:
+                print(f"  {evento.t:9.2f} s  {evento.tipo:<13} {evento.duracion:7.1f} s")
+            print("  " + ", ".join(f"{tipo}: {n}" for tipo, n in r["conteo"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Seleccion de la region de la cara usada para el HRV por rPPG.
+
+Ejecutar el clasificador Haar sobre el frame completo en cada iteracion es
+de lo mas costoso del bucle de deteccion, y el modelo de pose ya localiza la
+nariz y los hombros. :class:`ProveedorROI` deriva la caja de la cara de esos
+puntos y la suaviza entre frames para que el rPPG no recoja el temblor de la
+caja como si fuera señal. Haar queda como respaldo (o como modo explicito):
+se ejecuta solo cada ``intervalo_haar`` frames y sobre una ventana alrededor
+de la ultima cara encontrada.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from PosturaZen.utils.perfil import PERFIL, Perfilador
+
+# (x, y, ancho, alto) en pixeles
+Caja = Tuple[int, int, int, int]
+
+MODOS_ROI = ("puntos", "haar")
+
+# Proporciones aproximadas de una cara frontal respecto a la pose
+ANCHO_CARA_HOMBROS = 0.5
+ALTURA_NARIZ = 0.55
+
+
+def caja_desde_puntos(
+    puntos: Dict[str, tuple],
+    ancho: int,
+    alto: int,
+    region: str = "cara",
+    lado_minimo: int = 16,
+) -> Optional[Caja]:
+    """Estima la caja de la cara (o de la frente) a partir de la pose.
+
+    El lado de la cara se toma como la mitad de la distancia entre hombros y
+    la caja se centra horizontalmente en la nariz, que queda algo por debajo
+    de la mitad de la caja, como en las detecciones de Haar.
+
+    Args:
+        puntos: Coordenadas normalizadas indexadas por nombre de ``KEYPOINT_INDEX``.
+        ancho: Ancho del frame en pixeles.
+        alto: Alto del frame en pixeles.
+        region: ``"cara"`` para la cara completa o ``"frente"`` para la franja
+            superior, menos afectada por el movimiento de boca y ojos.
+        lado_minimo: Lado minimo de la cara en pixeles; por debajo se
+            devuelve ``None``.
+
+    Returns:
+        La caja recortada al frame, o ``None`` si faltan puntos, la cara es
+        demasiado pequeña o queda fuera del frame.
+    """
+    try:
+        nariz = puntos["nose"]
+        hombro_izq = puntos["left_shoulder"]
+        hombro_der = puntos["right_shoulder"]
+    except KeyError:
+        return None
+    # YOLO devuelve (0, 0) en los puntos que no ve
+    if not all(p[0] > 0 or p[1] > 0 for p in (nariz, hombro_izq, hombro_der)):
+        return None
+
+    lado = abs(hombro_izq[0] - hombro_der[0]) * ancho * ANCHO_CARA_HOMBROS
+    if lado < lado_minimo:
+        return None
+    cx = nariz[0] * ancho
+    arriba = nariz[1] * alto - lado * ALTURA_NARIZ
+    if region == "frente":
+        x0, y0, x1, y1 = cx - lado * 0.25, arriba + lado * 0.05, cx + lado * 0.25, arriba + lado * 0.25
+    else:
+        x0, y0, x1, y1 = cx - lado / 2, arriba, cx + lado / 2, arriba + lado
+
+    x0, x1 = max(int(round(x0)), 0), min(int(round(x1)), ancho)
+    y0, y1 = max(int(round(y0)), 0), min(int(round(y1)), alto)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class ProveedorROI:
+    """Entrega la region de la cara de cada frame con el menor coste posible.
+
+    Args:
+        modo: ``"puntos"`` deriva la caja de la pose; ``"haar"`` usa el
+            clasificador Haar con seguimiento por ventana.
+        region: Region derivada de la pose, ``"cara"`` o ``"frente"``.
+        respaldo_haar: En modo ``"puntos"``, recurrir a Haar cuando la pose no
+            permite estimar la cara.
+        intervalo_haar: Frames entre detecciones Haar; en los intermedios se
+            reutiliza el ultimo resultado, tambien si no encontro cara.
+        margen: Fraccion del lado de la ultima cara que se añade a cada lado
+            de la ventana de busqueda de Haar.
+        suavizado: Peso de la caja nueva en la media exponencial de la caja.
+        salto: Desplazamiento del centro, en lados de caja, a partir del cual
+            la caja se reinicia en lugar de suavizarse.
+        perfil: Perfilador que recibe la latencia de Haar; por defecto el
+            global.
+    """
+
+    def __init__(
+        self,
+        modo: str = "puntos",
+        region: str = "cara",
+        respaldo_haar: bool = True,
+        intervalo_haar: int = 10,
+        margen: float = 0.5,
+        suavizado: float = 0.3,
+        salto: float = 0.5,
+        perfil: Optional[Perfilador] = None,
+    ) -> None:
+        if modo not in MODOS_ROI:
+            raise ValueError(f"Modo de ROI desconocido: {modo!r}. Opciones: {', '.join(MODOS_ROI)}")
+        self.modo = modo
+        self.region = region
+        self.respaldo_haar = respaldo_haar
+        self.intervalo_haar = intervalo_haar
+        self.margen = margen
+        self.suavizado = suavizado
+        self.salto = salto
+        self.perfil = perfil if perfil is not None else PERFIL
+        self.detecciones_haar = 0
+        self.desde_puntos = 0
+        self._cascade = None
+        self._caja: Optional[np.ndarray] = None
+        self._caja_haar: Optional[Caja] = None
+        self._desde_haar = intervalo_haar
+
+    @property
+    def usa_haar(self) -> bool:
+        return self.modo == "haar" or self.respaldo_haar
+
+    def preparar(self) -> None:
+        """Carga el clasificador Haar si el modo puede necesitarlo."""
+        if self.usa_haar and self._cascade is None:
+            self._cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            )
+
+    def reiniciar(self) -> None:
+        self._caja = None
+        self._caja_haar = None
+        self._desde_haar = self.intervalo_haar
+
+    def obtener(self, frame: np.ndarray, puntos: Dict[str, tuple]) -> Optional[np.ndarray]:
+        """Devuelve el recorte de la cara en ``frame`` o ``None`` si no la hay."""
+        caja = self.caja(frame, puntos)
+        if caja is None:
+            return None
+        x, y, w, h = caja
+        return frame[y : y + h, x : x + w]
+
+    def caja(self, frame: np.ndarray, puntos: Dict[str, tuple]) -> Optional[Caja]:
+        """Devuelve la caja suavizada de la cara en ``frame``."""
+        alto, ancho = frame.shape[:2]
+        nueva = None
+        if self.modo == "puntos":
+            nueva = caja_desde_puntos(puntos, ancho, alto, self.region)
+            if nueva is not None:
+                self.desde_puntos += 1
+        if nueva is None and self.usa_haar:
+            nueva = self._haar(frame)
+        if nueva is None:
+            self._caja = None
+            return None
+        return self._suavizar(nueva, ancho, alto)
+
+    def _suavizar(self, nueva: Caja, ancho: int, alto: int) -> Caja:
+        caja = np.array(nueva, dtype=np.float64)
+        if self._caja is not None:
+            centro_prev = self._caja[:2] + self._caja[2:] / 2
+            centro = caja[:2] + caja[2:] / 2
+            lado = max(self._caja[2], 1.0)
+            if np.max(np.abs(centro - centro_prev)) <= self.salto * lado:
+                caja = self._caja + self.suavizado * (caja - self._caja)
+        self._caja = caja
+        x, y = max(int(round(caja[0])), 0), max(int(round(caja[1])), 0)
+        w = min(int(round(caja[2])), ancho - x)
+        h = min(int(round(caja[3])), alto - y)
+        return x, y, w, h
+
+    def _haar(self, frame: np.ndarray) -> Optional[Caja]:
+        self._desde_haar += 1
+        if self._desde_haar < self.intervalo_haar:
+            return self._caja_haar
+        self.preparar()
+        self._desde_haar = 0
+        self.detecciones_haar += 1
+
+        alto, ancho = frame.shape[:2]
+        ox = oy = 0
+        ventana = frame
+        if self._caja_haar is not None:
+            x, y, w, h = self._caja_haar
+            m = int(max(w, h) * self.margen)
+            ox, oy = max(x - m, 0), max(y - m, 0)
+            ventana = frame[oy : min(y + h + m, alto), ox : min(x + w + m, ancho)]
+        with self.perfil.medir("haar"):
+            gris = cv2.cvtColor(ventana, cv2.COLOR_BGR2GRAY)
+            caras = self._cascade.detectMultiScale(gris, 1.3, 5)
+        if len(caras) == 0:
+            # Perdida: la siguiente busqueda se hace en el frame completo
+            self._caja_haar = None
+            return None
+        x, y, w, h = caras[0]
+        self._caja_haar = (int(x) + ox, int(y) + oy, int(w), int(h))
+        return self._caja_haar
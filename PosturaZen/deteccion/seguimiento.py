@@ -0,0 +1,127 @@
+"""Seguimiento de puntos clave entre inferencias del modelo de pose.
+
+La postura cambia lentamente, asi que no hace falta ejecutar YOLO en cada
+frame. :class:`SeguidorPuntos` ejecuta el modelo solo cada ``K`` frames y, en
+los intermedios, propaga los cinco puntos de ``KEYPOINT_INDEX`` con flujo
+optico Lucas-Kanade sobre una version reducida en escala de grises. ``K``
+crece mientras la persona permanece estable y vuelve al minimo en cuanto se
+detecta movimiento o el seguimiento se pierde.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+Puntos = Dict[str, tuple]
+
+
+class SeguidorPuntos:
+    """Alterna inferencia completa y seguimiento por flujo optico.
+
+    Args:
+        k_min: Frames minimos entre inferencias.
+        k_max: Frames maximos entre inferencias cuando la postura es estable.
+        umbral_movimiento: Desplazamiento normalizado de cualquier punto,
+            respecto a la ultima inferencia, a partir del cual se considera
+            que hubo movimiento (mismo criterio que ``is_posture_stable``).
+        ancho: Ancho de la imagen reducida usada para el flujo optico.
+    """
+
+    def __init__(
+        self,
+        k_min: int = 2,
+        k_max: int = 15,
+        umbral_movimiento: float = 0.02,
+        ancho: int = 320,
+    ) -> None:
+        self.k_min = k_min
+        self.k_max = k_max
+        self.umbral_movimiento = umbral_movimiento
+        self.ancho = ancho
+        self.k = k_min
+        self.inferencias = 0
+        self.seguidos = 0
+        self._desde_inferencia = 0
+        self._gris_prev: Optional[np.ndarray] = None
+        self._pts_prev: Optional[np.ndarray] = None
+        self._pts_ref: Optional[np.ndarray] = None
+        self._nombres: list = []
+        self._lk = dict(
+            winSize=(21, 21),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+        )
+
+    def _gris(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        if w > self.ancho:
+            alto = max(int(h * self.ancho / w), 1)
+            frame = cv2.resize(frame, (self.ancho, alto), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def reiniciar(self) -> None:
+        self.k = self.k_min
+        self._desde_inferencia = 0
+        self._gris_prev = None
+        self._pts_prev = None
+        self._pts_ref = None
+
+    def actualizar(self, frame: np.ndarray, inferir: Callable[[Any], Puntos]) -> Puntos:
+        """Devuelve los puntos del frame, infiriendo o siguiendo segun toque."""
+        gris = self._gris(frame)
+        if self._pts_prev is not None and self._desde_inferencia < self.k:
+            puntos = self._seguir(gris)
+            if puntos is not None:
+                return puntos
+        return self._inferir(frame, gris, inferir)
+
+    def _inferir(self, frame: np.ndarray, gris: np.ndarray, inferir: Callable[[Any], Puntos]) -> Puntos:
+        puntos = inferir(frame)
+        self.inferencias += 1
+        self._desde_inferencia = 0
+        if not puntos:
+            self.reiniciar()
+            return puntos
+        h, w = gris.shape
+        nombres = list(puntos)
+        pts = np.array([[puntos[n][0] * w, puntos[n][1] * h] for n in nombres], dtype=np.float32)
+        if self._pts_ref is not None and nombres == self._nombres:
+            # Comparar con la inferencia anterior para adaptar K
+            if self._desplazamiento(pts, self._pts_ref, w, h) > self.umbral_movimiento:
+                self.k = self.k_min
+            else:
+                self.k = min(self.k + 1, self.k_max)
+        self._nombres = nombres
+        self._gris_prev = gris
+        self._pts_prev = pts.reshape(-1, 1, 2)
+        self._pts_ref = pts
+        return puntos
+
+    def _seguir(self, gris: np.ndarray) -> Optional[Puntos]:
+        if self._gris_prev is None or self._gris_prev.shape != gris.shape:
+            return None
+        nuevos, estado, _ = cv2.calcOpticalFlowPyrLK(
+            self._gris_prev, gris, self._pts_prev, None, **self._lk
+        )
+        if nuevos is None or not estado.all():
+            return None
+        h, w = gris.shape
+        pts = nuevos.reshape(-1, 2)
+        if self._desplazamiento(pts, self._pts_ref, w, h) > self.umbral_movimiento:
+            # Movimiento real: forzar inferencia y volver a la cadencia minima
+            self.k = self.k_min
+            return None
+        self.seguidos += 1
+        self._desde_inferencia += 1
+        self._gris_prev = gris
+        self._pts_prev = nuevos
+        return {n: (float(x / w), float(y / h)) for n, (x, y) in zip(self._nombres, pts)}
+
+    @staticmethod
+    def _desplazamiento(pts: np.ndarray, ref: np.ndarray, w: int, h: int) -> float:
+        dx = (pts[:, 0] - ref[:, 0]) / w
+        dy = (pts[:, 1] - ref[:, 1]) / h
+        return float(np.max(np.hypot(dx, dy)))
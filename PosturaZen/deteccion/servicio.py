@@ -0,0 +1,370 @@
+"""Ingesta centralizada de varias estaciones ligeras.
+
+En lugar de que cada estacion ejecute su propio ``PosturaZen.main`` con su
+propio modelo, los clientes ligeros envian frames JPEG (o puntos ya
+calculados) al backend. :class:`PoolInferencia` agrupa los frames de todas
+las sesiones en lotes y los reparte entre un pool de procesos, cada uno con
+el modelo cargado una sola vez. :class:`ServicioIngesta` conserva un
+:class:`Detector` por sesion (ventana, alertas, HRV) y devuelve el veredicto
+de cada frame.
+
+El control de admision rechaza de inmediato con :class:`Saturado` en lugar
+de encolar sin limite: con demasiadas sesiones abiertas, con la cola de
+inferencia llena o cuando una sesion ya tiene frames en curso. Un cliente
+rechazado reintenta mas tarde y la latencia de los demas no se degrada.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.backends import BackendPose
+from PosturaZen.deteccion.detector import Detector, puntos_por_persona
+from PosturaZen.deteccion.registro import obtener_backend
+from PosturaZen.deteccion.roi import ProveedorROI
+from PosturaZen.utils.telemetria import RegistroFrame
+from PosturaZen.utils.tramas import ESTACION_INGESTA, ESTACION_MAXIMA
+
+_VACIO = np.empty((0, 17, 2), dtype=np.float32)
+
+
+class Saturado(Exception):
+    """El servicio no admite mas trabajo en este momento; reintentar luego."""
+
+
+class IngestaNoDisponible(Exception):
+    """El servidor no tiene pool de inferencia: solo acepta puntos ya inferidos."""
+
+
+# --- Procesos de inferencia -------------------------------------------------
+
+_backend_worker: Optional[BackendPose] = None
+
+
+def _iniciar_worker(nombre: str) -> None:
+    global _backend_worker
+    # El paralelismo lo da el pool: un hilo por modelo evita sobresuscribir
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    cv2.setNumThreads(1)
+    _backend_worker = obtener_backend(nombre)
+
+
+def _listo() -> int:
+    return os.getpid()
+
+
+def _inferir_lote(jpegs: List[bytes]) -> List[np.ndarray]:
+    """Decodifica e infiere un lote; los JPEG invalidos devuelven cero personas."""
+    frames: List[np.ndarray] = []
+    validos: List[int] = []
+    for i, datos in enumerate(jpegs):
+        frame = cv2.imdecode(np.frombuffer(datos, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+            validos.append(i)
+    salida = [_VACIO] * len(jpegs)
+    if frames:
+        for i, kps in zip(validos, _backend_worker.inferir(frames)):
+            salida[i] = kps
+    return salida
+
+
+@dataclass
+class _Pendiente:
+    jpeg: bytes
+    futuro: asyncio.Future
+    t_encolado: float
+
+
+class PoolInferencia:
+    """Inferencia por lotes sobre un pool de procesos.
+
+    Hay un recolector por proceso: cada uno toma el primer frame pendiente,
+    espera hasta ``espera_ms`` a que lleguen mas (hasta ``lote_maximo``) y
+    envia el lote a un proceso libre. Asi todos los procesos estan ocupados
+    mientras haya trabajo y, con carga, los lotes crecen solos.
+
+    Args:
+        backend: Nombre del backend de pose que carga cada proceso.
+        procesos: Tamaño del pool; por defecto, el numero de nucleos.
+        lote_maximo: Frames maximos por pasada del modelo.
+        espera_ms: Espera maxima para completar un lote.
+        max_pendientes: Frames en cola a partir de los cuales se rechaza.
+    """
+
+    def __init__(
+        self,
+        backend: str = "ultralytics",
+        procesos: Optional[int] = None,
+        lote_maximo: int = 8,
+        espera_ms: float = 5.0,
+        max_pendientes: int = 64,
+    ) -> None:
+        self.backend = backend
+        self.procesos = procesos or os.cpu_count() or 1
+        self.lote_maximo = lote_maximo
+        self.espera_ms = espera_ms
+        self.max_pendientes = max_pendientes
+        self.lotes = 0
+        self.frames = 0
+        self.rechazados = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cola: Optional[asyncio.Queue] = None
+        self._recolectores: List[asyncio.Task] = []
+
+    async def iniciar(self) -> None:
+        """Arranca los procesos y espera a que todos tengan el modelo cargado."""
+        loop = asyncio.get_running_loop()
+        # spawn: el servidor ya tiene hilos y fork podria heredar locks tomados
+        self._pool = ProcessPoolExecutor(
+            self.procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_iniciar_worker,
+            initargs=(self.backend,),
+        )
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _listo) for _ in range(self.procesos)))
+        self._cola = asyncio.Queue()
+        self._recolectores = [asyncio.create_task(self._recolectar()) for _ in range(self.procesos)]
+
+    async def cerrar(self) -> None:
+        for tarea in self._recolectores:
+            tarea.cancel()
+        await asyncio.gather(*self._recolectores, return_exceptions=True)
+        self._recolectores = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def pendientes(self) -> int:
+        return self._cola.qsize() if self._cola is not None else 0
+
+    async def inferir(self, jpeg: bytes) -> Tuple[np.ndarray, float, float]:
+        """Infiere un frame JPEG.
+
+        Returns:
+            ``(keypoints, espera_ms, inferencia_ms)`` con los puntos
+            ``(personas, 17, 2)`` normalizados, el tiempo en cola y la
+            duracion de la pasada del lote.
+
+        Raises:
+            Saturado: Si la cola ya tiene ``max_pendientes`` frames.
+        """
+        if self._cola is None:
+            raise RuntimeError("El pool de inferencia no esta iniciado")
+        if self._cola.qsize() >= self.max_pendientes:
+            self.rechazados += 1
+            raise Saturado("Cola de inferencia llena")
+        futuro = asyncio.get_running_loop().create_future()
+        self._cola.put_nowait(_Pendiente(jpeg, futuro, time.perf_counter()))
+        return await futuro
+
+    async def _recolectar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            if self.espera_ms > 0 and self._cola.qsize() < self.lote_maximo - 1:
+                await asyncio.sleep(self.espera_ms / 1000.0)
+            while len(lote) < self.lote_maximo and not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+            inicio = time.perf_counter()
+            try:
+                resultados = await loop.run_in_executor(self._pool, _inferir_lote, [p.jpeg for p in lote])
+            except Exception as exc:  # un proceso caido no debe colgar a los clientes
+                for p in lote:
+                    if not p.futuro.done():
+                        p.futuro.set_exception(exc)
+                continue
+            fin = time.perf_counter()
+            self.lotes += 1
+            self.frames += len(lote)
+            for p, kps in zip(lote, resultados):
+                if not p.futuro.done():
+                    p.futuro.set_result((kps, (inicio - p.t_encolado) * 1000.0, (fin - inicio) * 1000.0))
+
+
+# --- Sesiones ---------------------------------------------------------------
+
+
+@dataclass
+class Sesion:
+    """Estado de una estacion conectada al servicio."""
+
+    id: str
+    estacion: int
+    usuario: Optional[str]
+    detector: Detector
+    creada: float = field(default_factory=time.monotonic)
+    ultima: float = field(default_factory=time.monotonic)
+    frames: int = 0
+    en_curso: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ServicioIngesta:
+    """Sesiones de estaciones ligeras con su propio :class:`Detector`.
+
+    Args:
+        pool: Pool de inferencia para los frames JPEG. Sin pool solo se
+            aceptan puntos ya calculados por el cliente.
+        max_sesiones: Sesiones abiertas como maximo; las inactivas se
+            purgan antes de rechazar una nueva.
+        max_por_sesion: Frames en curso por sesion; el siguiente se rechaza.
+            Con ``1`` cada cliente espera su veredicto antes de enviar otro.
+        inactividad: Segundos sin frames tras los que una sesion se purga.
+        fps: Frames por segundo que se asumen para la ventana y el HRV.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[PoolInferencia] = None,
+        max_sesiones: int = 32,
+        max_por_sesion: int = 1,
+        inactividad: float = 60.0,
+        fps: int = 30,
+    ) -> None:
+        self.pool = pool
+        self.max_sesiones = max_sesiones
+        self.max_por_sesion = max_por_sesion
+        self.inactividad = inactividad
+        self.fps = fps
+        self.sesiones: Dict[str, Sesion] = {}
+        self.rechazados = 0
+        # Identificadores de estacion libres (u16 en las tramas), reutilizados al cerrar
+        self._estaciones_libres: List[int] = []
+        self._siguiente_estacion = ESTACION_INGESTA
+
+    def _asignar_estacion(self) -> int:
+        if self._estaciones_libres:
+            return heapq.heappop(self._estaciones_libres)
+        if self._siguiente_estacion > ESTACION_MAXIMA:
+            raise Saturado("No quedan identificadores de estacion libres")
+        self._siguiente_estacion += 1
+        return self._siguiente_estacion - 1
+
+    def _quitar(self, id_sesion: str) -> None:
+        sesion = self.sesiones.pop(id_sesion, None)
+        if sesion is not None:
+            heapq.heappush(self._estaciones_libres, sesion.estacion)
+
+    def abrir(self, postura_base: PosturaBase, usuario: Optional[str] = None) -> Sesion:
+        """Abre una sesion con la calibracion ``postura_base``.
+
+        Raises:
+            Saturado: Si ya hay ``max_sesiones`` sesiones activas.
+        """
+        if len(self.sesiones) >= self.max_sesiones:
+            self.purgar()
+        if len(self.sesiones) >= self.max_sesiones:
+            self.rechazados += 1
+            raise Saturado(f"Maximo de {self.max_sesiones} sesiones alcanzado")
+        detector = Detector(
+            postura_base,
+            self.fps,
+            no_molestar=True,
+            # Sin Haar de respaldo: su coste no debe depender de la pose de un cliente
+            roi=ProveedorROI(respaldo_haar=False),
+        )
+        sesion = Sesion(uuid.uuid4().hex, self._asignar_estacion(), usuario, detector)
+        self.sesiones[sesion.id] = sesion
+        return sesion
+
+    def cerrar(self, id_sesion: str) -> None:
+        self._quitar(id_sesion)
+
+    def purgar(self) -> int:
+        """Cierra las sesiones inactivas y devuelve cuantas eran."""
+        limite = time.monotonic() - self.inactividad
+        inactivas = [s.id for s in self.sesiones.values() if s.ultima < limite and not s.en_curso]
+        for id_sesion in inactivas:
+            self._quitar(id_sesion)
+        return len(inactivas)
+
+    def _admitir(self, id_sesion: str) -> Sesion:
+        sesion = self.sesiones.get(id_sesion)
+        if sesion is None:
+            raise KeyError(id_sesion)
+        if sesion.en_curso >= self.max_por_sesion:
+            self.rechazados += 1
+            raise Saturado("La sesion ya tiene frames en curso")
+        return sesion
+
+    async def procesar_jpeg(self, id_sesion: str, jpeg: bytes, t_captura: Optional[float] = None) -> RegistroFrame:
+        """Infiere y analiza un frame JPEG de la sesion ``id_sesion``.
+
+        Raises:
+            KeyError: Si la sesion no existe.
+            Saturado: Si la sesion o el pool no admiten mas frames.
+            IngestaNoDisponible: Si el servidor no tiene pool de inferencia.
+        """
+        if self.pool is None:
+            raise IngestaNoDisponible("Ingesta de imagenes desactivada en este servidor")
+        sesion = self._admitir(id_sesion)
+        sesion.en_curso += 1
+        try:
+            async with sesion.lock:
+                kps, espera_ms, inferencia_ms = await self.pool.inferir(jpeg)
+                registro = await asyncio.to_thread(self._analizar, sesion, jpeg, kps, t_captura)
+            registro.etapas_ms.update(espera=espera_ms, inferencia=inferencia_ms)
+            return registro
+        finally:
+            sesion.en_curso -= 1
+
+    async def procesar_puntos(
+        self, id_sesion: str, puntos: np.ndarray, t_captura: Optional[float] = None
+    ) -> RegistroFrame:
+        """Analiza los puntos ``(17, 2)`` ya inferidos por el cliente (sin HRV)."""
+        kps = np.asarray(puntos, dtype=np.float32).reshape(-1, 17, 2)
+        sesion = self._admitir(id_sesion)
+        sesion.en_curso += 1
+        try:
+            async with sesion.lock:
+                return self._analizar(sesion, None, kps, t_captura)
+        finally:
+            sesion.en_curso -= 1
+
+    def _analizar(
+        self, sesion: Sesion, jpeg: Optional[bytes], kps: np.ndarray, t_captura: Optional[float]
+    ) -> RegistroFrame:
+        inicio = time.perf_counter()
+        registro = RegistroFrame(indice=sesion.frames, timestamp=time.time())
+        personas = puntos_por_persona(kps[:1])
+        if personas:
+            frame = None
+            if jpeg is not None:
+                # El HRV solo promedia la cara: media resolucion basta y decodifica 4x menos pixeles
+                frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_COLOR_2)
+            sesion.detector.procesar(frame, personas[0], registro, t_captura)
+        sesion.frames += 1
+        sesion.ultima = time.monotonic()
+        registro.etapas_ms["analisis"] = (time.perf_counter() - inicio) * 1000.0
+        return registro
+
+    def estadisticas(self) -> Dict[str, float]:
+        datos: Dict[str, float] = {
+            "sesiones": len(self.sesiones),
+            "max_sesiones": self.max_sesiones,
+            "rechazados": self.rechazados,
+        }
+        if self.pool is not None:
+            datos.update(
+                procesos=self.pool.procesos,
+                pendientes=self.pool.pendientes,
+                lotes=self.pool.lotes,
+                frames=self.pool.frames,
+                rechazados_pool=self.pool.rechazados,
+                lote_medio=self.pool.frames / self.pool.lotes if self.pool.lotes else 0.0,
+            )
+        return datos
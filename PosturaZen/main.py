@@ -1,8 +1,25 @@
 """Punto de entrada para PosturaZen."""
 
+import getpass
 import os
+import time
 
-from PosturaZen.deteccion.detector import Detector, cargar_postura
+# Antes de los imports del paquete: el arranque medido incluye cargarlos
+T_LANZAMIENTO = time.perf_counter()
+
+from PosturaZen.calibracion.almacen import RUTA_CALIBRACIONES, AlmacenCalibraciones  # noqa: E402
+from PosturaZen.calibracion.calibrador import Calibrador  # noqa: E402
+from PosturaZen.deteccion.alertas import Tolerancias  # noqa: E402
+from PosturaZen.deteccion.detector import Detector, cargar_postura  # noqa: E402
+from PosturaZen.deteccion.preproceso import Preprocesador  # noqa: E402
+from PosturaZen.deteccion.registro import BackendCompartido, precalentar  # noqa: E402
+from PosturaZen.deteccion.roi import ProveedorROI  # noqa: E402
+from PosturaZen.deteccion.seguimiento import SeguidorPuntos  # noqa: E402
+from PosturaZen.utils.grabacion import GrabadorPuntos, ruta_sesion  # noqa: E402
+from PosturaZen.utils.perfil import instalar_senal  # noqa: E402
+from PosturaZen.utils.series import RUTA_SERIES, EscritorSeries  # noqa: E402
+from PosturaZen.utils.telemetria import SumideroMultiple, Telemetria, crear_sumidero  # noqa: E402
+from PosturaZen.utils.tramas import PublicadorUDP  # noqa: E402
 
 BASE_PATH = os.path.join(os.path.dirname(__file__), "postura_base.json")
 
@@ -10,12 +27,91 @@ BASE_PATH = os.path.join(os.path.dirname(__file__), "postura_base.json")
 def main() -> None:
     """Ejecuta la detección de postura asegurando calibración válida."""
 
-    # Cargar la calibración o generar una de prueba si es necesario
-    postura_base = cargar_postura(BASE_PATH)
+    # Histogramas de latencia por etapa: POSTURAZEN_PERFIL=1, tecla "p" o SIGUSR1
+    instalar_senal()
+
+    # Cargar el modelo en segundo plano mientras se prepara todo lo demas
+    nombre_backend = os.environ.get("POSTURAZEN_BACKEND", "ultralytics")
+    precalentar(nombre_backend)
+
+    # Reutilizar la calibracion guardada de este usuario y camara; si no hay
+    # una vigente (o se pide recalibrar), calibrar y guardarla
+    fuente = 0
+    usuario = os.environ.get("POSTURAZEN_USUARIO") or getpass.getuser()
+    almacen = AlmacenCalibraciones(os.environ.get("POSTURAZEN_CALIBRACIONES", RUTA_CALIBRACIONES))
+    guardada = None if os.environ.get("POSTURAZEN_RECALIBRAR", "0") == "1" else almacen.obtener(usuario, str(fuente))
+    if guardada is not None:
+        print(f"Usando la calibración guardada de {usuario} ({guardada.edad_dias:.1f} días)")
+        postura_base = guardada.postura
+    else:
+        calibrador = Calibrador(backend=BackendCompartido(nombre_backend))
+        postura_base = calibrador.calibrar(fuente, almacen, usuario, ruta_json=BASE_PATH)
+        if postura_base is None:
+            # Cargar la calibración anterior o generar una de prueba
+            postura_base = cargar_postura(BASE_PATH)
+        else:
+            guardada = almacen.obtener(usuario, str(fuente))
+
+    # Tolerancias de las alertas: "cuello,cadera,centro" o, por defecto,
+    # ampliadas segun la dispersion medida en la calibracion
+    texto_tolerancias = os.environ.get("POSTURAZEN_TOLERANCIAS")
+    if texto_tolerancias:
+        tolerancias = Tolerancias.desde_texto(texto_tolerancias)
+    elif guardada is not None:
+        tolerancias = Tolerancias.desde_calibracion(guardada.desviaciones)
+    else:
+        tolerancias = Tolerancias()
 
     no_molestar = os.environ.get("POSTURAZEN_SILENCIO", "0") == "1"
-    detector = Detector(postura_base, no_molestar=no_molestar)
-    detector.detectar()
+    # Destino opcional de la telemetria: ruta de archivo o URL del backend
+    destino = os.environ.get("POSTURAZEN_TELEMETRIA")
+    sumideros = [crear_sumidero(destino)] if destino else []
+    # Historial en disco de angulos, alertas y HRV por estacion y dia ("0" lo desactiva)
+    ruta_series = os.environ.get("POSTURAZEN_SERIES", RUTA_SERIES)
+    series = None
+    if ruta_series != "0":
+        series = EscritorSeries(ruta_series, os.environ.get("POSTURAZEN_ESTACION"))
+        sumideros.append(series)
+    telemetria = Telemetria(
+        sumidero=SumideroMultiple(sumideros) if len(sumideros) > 1 else (sumideros[0] if sumideros else None),
+        muestreo=int(os.environ.get("POSTURAZEN_HUELLAS", "0")),
+    )
+    # Ejecutar YOLO solo cada K frames y seguir los puntos entre inferencias
+    seguidor = SeguidorPuntos() if os.environ.get("POSTURAZEN_SEGUIMIENTO", "0") == "1" else None
+    # Entrada del modelo: lado del lienzo ("0" pasa el frame completo) y
+    # recorte a la persona detectada en el frame anterior
+    lado_entrada = int(os.environ.get("POSTURAZEN_ENTRADA", "640"))
+    preproceso = None
+    if lado_entrada > 0:
+        preproceso = Preprocesador(lado_entrada, recorte=os.environ.get("POSTURAZEN_RECORTE", "1") == "1")
+    # Region de la cara para el HRV: "puntos" (pose) o "haar"
+    roi = ProveedorROI(os.environ.get("POSTURAZEN_ROI", "puntos"))
+    # Puntos y verde de la cara de cada frame, para reproducir la sesion sin camara
+    directorio_grabacion = os.environ.get("POSTURAZEN_GRABAR")
+    grabador = GrabadorPuntos(ruta_sesion(directorio_grabacion)) if directorio_grabacion else None
+    # Estado de cada frame al panel en vivo del backend ("host:puerto" UDP)
+    panel = os.environ.get("POSTURAZEN_PANEL")
+    detector = Detector(
+        postura_base,
+        no_molestar=no_molestar,
+        telemetria=telemetria,
+        backend=BackendCompartido(nombre_backend),
+        seguidor=seguidor,
+        t_lanzamiento=T_LANZAMIENTO,
+        roi=roi,
+        publicador=PublicadorUDP(panel) if panel else None,
+        preproceso=preproceso,
+        tolerancias=tolerancias,
+        grabador=grabador,
+    )
+    try:
+        detector.detectar(fuente)
+    finally:
+        if series is not None:
+            series.cerrar()
+        if grabador is not None:
+            grabador.cerrar()
+            print(f"{grabador.frames} frames grabados en {grabador.ruta}")
 
 
 if __name__ == "__main__":
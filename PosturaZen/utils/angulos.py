@@ -3,6 +3,8 @@
 import math
 from typing import Tuple
 
+import numpy as np
+
 
 Point = Tuple[float, float]
 
@@ -32,3 +34,24 @@ def calcular_angulo(a: Point, b: Point, c: Point) -> float:
     angle = math.degrees(math.acos(cos_angle))
     return angle
 
+
+def calcular_angulos(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Version vectorizada de :func:`calcular_angulo`.
+
+    Args:
+        a: Arreglo ``(..., 2)`` de puntos iniciales.
+        b: Arreglo ``(..., 2)`` de vertices.
+        c: Arreglo ``(..., 2)`` de puntos finales.
+
+    Returns:
+        Arreglo ``(...)`` con los angulos en grados; ``0`` donde alguno de
+        los segmentos tiene longitud nula, igual que la version escalar.
+    """
+    a, b, c = (np.asarray(p, dtype=np.float64) for p in (a, b, c))
+    ab = a - b
+    cb = c - b
+    dot = ab[..., 0] * cb[..., 0] + ab[..., 1] * cb[..., 1]
+    mag = np.hypot(ab[..., 0], ab[..., 1]) * np.hypot(cb[..., 0], cb[..., 1])
+    nulo = mag == 0
+    cos_angle = np.clip(dot / np.where(nulo, 1.0, mag), -1.0, 1.0)
+    return np.where(nulo, 0.0, np.degrees(np.arccos(cos_angle)))
@@ -0,0 +1,143 @@
+"""Grabacion compacta de los puntos y la señal rPPG de una sesion.
+
+Ajustar umbrales del detector o de la calibracion no deberia requerir una
+camara ni el modelo de pose. :class:`GrabadorPuntos` guarda por frame solo lo
+que consume el analisis: el instante de captura, los puntos de
+``KEYPOINT_INDEX`` normalizados y cuantizados a 16 bits, y la media del
+canal verde de la ROI de la cara que alimenta el HRV. Son
+:data:`GRABACION_DTYPE` (33 bytes) por frame, unos 3.5 MB por hora a 30 fps,
+en un archivo binario de solo anexado sin cabecera.
+
+:class:`LectorPuntos` abre el archivo con ``np.memmap``: no lo carga en
+memoria y permite reproducir horas de sesion con
+``PosturaZen.deteccion.reproduccion``.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from PosturaZen.utils.metricas import KEYPOINT_INDEX
+from PosturaZen.utils.tramas import PERSONA
+
+NOMBRES = tuple(KEYPOINT_INDEX)
+ESCALA = 65535.0
+# Bandera adicional: el frame tiene media del verde de la cara
+VERDE = 2
+
+GRABACION_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),
+        ("puntos", "<u2", (len(NOMBRES), 2)),
+        ("verde", "<f4"),
+        ("banderas", "<u1"),
+    ]
+)
+
+
+def ruta_sesion(directorio: str, t: Optional[float] = None) -> str:
+    """Archivo para una sesion nueva en ``directorio`` (uno por arranque)."""
+    os.makedirs(directorio, exist_ok=True)
+    marca = time.strftime("%Y%m%d-%H%M%S", time.localtime(t))
+    return os.path.join(directorio, f"puntos-{marca}.bin")
+
+
+class GrabadorPuntos:
+    """Anexa frames a un archivo :data:`GRABACION_DTYPE`.
+
+    Los registros se acumulan en un bloque preasignado y se escriben de
+    ``bloque`` en ``bloque`` (a 30 fps, una escritura cada ~34 s con el
+    valor por defecto); :meth:`cerrar` escribe el resto.
+    """
+
+    def __init__(self, ruta: str, bloque: int = 1024) -> None:
+        self.ruta = ruta
+        self._bloque = np.zeros(bloque, GRABACION_DTYPE)
+        self._n = 0
+        self.frames = 0
+
+    def escribir(
+        self, t: float, puntos: Optional[Dict[str, Tuple[float, float]]] = None, verde: Optional[float] = None
+    ) -> None:
+        registro = self._bloque[self._n]
+        registro["t"] = t
+        banderas = 0
+        if puntos:
+            registro["puntos"] = np.clip([puntos[n] for n in NOMBRES], 0.0, 1.0) * ESCALA + 0.5
+            banderas |= PERSONA
+        else:
+            registro["puntos"] = 0
+        if verde is not None:
+            registro["verde"] = verde
+            banderas |= VERDE
+        else:
+            registro["verde"] = np.nan
+        registro["banderas"] = banderas
+        self._n += 1
+        self.frames += 1
+        if self._n == len(self._bloque):
+            self.vaciar()
+
+    def vaciar(self) -> None:
+        if self._n:
+            with open(self.ruta, "ab") as f:
+                f.write(self._bloque[: self._n].tobytes())
+            self._n = 0
+
+    def cerrar(self) -> None:
+        self.vaciar()
+
+
+class LectorPuntos:
+    """Lectura por ``memmap`` de una grabacion :data:`GRABACION_DTYPE`."""
+
+    def __init__(self, ruta: str) -> None:
+        self.ruta = ruta
+        # Un final truncado (proceso interrumpido a mitad de escritura) se ignora
+        n = os.path.getsize(ruta) // GRABACION_DTYPE.itemsize
+        if n:
+            self.registros = np.memmap(ruta, dtype=GRABACION_DTYPE, mode="r", shape=(n,))
+        else:
+            self.registros = np.empty(0, GRABACION_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    @property
+    def duracion(self) -> float:
+        if len(self.registros) < 2:
+            return 0.0
+        return float(self.registros["t"][-1] - self.registros["t"][0])
+
+    def frames(self, bloque: int = 4096) -> Iterator[Tuple[float, Dict[str, Tuple[float, float]], Optional[float]]]:
+        """Recorre ``(t, puntos, verde)``; ``puntos`` vacio y ``verde`` ``None`` si faltan.
+
+        Decodifica por bloques para no convertir registro a registro.
+        """
+        for inicio in range(0, len(self.registros), bloque):
+            trozo = self.registros[inicio : inicio + bloque]
+            puntos = trozo["puntos"].astype(np.float64) / ESCALA
+            for t, p, verde, banderas in zip(
+                trozo["t"].tolist(), puntos.tolist(), trozo["verde"].tolist(), trozo["banderas"].tolist()
+            ):
+                yield (
+                    t,
+                    dict(zip(NOMBRES, map(tuple, p))) if banderas & PERSONA else {},
+                    verde if banderas & VERDE else None,
+                )
+
+    def keypoints(self) -> np.ndarray:
+        """Puntos ``(frames, 17, 2)`` en el orden COCO (ceros donde no se grabaron).
+
+        Es el formato de ``benchmarks.bench_deteccion`` y de
+        :func:`PosturaZen.utils.metricas.metricas_lote`.
+        """
+        salida = np.zeros((len(self.registros), 17, 2), dtype=np.float32)
+        persona = (self.registros["banderas"] & PERSONA) != 0
+        salida[:, list(KEYPOINT_INDEX.values())] = self.registros["puntos"] / np.float32(ESCALA)
+        salida[~persona] = 0.0
+        return salida
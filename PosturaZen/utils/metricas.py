@@ -0,0 +1,151 @@
+"""Metricas de postura a partir de los puntos clave del modelo de pose.
+
+Incluye la version escalar usada frame a frame por ``Detector`` y
+``Calibrador`` y una version vectorizada que procesa sesiones completas
+``(frames, puntos, 2)`` en una sola llamada. Ambas siguen el mismo orden de
+operaciones; las unicas diferencias vienen del redondeo de ``arccos`` e
+``hypot`` de NumPy frente a ``math`` (menos de 1e-9 grados), por lo que las
+banderas de mala postura coinciden.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from PosturaZen.utils.angulos import calcular_angulo, calcular_angulos
+
+KEYPOINT_INDEX = {
+    "left_shoulder": 5,
+    "right_shoulder": 6,
+    "left_hip": 11,
+    "right_hip": 12,
+    "nose": 0,
+}
+
+# Desviaciones maximas respecto a la calibracion antes de considerar mala postura
+TOLERANCIA_CUELLO = 10.0
+TOLERANCIA_CADERA = 10.0
+TOLERANCIA_CENTRO = 0.1
+
+
+def metricas_frame(puntos: Mapping[str, Tuple[float, float]]) -> Tuple[float, float, float]:
+    """Calcula angulo de cuello, angulo de cadera y centro x de un frame.
+
+    Args:
+        puntos: Coordenadas normalizadas indexadas por nombre de ``KEYPOINT_INDEX``.
+
+    Returns:
+        Tupla ``(angulo_cuello, angulo_cadera, centro_x)``.
+    """
+    shoulder_mid = (
+        (puntos["left_shoulder"][0] + puntos["right_shoulder"][0]) / 2,
+        (puntos["left_shoulder"][1] + puntos["right_shoulder"][1]) / 2,
+    )
+    hip_mid = (
+        (puntos["left_hip"][0] + puntos["right_hip"][0]) / 2,
+        (puntos["left_hip"][1] + puntos["right_hip"][1]) / 2,
+    )
+    nose = (puntos["nose"][0], puntos["nose"][1])
+
+    angulo_cuello = calcular_angulo(nose, shoulder_mid, hip_mid)
+    angulo_cadera = calcular_angulo(shoulder_mid, hip_mid, (hip_mid[0], hip_mid[1] + 0.1))
+    return angulo_cuello, angulo_cadera, hip_mid[0]
+
+
+def es_mala_postura(angulo_cuello: float, angulo_cadera: float, centro_x: float, postura_base: Any) -> bool:
+    """Compara las metricas de un frame con la calibracion de referencia."""
+    dif_cuello = abs(angulo_cuello - postura_base.neck_back_angle)
+    dif_cadera = abs(angulo_cadera - postura_base.shoulder_hip_angle)
+    dif_centro = abs(centro_x - postura_base.center_x)
+    return dif_cuello > TOLERANCIA_CUELLO or dif_cadera > TOLERANCIA_CADERA or dif_centro > TOLERANCIA_CENTRO
+
+
+def metricas_lote(
+    keypoints: np.ndarray,
+    postura_base: Any = None,
+    indices: Mapping[str, int] = KEYPOINT_INDEX,
+) -> Dict[str, np.ndarray]:
+    """Calcula las metricas de postura de todos los frames a la vez.
+
+    Args:
+        keypoints: Arreglo ``(frames, puntos, 2)`` con coordenadas
+            normalizadas (por ejemplo los 17 puntos COCO de YOLOv8-pose).
+        postura_base: Calibracion de referencia. Si se omite solo se
+            devuelven los angulos y el centro.
+        indices: Posicion de cada punto de ``KEYPOINT_INDEX`` en el eje 1.
+
+    Returns:
+        Diccionario de arreglos ``(frames,)``: ``angulo_cuello``,
+        ``angulo_cadera``, ``centro_x`` y, con calibracion, ``dif_cuello``,
+        ``dif_cadera``, ``dif_centro`` y ``mala_postura``.
+    """
+    kp = np.asarray(keypoints, dtype=np.float64)
+    # Mismo orden de operaciones que la version escalar
+    shoulder_mid = (kp[:, indices["left_shoulder"]] + kp[:, indices["right_shoulder"]]) / 2
+    hip_mid = (kp[:, indices["left_hip"]] + kp[:, indices["right_hip"]]) / 2
+    nose = kp[:, indices["nose"]]
+    bajo_cadera = np.stack([hip_mid[:, 0], hip_mid[:, 1] + 0.1], axis=1)
+
+    resultado = {
+        "angulo_cuello": calcular_angulos(nose, shoulder_mid, hip_mid),
+        "angulo_cadera": calcular_angulos(shoulder_mid, hip_mid, bajo_cadera),
+        "centro_x": hip_mid[:, 0].copy(),
+    }
+    if postura_base is None:
+        return resultado
+
+    dif_cuello = np.abs(resultado["angulo_cuello"] - postura_base.neck_back_angle)
+    dif_cadera = np.abs(resultado["angulo_cadera"] - postura_base.shoulder_hip_angle)
+    dif_centro = np.abs(resultado["centro_x"] - postura_base.center_x)
+    resultado.update(
+        dif_cuello=dif_cuello,
+        dif_cadera=dif_cadera,
+        dif_centro=dif_centro,
+        mala_postura=(dif_cuello > TOLERANCIA_CUELLO)
+        | (dif_cadera > TOLERANCIA_CADERA)
+        | (dif_centro > TOLERANCIA_CENTRO),
+    )
+    return resultado
+
+
+class EstadisticasEnLinea:
+    """Media y varianza acumuladas de varias metricas (algoritmo de Welford).
+
+    Cada muestra nueva cuesta O(1) y no se guarda ningun historial, por lo
+    que sirve para decidir en vivo cuando una estimacion ya es estable.
+
+    Args:
+        dimension: Numero de metricas por muestra.
+    """
+
+    def __init__(self, dimension: int = 3) -> None:
+        self.n = 0
+        self.media = np.zeros(dimension)
+        self._m2 = np.zeros(dimension)
+
+    def agregar(self, muestra) -> None:
+        x = np.asarray(muestra, dtype=np.float64)
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self._m2 += delta * (x - self.media)
+
+    @property
+    def varianza(self) -> np.ndarray:
+        """Varianza muestral (``n - 1``); cero con menos de dos muestras."""
+        if self.n < 2:
+            return np.zeros_like(self.media)
+        return self._m2 / (self.n - 1)
+
+    @property
+    def desviacion(self) -> np.ndarray:
+        return np.sqrt(self.varianza)
+
+    @property
+    def error_estandar(self) -> np.ndarray:
+        """Error estandar de la media; infinito con menos de dos muestras."""
+        if self.n < 2:
+            return np.full_like(self.media, np.inf)
+        return np.sqrt(self.varianza / self.n)
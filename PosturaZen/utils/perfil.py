@@ -0,0 +1,162 @@
+"""Histogramas de latencia por etapa del bucle de deteccion.
+
+Cada etapa (captura, inferencia, estabilidad, metricas, voz, ROI, Haar,
+HRV...) registra su duracion en un histograma logaritmico de cubetas fijas:
+registrar cuesta un logaritmo y un incremento, sin guardar muestras, y los
+percentiles salen de las cubetas con un error relativo menor al 10 %.
+
+El perfilador se activa y desactiva en caliente. Desactivado, ``medir``
+devuelve un contexto nulo compartido y ``registrar`` retorna de inmediato,
+asi que la instrumentacion puede quedarse en el codigo. Se activa con
+``POSTURAZEN_PERFIL=1``, con la tecla ``p`` en la ventana del detector o con
+``SIGUSR1`` (``kill -USR1 <pid>``); al desactivarlo se imprime el informe.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import os
+import signal
+import time
+from typing import Dict, List, Optional
+
+# Cubetas: 8 por octava desde 1 us hasta ~16 s
+CUBETAS_POR_OCTAVA = 8
+MINIMO_S = 1e-6
+OCTAVAS = 24
+
+_NULO = contextlib.nullcontext()
+
+
+class Histograma:
+    """Histograma logaritmico de duraciones en segundos."""
+
+    def __init__(self) -> None:
+        self.cubetas: List[int] = [0] * (OCTAVAS * CUBETAS_POR_OCTAVA + 1)
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float) -> None:
+        if segundos <= MINIMO_S:
+            indice = 0
+        else:
+            indice = min(int(math.log2(segundos / MINIMO_S) * CUBETAS_POR_OCTAVA) + 1, len(self.cubetas) - 1)
+        self.cubetas[indice] += 1
+        self.total += 1
+        self.suma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        """Limite superior (en segundos) de la cubeta que contiene el percentil ``p``."""
+        if self.total == 0:
+            return 0.0
+        objetivo = p / 100.0 * self.total
+        acumulado = 0
+        for indice, cuenta in enumerate(self.cubetas):
+            acumulado += cuenta
+            if acumulado >= objetivo and cuenta:
+                return min(MINIMO_S * 2 ** (indice / CUBETAS_POR_OCTAVA), self.maximo)
+        return self.maximo
+
+    def resumen(self) -> Dict[str, float]:
+        return {
+            "n": self.total,
+            "media_ms": self.suma / self.total * 1000.0 if self.total else 0.0,
+            "p50_ms": self.percentil(50) * 1000.0,
+            "p90_ms": self.percentil(90) * 1000.0,
+            "p99_ms": self.percentil(99) * 1000.0,
+            "max_ms": self.maximo * 1000.0,
+        }
+
+
+class _Medicion:
+    __slots__ = ("perfil", "etapa", "inicio")
+
+    def __init__(self, perfil: "Perfilador", etapa: str) -> None:
+        self.perfil = perfil
+        self.etapa = etapa
+
+    def __enter__(self) -> None:
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.perfil.registrar(self.etapa, time.perf_counter() - self.inicio)
+
+
+class Perfilador:
+    """Histogramas por etapa, activables en caliente.
+
+    Cada etapa debe registrarse desde un solo hilo (como hace el pipeline:
+    captura, inferencia y analisis tienen hilos propios).
+    """
+
+    def __init__(self, activo: bool = False) -> None:
+        self.activo = activo
+        self.etapas: Dict[str, Histograma] = {}
+        self.desde = time.perf_counter()
+
+    def registrar(self, etapa: str, segundos: float) -> None:
+        if not self.activo:
+            return
+        histograma = self.etapas.get(etapa)
+        if histograma is None:
+            histograma = self.etapas.setdefault(etapa, Histograma())
+        histograma.registrar(segundos)
+
+    def medir(self, etapa: str):
+        """Contexto que registra la duracion de su bloque en ``etapa``."""
+        return _Medicion(self, etapa) if self.activo else _NULO
+
+    def reiniciar(self) -> None:
+        self.etapas = {}
+        self.desde = time.perf_counter()
+
+    def activar(self) -> None:
+        if not self.activo:
+            self.reiniciar()
+            self.activo = True
+
+    def desactivar(self) -> None:
+        self.activo = False
+
+    def alternar(self) -> bool:
+        """Cambia el estado; al desactivar imprime el informe. Devuelve el nuevo estado."""
+        if self.activo:
+            self.desactivar()
+            print(self.informe())
+        else:
+            self.activar()
+            print("Perfilado activado")
+        return self.activo
+
+    def resumen(self) -> Dict[str, Dict[str, float]]:
+        return {etapa: h.resumen() for etapa, h in self.etapas.items()}
+
+    def informe(self) -> str:
+        """Tabla de latencias por etapa desde la ultima activacion."""
+        lineas = [
+            f"Perfil de {time.perf_counter() - self.desde:.1f} s",
+            f"{'etapa':<14} {'n':>8} {'media':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)",
+        ]
+        for etapa, datos in self.resumen().items():
+            lineas.append(
+                f"{etapa:<14} {datos['n']:>8} {datos['media_ms']:>9.3f} {datos['p50_ms']:>9.3f} "
+                f"{datos['p90_ms']:>9.3f} {datos['p99_ms']:>9.3f} {datos['max_ms']:>9.3f}"
+            )
+        return "\n".join(lineas)
+
+
+# Perfilador del proceso, compartido por el pipeline, el detector y la ROI
+PERFIL = Perfilador(activo=os.environ.get("POSTURAZEN_PERFIL", "0") == "1")
+
+
+def instalar_senal(perfil: Optional[Perfilador] = None) -> bool:
+    """Alterna ``perfil`` con ``SIGUSR1``. Devuelve ``False`` si la plataforma no la tiene."""
+    perfil = perfil if perfil is not None else PERFIL
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    signal.signal(signal.SIGUSR1, lambda *_: perfil.alternar())
+    return True
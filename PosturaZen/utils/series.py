@@ -0,0 +1,363 @@
+"""Almacen en disco de las series temporales de postura.
+
+Cada estacion escribe, por dia, archivos binarios de solo anexado con
+registros NumPy de tamaño fijo::
+
+    raiz/<estacion>/<AAAA-MM-DD>/frames.bin    FRAME_DTYPE, un registro por frame
+    raiz/<estacion>/<AAAA-MM-DD>/minutos.bin   RESUMEN_DTYPE, uno por minuto
+    raiz/<estacion>/<AAAA-MM-DD>/horas.bin     RESUMEN_DTYPE, uno por hora
+
+Los resumenes guardan sumas y conteos (no medias), de modo que se combinan
+sumando: una hora es la suma de sus minutos y un dia la de sus horas. Asi
+las consultas por hora o por dia leen unos pocos cientos de registros aunque
+haya semanas de frames a 30 fps. Un resumen se escribe al cerrarse su
+intervalo; si el proceso se reinicia a mitad de un minuto (o de una hora)
+quedan dos registros con el mismo inicio, que la lectura vuelve a sumar.
+
+:class:`EscritorSeries` cumple la interfaz de sumidero de
+:class:`~PosturaZen.utils.telemetria.Telemetria`, que le entrega los
+registros desde su hilo de fondo: el bucle de deteccion no toca el disco.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import socket
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from PosturaZen.utils.tramas import ESTABLE, MALA_POSTURA, PERSONA
+
+RUTA_SERIES = os.path.join(os.path.expanduser("~"), ".local", "share", "posturazen", "series")
+
+# Bandera adicional: el frame en que el detector emitio una alerta
+ALERTA = 8
+
+FRAME_DTYPE = np.dtype(
+    [
+        ("t", "<f8"),
+        ("angulo_cuello", "<f4"),
+        ("angulo_cadera", "<f4"),
+        ("centro_x", "<f4"),
+        ("hrv", "<f4"),
+        ("banderas", "<u1"),
+    ]
+)
+
+RESUMEN_DTYPE = np.dtype(
+    [
+        ("inicio", "<f8"),
+        ("frames", "<u4"),
+        ("persona", "<u4"),
+        ("mala_postura", "<u4"),
+        ("estable", "<u4"),
+        ("alertas", "<u4"),
+        ("n_hrv", "<u4"),
+        ("suma_cuello", "<f8"),
+        ("suma_cadera", "<f8"),
+        ("suma_hrv", "<f8"),
+        ("min_hrv", "<f4"),
+        ("max_hrv", "<f4"),
+    ]
+)
+
+_SUMAS = ("frames", "persona", "mala_postura", "estable", "alertas", "n_hrv", "suma_cuello", "suma_cadera", "suma_hrv")
+_CONTADORES = (("persona", PERSONA), ("mala_postura", MALA_POSTURA), ("estable", ESTABLE), ("alertas", ALERTA))
+
+# (archivo, segundos) de cada nivel de resumen, del mas fino al mas grueso
+NIVELES: Tuple[Tuple[str, float], ...] = (("minutos", 60.0), ("horas", 3600.0))
+RESOLUCIONES = ("minuto", "hora", "dia")
+
+
+def _dia(t: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(t))
+
+
+def _inicio_dia(t: float) -> float:
+    local = time.localtime(t)
+    return time.mktime((local.tm_year, local.tm_mon, local.tm_mday, 0, 0, 0, 0, 0, -1))
+
+
+def _anexar(ruta: str, registros: np.ndarray) -> None:
+    with open(ruta, "ab") as f:
+        f.write(registros.tobytes())
+
+
+def _leer(ruta: str, dtype: np.dtype) -> np.ndarray:
+    """Lee los registros completos de ``ruta`` (ignora un final truncado)."""
+    try:
+        n = os.path.getsize(ruta) // dtype.itemsize
+    except OSError:
+        return np.empty(0, dtype)
+    return np.fromfile(ruta, dtype=dtype, count=n)
+
+
+def resumir(frames: np.ndarray, segundos: float) -> np.ndarray:
+    """Resume frames ``FRAME_DTYPE`` consecutivos en intervalos de ``segundos``."""
+    if len(frames) == 0:
+        return np.empty(0, RESUMEN_DTYPE)
+    intervalos = np.floor(frames["t"] / segundos) * segundos
+    cortes = np.flatnonzero(np.r_[True, intervalos[1:] != intervalos[:-1]])
+    banderas = frames["banderas"]
+    res = np.zeros(len(cortes), RESUMEN_DTYPE)
+    res["inicio"] = intervalos[cortes]
+    res["frames"] = np.diff(np.r_[cortes, len(frames)])
+    for campo, bandera in _CONTADORES:
+        res[campo] = np.add.reduceat(((banderas & bandera) != 0).astype(np.uint32), cortes)
+    res["suma_cuello"] = np.add.reduceat(np.nan_to_num(frames["angulo_cuello"].astype(np.float64)), cortes)
+    res["suma_cadera"] = np.add.reduceat(np.nan_to_num(frames["angulo_cadera"].astype(np.float64)), cortes)
+    hrv = frames["hrv"]
+    valido = ~np.isnan(hrv)
+    res["n_hrv"] = np.add.reduceat(valido.astype(np.uint32), cortes)
+    res["suma_hrv"] = np.add.reduceat(np.where(valido, hrv, 0.0).astype(np.float64), cortes)
+    res["min_hrv"] = np.fmin.reduceat(hrv, cortes)
+    res["max_hrv"] = np.fmax.reduceat(hrv, cortes)
+    return res
+
+
+def agrupar(resumenes: np.ndarray, claves: Optional[np.ndarray] = None) -> np.ndarray:
+    """Combina los resumenes con la misma clave (por defecto, el mismo inicio)."""
+    claves = resumenes["inicio"] if claves is None else claves
+    unicas, inversa = np.unique(claves, return_inverse=True)
+    res = np.zeros(len(unicas), RESUMEN_DTYPE)
+    res["inicio"] = unicas
+    for campo in _SUMAS:
+        np.add.at(res[campo], inversa, resumenes[campo])
+    res["min_hrv"] = np.nan
+    res["max_hrv"] = np.nan
+    np.fmin.at(res["min_hrv"], inversa, resumenes["min_hrv"])
+    np.fmax.at(res["max_hrv"], inversa, resumenes["max_hrv"])
+    return res
+
+
+def _sin_resumir(horas: np.ndarray, minutos: np.ndarray) -> np.ndarray:
+    """Minutos que aun no forman parte de ningun registro de hora.
+
+    Cada registro de hora resume, en orden de escritura, los minutos de esa
+    hora cerrados desde el anterior: los primeros minutos de cada hora hasta
+    sumar sus frames ya estan en ``horas`` y el resto sigue pendiente. Asi
+    tambien cuentan los minutos nuevos de una hora que se cerro a medias al
+    reiniciar el proceso. Devuelve los pendientes con el inicio de su hora.
+    """
+    if len(minutos) == 0:
+        return minutos
+    hora = np.floor(minutos["inicio"] / 3600.0) * 3600.0
+    orden = np.argsort(hora, kind="stable")
+    minutos, hora = minutos[orden], hora[orden]
+    # Frames acumulados de cada hora, minuto a minuto en orden de escritura
+    acumulado = np.cumsum(minutos["frames"], dtype=np.int64)
+    grupos = np.flatnonzero(np.r_[True, hora[1:] != hora[:-1]])
+    previos = acumulado[grupos] - minutos["frames"][grupos]
+    acumulado -= np.repeat(previos, np.diff(np.r_[grupos, len(hora)]))
+    cubiertos = np.zeros(len(hora), np.int64)
+    cubiertas = agrupar(horas)
+    if len(cubiertas):
+        i = np.minimum(np.searchsorted(cubiertas["inicio"], hora), len(cubiertas) - 1)
+        cubiertos = np.where(cubiertas["inicio"][i] == hora, cubiertas["frames"][i], 0)
+    pendiente = acumulado > cubiertos
+    resultado = minutos[pendiente]
+    resultado["inicio"] = hora[pendiente]
+    return resultado
+
+
+def resumen_a_dicts(resumenes: np.ndarray) -> List[Dict[str, Any]]:
+    """Convierte resumenes en diccionarios JSON con medias y fracciones."""
+    salida = []
+    for r in resumenes:
+        persona = int(r["persona"])
+        n_hrv = int(r["n_hrv"])
+        salida.append(
+            {
+                "inicio": float(r["inicio"]),
+                "frames": int(r["frames"]),
+                "persona": persona,
+                "mala_postura": int(r["mala_postura"]),
+                "estable": int(r["estable"]),
+                "alertas": int(r["alertas"]),
+                "fraccion_mala": float(r["mala_postura"] / persona) if persona else None,
+                "angulo_cuello": float(r["suma_cuello"] / persona) if persona else None,
+                "angulo_cadera": float(r["suma_cadera"] / persona) if persona else None,
+                "hrv": float(r["suma_hrv"] / n_hrv) if n_hrv else None,
+                "hrv_min": float(r["min_hrv"]) if n_hrv else None,
+                "hrv_max": float(r["max_hrv"]) if n_hrv else None,
+            }
+        )
+    return salida
+
+
+def _nan(valor: Optional[float]) -> float:
+    return math.nan if valor is None else float(valor)
+
+
+class EscritorSeries:
+    """Anexa frames y resumenes de una estacion a su directorio diario.
+
+    Args:
+        raiz: Directorio raiz del almacen.
+        estacion: Nombre de la estacion; por defecto, el nombre del equipo.
+    """
+
+    def __init__(self, raiz: str = RUTA_SERIES, estacion: Optional[str] = None) -> None:
+        self.raiz = raiz
+        self.estacion = estacion or socket.gethostname()
+        self.frames = 0
+        self._abiertos: List[Optional[np.ndarray]] = [None] * len(NIVELES)
+        self._alertas_previas: Optional[int] = None
+        self._directorios: Dict[str, str] = {}
+
+    def _ruta(self, dia: str, archivo: str) -> str:
+        directorio = self._directorios.get(dia)
+        if directorio is None:
+            directorio = os.path.join(self.raiz, self.estacion, dia)
+            os.makedirs(directorio, exist_ok=True)
+            self._directorios[dia] = directorio
+        return os.path.join(directorio, archivo + ".bin")
+
+    def escribir(self, registros: List[Dict[str, Any]]) -> None:
+        """Interfaz de sumidero: recibe registros de telemetria como diccionarios."""
+        frames = np.zeros(len(registros), FRAME_DTYPE)
+        for i, r in enumerate(registros):
+            alertas = r.get("alertas", 0)
+            alerta = self._alertas_previas is not None and alertas > self._alertas_previas
+            self._alertas_previas = alertas
+            frames[i] = (
+                r["timestamp"],
+                _nan(r.get("angulo_cuello")),
+                _nan(r.get("angulo_cadera")),
+                _nan(r.get("centro_x")),
+                _nan(r.get("hrv")),
+                (PERSONA if r.get("angulo_cuello") is not None else 0)
+                | (MALA_POSTURA if r.get("mala_postura") else 0)
+                | (ESTABLE if r.get("estable") else 0)
+                | (ALERTA if alerta else 0),
+            )
+        self.agregar(frames)
+
+    def agregar(self, frames: np.ndarray) -> None:
+        """Anexa frames ``FRAME_DTYPE`` en orden temporal y actualiza los resumenes."""
+        if len(frames) == 0:
+            return
+        primero, ultimo = _dia(frames["t"][0]), _dia(frames["t"][-1])
+        if primero == ultimo:
+            _anexar(self._ruta(primero, "frames"), frames)
+        else:
+            for dia, parte in self._por_dia(frames):
+                _anexar(self._ruta(dia, "frames"), parte)
+        self.frames += len(frames)
+        self._acumular(0, resumir(frames, NIVELES[0][1]))
+
+    @staticmethod
+    def _por_dia(frames: np.ndarray) -> Iterator[Tuple[str, np.ndarray]]:
+        dias = np.array([_dia(t) for t in frames["t"]])
+        cortes = np.flatnonzero(np.r_[True, dias[1:] != dias[:-1]])
+        for inicio, fin in zip(cortes, np.r_[cortes[1:], len(frames)]):
+            yield dias[inicio], frames[inicio:fin]
+
+    def _acumular(self, nivel: int, resumenes: np.ndarray) -> None:
+        for i in range(len(resumenes)):
+            abierto = self._abiertos[nivel]
+            if abierto is not None and abierto["inicio"][0] == resumenes["inicio"][i]:
+                self._abiertos[nivel] = agrupar(np.concatenate([abierto, resumenes[i : i + 1]]))
+                continue
+            if abierto is not None:
+                self._cerrar(nivel)
+            self._abiertos[nivel] = resumenes[i : i + 1].copy()
+
+    def _cerrar(self, nivel: int) -> None:
+        registro = self._abiertos[nivel]
+        self._abiertos[nivel] = None
+        archivo = NIVELES[nivel][0]
+        _anexar(self._ruta(_dia(registro["inicio"][0]), archivo), registro)
+        if nivel + 1 < len(NIVELES):
+            segundos = NIVELES[nivel + 1][1]
+            superior = registro.copy()
+            superior["inicio"] = np.floor(superior["inicio"] / segundos) * segundos
+            self._acumular(nivel + 1, superior)
+
+    def cerrar(self) -> None:
+        """Escribe los intervalos aun abiertos (parciales) de todos los niveles."""
+        for nivel in range(len(NIVELES)):
+            if self._abiertos[nivel] is not None:
+                self._cerrar(nivel)
+
+
+class LectorSeries:
+    """Consultas sobre el almacen sin recorrer los frames crudos.
+
+    Args:
+        raiz: Directorio raiz del almacen.
+    """
+
+    def __init__(self, raiz: str = RUTA_SERIES) -> None:
+        self.raiz = raiz
+
+    def estaciones(self) -> List[str]:
+        try:
+            return sorted(e.name for e in os.scandir(self.raiz) if e.is_dir())
+        except FileNotFoundError:
+            return []
+
+    def dias(self, estacion: str, desde: Optional[float] = None, hasta: Optional[float] = None) -> List[str]:
+        try:
+            dias = sorted(e.name for e in os.scandir(os.path.join(self.raiz, estacion)) if e.is_dir())
+        except FileNotFoundError:
+            return []
+        if desde is not None:
+            dias = [d for d in dias if d >= _dia(desde)]
+        if hasta is not None:
+            dias = [d for d in dias if d <= _dia(hasta)]
+        return dias
+
+    def _nivel(self, estacion: str, dias: Sequence[str], archivo: str) -> np.ndarray:
+        partes = [_leer(os.path.join(self.raiz, estacion, d, archivo + ".bin"), RESUMEN_DTYPE) for d in dias]
+        return np.concatenate(partes) if partes else np.empty(0, RESUMEN_DTYPE)
+
+    def resumen(self, estacion: str, desde: float, hasta: float, resolucion: str = "hora") -> np.ndarray:
+        """Resumenes de ``estacion`` con inicio en ``[desde, hasta)``.
+
+        Args:
+            resolucion: ``"minuto"``, ``"hora"`` o ``"dia"`` (dias locales).
+
+        Returns:
+            Arreglo ``RESUMEN_DTYPE`` ordenado por inicio. En ``"hora"`` y
+            ``"dia"`` se incluyen los minutos de la hora aun no cerrada.
+        """
+        if resolucion not in RESOLUCIONES:
+            raise ValueError(f"Resolucion desconocida: {resolucion!r}. Opciones: {', '.join(RESOLUCIONES)}")
+        dias = self.dias(estacion, desde, hasta)
+        if resolucion == "minuto":
+            registros = self._nivel(estacion, dias, "minutos")
+        else:
+            registros = self._nivel(estacion, dias, "horas")
+            # La hora en curso (o la reabierta tras un reinicio) aun esta en
+            # minutos; las horas anteriores a la ultima ya estan cerradas
+            corte = registros["inicio"].max() if len(registros) else desde
+            recientes = self._nivel(estacion, [d for d in dias if d >= _dia(corte)], "minutos")
+            recientes = recientes[recientes["inicio"] >= corte]
+            registros = np.concatenate([registros, _sin_resumir(registros, recientes)])
+        registros = registros[(registros["inicio"] >= desde) & (registros["inicio"] < hasta)]
+        if resolucion == "dia" and len(registros):
+            horas = np.unique(registros["inicio"])
+            inicio_dia = np.array([_inicio_dia(h) for h in horas])
+            return agrupar(registros, inicio_dia[np.searchsorted(horas, registros["inicio"])])
+        return agrupar(registros)
+
+    def frames(self, estacion: str, desde: float, hasta: float) -> np.ndarray:
+        """Frames crudos en ``[desde, hasta)``, mapeados en memoria sin copiarlos."""
+        partes = []
+        for dia in self.dias(estacion, desde, hasta):
+            ruta = os.path.join(self.raiz, estacion, dia, "frames.bin")
+            n = os.path.getsize(ruta) // FRAME_DTYPE.itemsize if os.path.exists(ruta) else 0
+            if n == 0:
+                continue
+            datos = np.memmap(ruta, dtype=FRAME_DTYPE, mode="r", shape=(n,))
+            # bisect lee ~log2(n) registros; searchsorted copiaria la columna entera
+            t = datos["t"]
+            partes.append(datos[bisect.bisect_left(t, desde) : bisect.bisect_left(t, hasta)])
+        if len(partes) == 1:
+            return partes[0]
+        return np.concatenate(partes) if partes else np.empty(0, FRAME_DTYPE)
@@ -0,0 +1,208 @@
+"""Telemetria estructurada y muestreada del bucle de deteccion.
+
+Cada frame analizado produce un registro pequeño (tiempos por etapa, banderas
+de postura, HRV) que se guarda en un buffer circular. Un hilo de fondo vacia
+el buffer periodicamente hacia un sumidero (archivo JSON Lines o el backend
+FastAPI), de modo que el bucle de deteccion nunca escribe en disco ni en la
+terminal. Las huellas del contenido del frame son opcionales y solo se
+calculan cada ``muestreo`` frames sobre una version submuestreada.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import urllib.request
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Protocol
+
+import numpy as np
+
+try:  # xxhash es opcional; blake2b de la libreria estandar es el respaldo
+    import xxhash
+except ImportError:  # pragma: no cover - depende del entorno
+    xxhash = None
+
+
+@dataclass
+class RegistroFrame:
+    """Datos de un frame analizado."""
+
+    indice: int
+    timestamp: float
+    etapas_ms: Dict[str, float] = field(default_factory=dict)
+    angulo_cuello: Optional[float] = None
+    angulo_cadera: Optional[float] = None
+    centro_x: Optional[float] = None
+    mala_postura: Optional[bool] = None
+    estable: Optional[bool] = None
+    alertas: int = 0
+    hrv: Optional[float] = None
+    huella: Optional[str] = None
+
+
+def huella_submuestreada(frame: np.ndarray, paso: int = 16) -> str:
+    """Hash rapido de una rejilla de pixeles tomada cada ``paso`` pixeles."""
+    muestra = np.ascontiguousarray(frame[::paso, ::paso])
+    if xxhash is not None:
+        return xxhash.xxh64(muestra).hexdigest()
+    return hashlib.blake2b(muestra, digest_size=8).hexdigest()
+
+
+def huella_perceptual(frame: np.ndarray, lado: int = 8) -> str:
+    """Hash perceptual promedio (aHash) de ``lado`` x ``lado`` bits."""
+    # Submuestrear primero para que el costo no dependa de la resolucion
+    paso_y = max(frame.shape[0] // (lado * 4), 1)
+    paso_x = max(frame.shape[1] // (lado * 4), 1)
+    muestra = frame[::paso_y, ::paso_x].astype(np.float32)
+    gris = muestra.mean(axis=2) if muestra.ndim == 3 else muestra
+    h, w = gris.shape
+    gris = gris[: h - h % lado, : w - w % lado]
+    bloques = gris.reshape(lado, gris.shape[0] // lado, lado, gris.shape[1] // lado).mean(axis=(1, 3))
+    return np.packbits(bloques > bloques.mean()).tobytes().hex()
+
+
+HUELLAS = {
+    "submuestreo": huella_submuestreada,
+    "perceptual": huella_perceptual,
+}
+
+
+class Sumidero(Protocol):
+    def escribir(self, registros: List[Dict[str, Any]]) -> None:
+        ...
+
+
+class SumideroArchivo:
+    """Agrega los registros a un archivo JSON Lines."""
+
+    def __init__(self, ruta: str) -> None:
+        self.ruta = ruta
+
+    def escribir(self, registros: List[Dict[str, Any]]) -> None:
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+class SumideroHTTP:
+    """Envia los registros en lotes JSON al backend FastAPI."""
+
+    def __init__(self, url: str, timeout: float = 2.0) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def escribir(self, registros: List[Dict[str, Any]]) -> None:
+        cuerpo = json.dumps(registros).encode("utf-8")
+        peticion = urllib.request.Request(
+            self.url, data=cuerpo, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(peticion, timeout=self.timeout):
+            pass
+
+
+class SumideroMultiple:
+    """Reparte cada lote entre varios sumideros; uno caido no frena a los demas."""
+
+    def __init__(self, sumideros: List[Sumidero]) -> None:
+        self.sumideros = sumideros
+
+    def escribir(self, registros: List[Dict[str, Any]]) -> None:
+        errores = []
+        for sumidero in self.sumideros:
+            try:
+                sumidero.escribir(registros)
+            except Exception as exc:
+                errores.append(exc)
+        if errores:
+            raise errores[0]
+
+
+def crear_sumidero(destino: str) -> Sumidero:
+    """Crea un sumidero HTTP si ``destino`` es una URL o de archivo si no."""
+    if destino.startswith(("http://", "https://")):
+        return SumideroHTTP(destino)
+    return SumideroArchivo(destino)
+
+
+class Telemetria:
+    """Buffer circular de registros por frame con vaciado asincrono.
+
+    Args:
+        sumidero: Destino de los registros. ``None`` los mantiene solo en memoria.
+        capacidad: Registros maximos retenidos; los mas antiguos se descartan.
+        muestreo: Calcular una huella del frame cada ``muestreo`` frames
+            (``0`` desactiva las huellas).
+        metodo_huella: ``"submuestreo"`` o ``"perceptual"``.
+        intervalo: Segundos entre vaciados del buffer.
+    """
+
+    def __init__(
+        self,
+        sumidero: Optional[Sumidero] = None,
+        capacidad: int = 4096,
+        muestreo: int = 0,
+        metodo_huella: str = "submuestreo",
+        intervalo: float = 1.0,
+    ) -> None:
+        self.sumidero = sumidero
+        self.muestreo = muestreo
+        self._huella = HUELLAS[metodo_huella]
+        self.intervalo = intervalo
+        self._buffer: Deque[RegistroFrame] = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.descartados = 0
+        self.errores = 0
+
+    def debe_muestrear(self, indice: int) -> bool:
+        return self.muestreo > 0 and indice % self.muestreo == 0
+
+    def registrar(self, registro: RegistroFrame, frame: Optional[np.ndarray] = None) -> None:
+        """Agrega ``registro``; calcula su huella si toca muestrear."""
+        if frame is not None and registro.huella is None and self.debe_muestrear(registro.indice):
+            registro.huella = self._huella(frame)
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.descartados += 1
+            self._buffer.append(registro)
+
+    def ultimos(self, n: int = 1) -> List[RegistroFrame]:
+        with self._lock:
+            return list(self._buffer)[-n:]
+
+    def iniciar(self) -> None:
+        if self.sumidero is None or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        self._evento.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="telemetria", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._evento.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=self.intervalo + 1.0)
+            self._hilo = None
+        self.vaciar()
+
+    def vaciar(self) -> int:
+        """Envia al sumidero todo lo acumulado y devuelve cuantos registros fueron."""
+        if self.sumidero is None:
+            return 0
+        with self._lock:
+            registros = list(self._buffer)
+            self._buffer.clear()
+        if not registros:
+            return 0
+        try:
+            self.sumidero.escribir([asdict(r) for r in registros])
+        except Exception:  # un sumidero caido no debe afectar la deteccion
+            self.errores += 1
+        return len(registros)
+
+    def _bucle(self) -> None:
+        while not self._evento.wait(self.intervalo):
+            self.vaciar()
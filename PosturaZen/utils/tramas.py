@@ -0,0 +1,148 @@
+"""Tramas binarias del estado del detector para el panel en vivo.
+
+Cada frame analizado se resume en una trama fija de 48 bytes (angulos,
+banderas, HRV y latencias por etapa) que el detector envia por UDP al
+backend FastAPI, y este la reparte a los paneles conectados. UDP no bloquea
+ni reintenta: si el backend no escucha o va lento, las tramas se pierden y
+el bucle de deteccion no se entera.
+
+Disposicion (little endian)::
+
+    version u8 | estacion u16 | indice u32 | timestamp f64
+    angulo_cuello f32 | angulo_cadera f32 | centro_x f32
+    banderas u8 | alertas u32 | hrv f32
+    inferencia_ms f32 | espera_ms f32 | analisis_ms f32
+
+Los valores ausentes (sin persona, sin HRV) se envian como NaN.
+"""
+
+from __future__ import annotations
+
+import math
+import socket
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from PosturaZen.utils.telemetria import RegistroFrame
+
+VERSION = 1
+
+# Las estaciones se codifican en u16: las locales (PublicadorUDP) usan las
+# bajas y las sesiones de ingesta del backend, desde ESTACION_INGESTA
+ESTACION_INGESTA = 0x8000
+ESTACION_MAXIMA = 0xFFFF
+
+FORMATO = struct.Struct("<BHIdfffBIffff")
+TAMANO = FORMATO.size
+
+# Misma disposicion para decodificar lotes completos sin bucles
+DTYPE = np.dtype(
+    [
+        ("version", "<u1"),
+        ("estacion", "<u2"),
+        ("indice", "<u4"),
+        ("timestamp", "<f8"),
+        ("angulo_cuello", "<f4"),
+        ("angulo_cadera", "<f4"),
+        ("centro_x", "<f4"),
+        ("banderas", "<u1"),
+        ("alertas", "<u4"),
+        ("hrv", "<f4"),
+        ("inferencia_ms", "<f4"),
+        ("espera_ms", "<f4"),
+        ("analisis_ms", "<f4"),
+    ]
+)
+assert DTYPE.itemsize == TAMANO
+
+PERSONA = 1
+MALA_POSTURA = 2
+ESTABLE = 4
+
+_NAN = float("nan")
+
+
+def _valor(x: Optional[float]) -> float:
+    return _NAN if x is None else float(x)
+
+
+def codificar(registro: RegistroFrame, estacion: int = 0) -> bytes:
+    """Empaqueta un :class:`RegistroFrame` en una trama de :data:`TAMANO` bytes."""
+    banderas = 0
+    if registro.angulo_cuello is not None:
+        banderas |= PERSONA
+    if registro.mala_postura:
+        banderas |= MALA_POSTURA
+    if registro.estable:
+        banderas |= ESTABLE
+    etapas = registro.etapas_ms
+    return FORMATO.pack(
+        VERSION,
+        estacion,
+        registro.indice & 0xFFFFFFFF,
+        registro.timestamp,
+        _valor(registro.angulo_cuello),
+        _valor(registro.angulo_cadera),
+        _valor(registro.centro_x),
+        banderas,
+        registro.alertas,
+        _valor(registro.hrv),
+        _valor(etapas.get("inferencia")),
+        _valor(etapas.get("espera")),
+        _valor(etapas.get("analisis")),
+    )
+
+
+def decodificar(datos: bytes) -> np.ndarray:
+    """Decodifica una o varias tramas concatenadas en un arreglo estructurado."""
+    return np.frombuffer(datos, dtype=DTYPE, count=len(datos) // TAMANO)
+
+
+def a_dict(trama: np.void) -> Dict[str, Any]:
+    """Convierte una trama decodificada en un diccionario JSON serializable."""
+    datos: Dict[str, Any] = {}
+    for nombre in DTYPE.names:
+        valor = trama[nombre].item()
+        datos[nombre] = None if isinstance(valor, float) and math.isnan(valor) else valor
+    banderas = datos.pop("banderas")
+    datos["persona"] = bool(banderas & PERSONA)
+    datos["mala_postura"] = bool(banderas & MALA_POSTURA)
+    datos["estable"] = bool(banderas & ESTABLE)
+    return datos
+
+
+def _direccion(destino: str) -> Tuple[str, int]:
+    host, _, puerto = destino.rpartition(":")
+    return host or "127.0.0.1", int(puerto)
+
+
+class PublicadorUDP:
+    """Envia una trama por frame al backend sin bloquear nunca.
+
+    Args:
+        destino: ``"host:puerto"`` donde escucha el backend.
+        estacion: Identificador de la estacion incluido en cada trama, menor
+            que ``ESTACION_INGESTA``.
+    """
+
+    def __init__(self, destino: str = "127.0.0.1:8765", estacion: int = 0) -> None:
+        if not 0 <= estacion < ESTACION_INGESTA:
+            raise ValueError(f"La estacion local debe estar en [0, {ESTACION_INGESTA})")
+        self.direccion = _direccion(destino)
+        self.estacion = estacion
+        self.enviadas = 0
+        self.descartadas = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def publicar(self, registro: RegistroFrame) -> None:
+        try:
+            self._socket.sendto(codificar(registro, self.estacion), self.direccion)
+            self.enviadas += 1
+        except OSError:  # buffer lleno o backend caido: se descarta la trama
+            self.descartadas += 1
+
+    def cerrar(self) -> None:
+        self._socket.close()
@@ -1,26 +1,244 @@
-"""Modulo de retroalimentaci\u00f3n por voz."""
+"""Modulo de retroalimentación por voz.
+
+Los mensajes se encolan y los pronuncia un hilo de fondo, de modo que
+``speak`` y ``decir`` regresan de inmediato y nunca bloquean el bucle de
+deteccion. La cola prioriza los mensajes, fusiona los duplicados pendientes
+y limita la frecuencia con la que se repite un mismo mensaje.
+"""
 
 from __future__ import annotations
 
 import datetime
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PRIORIDAD_ALTA = 0
+PRIORIDAD_NORMAL = 1
+PRIORIDAD_BAJA = 2
+
+# Segundos minimos entre dos repeticiones del mismo mensaje
+INTERVALO_MINIMO = 10.0
+
+
+def _crear_motor() -> Any:
+    """Inicializa ``pyttsx3`` con una voz en español si existe."""
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 165)
+    for voice in engine.getProperty("voices"):
+        if "spanish" in voice.name.lower() or "es_" in voice.id.lower():
+            engine.setProperty("voice", voice.id)
+            break
+    return engine
+
+
+class StubEngine:
+    """Motor de voz silencioso con la interfaz de ``pyttsx3``.
+
+    Registra lo que se habria pronunciado en ``dichos`` para poder probar la
+    cola sin hardware de audio.
+    """
+
+    def __init__(self, duracion: float = 0.0) -> None:
+        self.duracion = duracion
+        self.propiedades: Dict[str, Any] = {"volume": 1.0, "voices": []}
+        self.dichos: List[str] = []
+        self._pendientes: List[str] = []
+
+    def setProperty(self, nombre: str, valor: Any) -> None:
+        self.propiedades[nombre] = valor
+
+    def getProperty(self, nombre: str) -> Any:
+        return self.propiedades.get(nombre)
+
+    def say(self, texto: str) -> None:
+        self._pendientes.append(texto)
+
+    def runAndWait(self) -> None:
+        if self.duracion:
+            time.sleep(self.duracion * len(self._pendientes))
+        self.dichos.extend(self._pendientes)
+        self._pendientes.clear()
+
+
+class ColaVoz:
+    """Cola de mensajes hablados atendida por un hilo de fondo.
+
+    Args:
+        fabrica_motor: Funcion que crea el motor de voz. Se invoca dentro del
+            hilo de fondo la primera vez que hay algo que decir.
+        intervalo_minimo: Segundos minimos entre repeticiones de un mensaje.
+    """
+
+    def __init__(
+        self,
+        fabrica_motor: Callable[[], Any] = _crear_motor,
+        intervalo_minimo: float = INTERVALO_MINIMO,
+    ) -> None:
+        self.fabrica_motor = fabrica_motor
+        self.intervalo_minimo = intervalo_minimo
+        self.motor: Any = None
+        self._heap: List[list] = []
+        self._pendientes: Dict[str, list] = {}
+        self._ultimo: Dict[str, float] = {}
+        self._contador = itertools.count()
+        self._cond = threading.Condition()
+        self._hablando = False
+        self._activo = True
+        self._hilo: Optional[threading.Thread] = None
+        self.descartados = 0
+        self.fusionados = 0
+
+    def encolar(
+        self,
+        texto: str,
+        prioridad: int = PRIORIDAD_NORMAL,
+        volumen: float = 1.0,
+        intervalo: Optional[float] = None,
+    ) -> bool:
+        """Agrega ``texto`` a la cola sin bloquear.
+
+        Returns:
+            ``True`` si el mensaje se encolo como nuevo, ``False`` si se
+            fusiono con uno pendiente o se descarto por el limite de frecuencia.
+        """
+        intervalo = self.intervalo_minimo if intervalo is None else intervalo
+        ahora = time.monotonic()
+        with self._cond:
+            pendiente = self._pendientes.get(texto)
+            if pendiente is not None:
+                self.fusionados += 1
+                pendiente[3] = volumen
+                if prioridad < pendiente[0]:
+                    # Invalidar la entrada previa y reinsertar con mas prioridad
+                    pendiente[2] = None
+                    entrada = [prioridad, pendiente[1], texto, volumen]
+                    self._pendientes[texto] = entrada
+                    heapq.heappush(self._heap, entrada)
+                return False
+            ultimo = self._ultimo.get(texto)
+            if ultimo is not None and ahora - ultimo < intervalo:
+                self.descartados += 1
+                return False
+            self._ultimo[texto] = ahora
+            entrada = [prioridad, next(self._contador), texto, volumen]
+            self._pendientes[texto] = entrada
+            heapq.heappush(self._heap, entrada)
+            self._asegurar_hilo()
+            self._cond.notify()
+        return True
+
+    def pendientes(self) -> int:
+        with self._cond:
+            return len(self._pendientes)
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola se vacie. Util en pruebas y al cerrar."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pendientes or self._hablando:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+        return True
+
+    def detener(self) -> None:
+        with self._cond:
+            self._activo = False
+            self._cond.notify_all()
+        if self._hilo is not None:
+            self._hilo.join(timeout=1.0)
+
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="voz", daemon=True)
+            self._hilo.start()
+
+    def _siguiente(self) -> Optional[list]:
+        with self._cond:
+            while self._activo:
+                while self._heap:
+                    entrada = heapq.heappop(self._heap)
+                    if entrada[2] is None:
+                        continue
+                    del self._pendientes[entrada[2]]
+                    self._hablando = True
+                    return entrada
+                self._cond.wait()
+        return None
+
+    def _bucle(self) -> None:
+        while True:
+            entrada = self._siguiente()
+            if entrada is None:
+                return
+            _, _, texto, volumen = entrada
+            try:
+                if self.motor is None:
+                    self.motor = self.fabrica_motor()
+                self.motor.setProperty("volume", volumen)
+                self.motor.say(texto)
+                self.motor.runAndWait()
+            except Exception as exc:  # el audio nunca debe tumbar la deteccion
+                print(f"No se pudo reproducir el mensaje de voz: {exc}")
+            finally:
+                with self._cond:
+                    self._hablando = False
+                    self._cond.notify_all()
+
+
+_cola: Optional[ColaVoz] = None
+_cola_lock = threading.Lock()
+
+
+def obtener_cola() -> ColaVoz:
+    """Devuelve la cola de voz global, creandola en el primer uso."""
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ColaVoz()
+        return _cola
+
+
+def usar_motor(fabrica_motor: Callable[[], Any], intervalo_minimo: float = INTERVALO_MINIMO) -> ColaVoz:
+    """Reemplaza la cola global por una que usa ``fabrica_motor``.
 
-import pyttsx3
+    Permite, por ejemplo, ``usar_motor(StubEngine)`` en entornos sin audio.
+    """
+    global _cola
+    with _cola_lock:
+        if _cola is not None:
+            _cola.detener()
+        _cola = ColaVoz(fabrica_motor, intervalo_minimo)
+        return _cola
 
-_engine = pyttsx3.init()
-_engine.setProperty("rate", 165)
-for voice in _engine.getProperty("voices"):
-    if "spanish" in voice.name.lower() or "es_" in voice.id.lower():
-        _engine.setProperty("voice", voice.id)
-        break
 
-# Indica si ya se emitió una alerta por movimiento reciente
-alerta_movimiento_activa = False
+@contextmanager
+def motor_temporal(
+    fabrica_motor: Callable[[], Any], intervalo_minimo: float = INTERVALO_MINIMO
+) -> Iterator[ColaVoz]:
+    """Como :func:`usar_motor` solo dentro del bloque; al salir vuelve la cola anterior."""
+    global _cola
+    with _cola_lock:
+        anterior = _cola
+        temporal = _cola = ColaVoz(fabrica_motor, intervalo_minimo)
+    try:
+        yield temporal
+    finally:
+        temporal.detener()
+        with _cola_lock:
+            _cola = anterior
 
 
 def speak(text: str) -> None:
     """Pronuncia ``text`` en voz alta usando una voz en español."""
-    _engine.say(text)
-    _engine.runAndWait()
+    obtener_cola().encolar(text, PRIORIDAD_ALTA)
 
 
 def decir(texto: str, no_molestar: bool = False) -> None:
@@ -28,6 +246,4 @@ def decir(texto: str, no_molestar: bool = False) -> None:
     hora = datetime.datetime.now().hour
     if no_molestar and 9 <= hora <= 17:
         volumen = 0.3
-    _engine.setProperty("volume", volumen)
-    _engine.say(texto)
-    _engine.runAndWait()
+    obtener_cola().encolar(texto, PRIORIDAD_NORMAL, volumen)
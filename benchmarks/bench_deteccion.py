@@ -0,0 +1,267 @@
+"""Suite reproducible del bucle de deteccion sobre frames y puntos grabados.
+
+Reproduce una grabacion (frames, puntos y tiempos de captura) a traves del
+detector completo, los estimadores de HRV y las funciones de analisis de
+postura, sin camara ni modelo. Por caso informa fps, latencia p50/p99 por
+llamada y el pico de memoria asignada. Con ``--json`` guarda el resultado y
+con ``--base`` lo compara con uno anterior: la salida es 1 si algun caso
+pierde mas de ``--tolerancia`` de fps.
+
+Sin ``--grabacion`` se usa una grabacion sintetica determinista. Para crear
+una a partir de un video (requiere el backend de pose)::
+
+    python -m benchmarks.bench_deteccion --crear sesion.mp4 --grabacion sesion.npz
+    python -m benchmarks.bench_deteccion --grabacion sesion.npz --json base.json
+    python -m benchmarks.bench_deteccion --grabacion sesion.npz --base base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+import PosturaZen.voz.feedback as feedback
+from modules.hrv_rppg import HRVEstimator as HRVPicos
+from modules.posture_analysis import (
+    StabilityTracker,
+    extract_rppg_signal,
+    measure_head_inclination,
+    measure_user_distance,
+)
+from modules.rppg import FACE_REGIONS
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.alertas import MotorAlertas
+from PosturaZen.deteccion.detector import Detector, puntos_por_persona
+from PosturaZen.deteccion.preproceso import Preprocesador
+from PosturaZen.deteccion.roi import ProveedorROI
+from PosturaZen.utils.hrv import HRVEstimator
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, es_mala_postura, metricas_frame
+from PosturaZen.utils.perfil import Histograma, Perfilador
+from PosturaZen.utils.telemetria import RegistroFrame
+
+# Pose sentada de referencia (COCO, normalizada)
+POSE = np.array(
+    [
+        [0.50, 0.30], [0.52, 0.28], [0.48, 0.28], [0.54, 0.30], [0.46, 0.30],
+        [0.62, 0.45], [0.38, 0.45], [0.66, 0.60], [0.34, 0.60], [0.64, 0.72],
+        [0.36, 0.72], [0.58, 0.78], [0.42, 0.78], [0.58, 0.92], [0.42, 0.92],
+        [0.58, 0.99], [0.42, 0.99],
+    ],
+    dtype=np.float32,
+)
+
+
+def grabacion_sintetica(frames: int, alto: int, ancho: int, fps: float = 30.0) -> Dict[str, np.ndarray]:
+    """Persona que oscila y se encorva a ratos, con pulso de 72 lpm en la cara."""
+    rng = np.random.default_rng(0)
+    t = np.arange(frames) / fps
+    deriva = 0.02 * np.sin(2 * np.pi * t / 20.0)
+    encorvado = (np.sin(2 * np.pi * t / 40.0) > 0.5) * 0.05
+    puntos = np.repeat(POSE[None], frames, axis=0)
+    puntos[:, :, 0] += deriva[:, None]
+    puntos[:, :5, 1] += encorvado[:, None]
+    puntos += rng.normal(0, 0.002, puntos.shape).astype(np.float32)
+
+    fondo = rng.integers(40, 90, (alto, ancho, 3), dtype=np.uint8)
+    pulso = 3.0 * np.sin(2 * np.pi * 1.2 * t)
+    imagenes = np.empty((frames, alto, ancho, 3), dtype=np.uint8)
+    for i in range(frames):
+        imagenes[i] = fondo
+        cx, cy = int(puntos[i, 0, 0] * ancho), int(puntos[i, 0, 1] * alto)
+        lado = int(0.12 * ancho)
+        color = (120, 150 + pulso[i], 190)
+        cv2.rectangle(imagenes[i], (cx - lado, cy - lado), (cx + lado, cy + lado // 2), color, -1)
+    return {"frames": imagenes, "keypoints": puntos, "t": t}
+
+
+def crear_grabacion(video: str, backend: str, maximo: int) -> Dict[str, np.ndarray]:
+    """Infiere los puntos de ``video`` una vez para poder reproducirlo sin modelo."""
+    from PosturaZen.deteccion.registro import obtener_backend
+
+    modelo = obtener_backend(backend)
+    cap = cv2.VideoCapture(video)
+    frames: List[np.ndarray] = []
+    puntos: List[np.ndarray] = []
+    tiempos: List[float] = []
+    while len(frames) < maximo:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        kps = modelo.inferir([frame])[0]
+        frames.append(frame)
+        puntos.append(kps[0] if len(kps) else np.zeros((17, 2), np.float32))
+        tiempos.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+    cap.release()
+    return {"frames": np.stack(frames), "keypoints": np.stack(puntos), "t": np.array(tiempos)}
+
+
+def _casos(g: Dict[str, np.ndarray]) -> Dict[str, Tuple[Callable[[], Callable[[int], object]], int]]:
+    """Casos de la suite: fabrica del estado inicial y numero de llamadas."""
+    frames, keypoints, t = g["frames"], g["keypoints"], g["t"]
+    n, alto, ancho = frames.shape[:3]
+    base = PosturaBase(neck_back_angle=175.0, shoulder_hip_angle=178.0, center_x=0.5)
+    puntos = [puntos_por_persona(kp[None])[0] for kp in keypoints]
+    listas = [list(p.values()) for p in puntos]
+    malla = np.zeros((468, 2))
+    for (dx, dy), indices in zip([(0.0, -0.06), (-0.04, 0.0), (0.04, 0.0)], FACE_REGIONS.values()):
+        a = np.linspace(0, 2 * np.pi, len(indices), endpoint=False)
+        malla[list(indices)] = np.c_[dx + 0.02 * np.cos(a), dy + 0.02 * np.sin(a)]
+    mallas = [malla + kp[0] for kp in keypoints]
+    frente = [[(0.0, 0.0)] * 10 + [tuple(kp[0])] for kp in keypoints]
+    caja = (ancho // 2 - 40, alto // 4, 80, 80)
+
+    def detector() -> Callable[[int], object]:
+        perfil = Perfilador()
+        det = Detector(base, fps=30, roi=ProveedorROI(respaldo_haar=False, perfil=perfil), perfil=perfil)
+        return lambda i: det.procesar(frames[i], puntos[i], RegistroFrame(i, float(t[i])), float(t[i]))
+
+    def hrv_stream() -> Callable[[int], object]:
+        est = HRVEstimator(30)
+        x, y, w, h = caja
+        return lambda i: est.update(frames[i][y : y + h, x : x + w], float(t[i]))
+
+    def hrv_regiones() -> Callable[[int], object]:
+        est = HRVPicos(30, regions=FACE_REGIONS)
+        return lambda i: est.update(frames[i], mallas[i], float(t[i]))
+
+    def estabilidad() -> Callable[[int], object]:
+        tracker = StabilityTracker(window=10, num_points=len(KEYPOINT_INDEX), threshold=0.02)
+        return lambda i: tracker.update(listas[i])
+
+    def metricas() -> Callable[[int], object]:
+        return lambda i: es_mala_postura(*metricas_frame(puntos[i]), base)
+
+    def alertas() -> Callable[[int], object]:
+        motor = MotorAlertas(base, 30)
+        angulos = [metricas_frame(p) for p in puntos]
+        return lambda i: motor.actualizar(*angulos[i], float(t[i]))
+
+    def cabeza() -> Callable[[int], object]:
+        return lambda i: (
+            measure_head_inclination(mallas[i], ancho, alto),
+            measure_user_distance(mallas[i], ancho, alto),
+        )
+
+    def roi() -> Callable[[int], object]:
+        proveedor = ProveedorROI(respaldo_haar=False)
+        return lambda i: proveedor.obtener(frames[i], puntos[i])
+
+    def entrada() -> Callable[[int], object]:
+        preproceso = Preprocesador(640)
+
+        def paso(i: int) -> object:
+            _, transformacion = preproceso.preparar(frames[i])
+            preproceso.seguir(keypoints[i], ancho, alto)
+            return preproceso.restaurar(keypoints[i], transformacion)
+
+        return paso
+
+    def rppg_ventana() -> Callable[[int], object]:
+        ventana = min(300, n)
+        return lambda i: extract_rppg_signal(frames[i : i + ventana], frente[i : i + ventana])
+
+    return {
+        "detector.procesar": (detector, n),
+        "hrv (streaming)": (hrv_stream, n),
+        "hrv_rppg (3 regiones)": (hrv_regiones, n),
+        "StabilityTracker": (estabilidad, n),
+        "metricas + mala_postura": (metricas, n),
+        "MotorAlertas": (alertas, n),
+        "inclinacion + distancia": (cabeza, n),
+        "ProveedorROI (puntos)": (roi, n),
+        "Preprocesador (recorte)": (entrada, n),
+        "extract_rppg_signal": (rppg_ventana, max(n // 100, 1)),
+    }
+
+
+def medir(fabrica: Callable[[], Callable[[int], object]], llamadas: int) -> Dict[str, float]:
+    """Cronometra cada llamada y, en una segunda pasada, el pico de memoria."""
+    paso = fabrica()
+    histograma = Histograma()
+    reloj = time.perf_counter
+    inicio = reloj()
+    for i in range(llamadas):
+        t0 = reloj()
+        paso(i)
+        histograma.registrar(reloj() - t0)
+    total = reloj() - inicio
+
+    tracemalloc.start()
+    paso = fabrica()
+    for i in range(llamadas):
+        paso(i)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "fps": llamadas / total,
+        "p50_ms": histograma.percentil(50) * 1000.0,
+        "p99_ms": histograma.percentil(99) * 1000.0,
+        "memoria_kb": pico / 1024.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grabacion", help="archivo .npz con frames, keypoints y t")
+    parser.add_argument("--crear", metavar="VIDEO", help="crear --grabacion a partir de este video")
+    parser.add_argument("--backend", default="ultralytics")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--alto", type=int, default=240)
+    parser.add_argument("--ancho", type=int, default=320)
+    parser.add_argument("--casos", nargs="*", help="subconjunto de casos a ejecutar")
+    parser.add_argument("--json", help="guardar los resultados en este archivo")
+    parser.add_argument("--base", help="resultados anteriores con los que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="caida de fps admitida")
+    args = parser.parse_args()
+
+    if args.crear:
+        if not args.grabacion:
+            parser.error("--crear requiere --grabacion")
+        np.savez(args.grabacion, **crear_grabacion(args.crear, args.backend, args.frames))
+    if args.grabacion:
+        with np.load(args.grabacion) as datos:
+            grabacion = {k: datos[k] for k in ("frames", "keypoints", "t")}
+    else:
+        grabacion = grabacion_sintetica(args.frames, args.alto, args.ancho)
+
+    feedback.usar_motor(feedback.StubEngine)
+    anterior = {}
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            anterior = json.load(f)
+
+    n, alto, ancho = grabacion["frames"].shape[:3]
+    print(f"{n} frames de {ancho}x{alto}")
+    print(f"{'caso':<26} {'fps':>10} {'p50 ms':>9} {'p99 ms':>9} {'mem KB':>9}  {'vs base':>8}")
+    resultados: Dict[str, Dict[str, float]] = {}
+    regresiones = []
+    for nombre, (fabrica, llamadas) in _casos(grabacion).items():
+        if args.casos and nombre not in args.casos:
+            continue
+        r = medir(fabrica, llamadas)
+        resultados[nombre] = r
+        cambio = ""
+        if nombre in anterior:
+            relativo = r["fps"] / anterior[nombre]["fps"] - 1.0
+            cambio = f"{relativo:+.1%}"
+            if relativo < -args.tolerancia:
+                regresiones.append(nombre)
+        print(f"{nombre:<26} {r['fps']:>10.1f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['memoria_kb']:>9.1f}  {cambio:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+    if regresiones:
+        print(f"Regresiones de mas del {args.tolerancia:.0%}: {', '.join(regresiones)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
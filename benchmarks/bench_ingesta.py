@@ -0,0 +1,116 @@
+"""Rendimiento del servicio de ingesta al crecer el numero de sesiones.
+
+Cada sesion simula una camara a ``--fps`` que envia JPEG sinteticos al
+:class:`ServicioIngesta`; si el veredicto anterior aun no llego, el frame de
+la camara se omite (como haria un cliente ligero real). Por numero de
+sesiones se mide el throughput total, los frames por segundo logrados por
+sesion, la latencia de extremo a extremo y el tamaño medio de lote.
+
+Requiere el backend de pose indicado (por defecto ``ultralytics``) en cada
+proceso del pool. Uso::
+
+    python -m benchmarks.bench_ingesta --sesiones 1 2 4 8 16 --segundos 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+import PosturaZen.voz.feedback as feedback
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.cliente import frames_sinteticos
+from PosturaZen.deteccion.servicio import PoolInferencia, Saturado, ServicioIngesta
+
+
+async def _camara(
+    servicio: ServicioIngesta, id_sesion: str, jpegs: List[bytes], fps: float, fin: float, latencias: List[float]
+) -> Dict[str, int]:
+    periodo = 1.0 / fps
+    proximo = time.perf_counter()
+    enviados = omitidos = rechazados = 0
+    i = 0
+    while proximo < fin:
+        ahora = time.perf_counter()
+        if ahora < proximo:
+            await asyncio.sleep(proximo - ahora)
+        inicio = time.perf_counter()
+        try:
+            await servicio.procesar_jpeg(id_sesion, jpegs[i % len(jpegs)], inicio)
+            latencias.append((time.perf_counter() - inicio) * 1000.0)
+            enviados += 1
+        except Saturado:
+            rechazados += 1
+        i += 1
+        # Los ticks de camara que pasaron mientras se esperaba el veredicto se pierden
+        proximo += periodo
+        atrasados = int((time.perf_counter() - proximo) // periodo) + 1
+        if atrasados > 0:
+            omitidos += atrasados
+            proximo += atrasados * periodo
+    return {"enviados": enviados, "omitidos": omitidos, "rechazados": rechazados}
+
+
+async def _medir(servicio: ServicioIngesta, sesiones: int, jpegs: List[bytes], fps: float, segundos: float) -> None:
+    base = PosturaBase(neck_back_angle=160.0, shoulder_hip_angle=175.0, center_x=0.5)
+    ids = [servicio.abrir(base).id for _ in range(sesiones)]
+    lotes0, frames0 = servicio.pool.lotes, servicio.pool.frames
+    latencias: List[float] = []
+    fin = time.perf_counter() + segundos
+    resultados = await asyncio.gather(*(_camara(servicio, s, jpegs, fps, fin, latencias) for s in ids))
+    for s in ids:
+        servicio.cerrar(s)
+
+    enviados = sum(r["enviados"] for r in resultados)
+    omitidos = sum(r["omitidos"] for r in resultados)
+    rechazados = sum(r["rechazados"] for r in resultados)
+    lotes = servicio.pool.lotes - lotes0
+    lote_medio = (servicio.pool.frames - frames0) / lotes if lotes else 0.0
+    p50, p95 = np.percentile(latencias, [50, 95]) if latencias else (0.0, 0.0)
+    print(
+        f"{sesiones:>8} {enviados / segundos:10.1f} {enviados / segundos / sesiones:10.1f} "
+        f"{p50:9.1f} {p95:9.1f} {lote_medio:7.2f} {omitidos:9d} {rechazados:10d}"
+    )
+
+
+async def _ejecutar(args: argparse.Namespace) -> None:
+    pool = PoolInferencia(args.backend, args.procesos or None, args.lote, args.espera_ms)
+    inicio = time.perf_counter()
+    await pool.iniciar()
+    print(f"pool: {pool.procesos} procesos listos en {time.perf_counter() - inicio:.1f} s")
+    servicio = ServicioIngesta(pool, max_sesiones=max(args.sesiones))
+
+    generador = frames_sinteticos(args.ancho, args.alto)
+    jpegs = [cv2.imencode(".jpg", next(generador))[1].tobytes() for _ in range(30)]
+    print(f"{'sesiones':>8} {'frames/s':>10} {'fps/sesion':>10} {'p50 ms':>9} {'p95 ms':>9} {'lote':>7} {'omitidos':>9} {'rechazados':>10}")
+    try:
+        for sesiones in args.sesiones:
+            await _medir(servicio, sesiones, jpegs, args.fps, args.segundos)
+    finally:
+        await pool.cerrar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sesiones", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=15.0, help="frames por segundo de cada camara")
+    parser.add_argument("--backend", default="ultralytics")
+    parser.add_argument("--procesos", type=int, default=0, help="0: un proceso por nucleo")
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--espera-ms", type=float, default=5.0)
+    parser.add_argument("--ancho", type=int, default=640)
+    parser.add_argument("--alto", type=int, default=480)
+    args = parser.parse_args()
+
+    feedback.usar_motor(feedback.StubEngine)
+    asyncio.run(_ejecutar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compara las metricas de postura escalares frente a la version vectorizada.
+
+Uso::
+
+    python -m benchmarks.bench_metricas --frames 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, es_mala_postura, metricas_frame, metricas_lote
+
+
+def _escalar(keypoints: np.ndarray, base: PosturaBase) -> np.ndarray:
+    banderas = np.empty(len(keypoints), dtype=bool)
+    for i, kp in enumerate(keypoints):
+        puntos = {n: (float(kp[idx][0]), float(kp[idx][1])) for n, idx in KEYPOINT_INDEX.items()}
+        banderas[i] = es_mala_postura(*metricas_frame(puntos), base)
+    return banderas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=1_000_000)
+    parser.add_argument(
+        "--muestra-escalar",
+        type=int,
+        default=100_000,
+        help="frames evaluados con la version escalar (se extrapola al total)",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    keypoints = rng.random((args.frames, 17, 2), dtype=np.float32)
+    base = PosturaBase(neck_back_angle=160.0, shoulder_hip_angle=175.0, center_x=0.5)
+
+    inicio = time.perf_counter()
+    lote = metricas_lote(keypoints, base)
+    t_lote = time.perf_counter() - inicio
+
+    muestra = keypoints[: args.muestra_escalar]
+    inicio = time.perf_counter()
+    banderas = _escalar(muestra, base)
+    t_escalar = (time.perf_counter() - inicio) * args.frames / len(muestra)
+
+    coinciden = bool(np.array_equal(banderas, lote["mala_postura"][: len(muestra)]))
+    print(f"frames:      {args.frames}")
+    print(f"escalar:     {t_escalar:.2f} s (extrapolado)")
+    print(f"vectorizado: {t_lote:.3f} s")
+    print(f"aceleracion: {t_escalar / t_lote:.1f}x")
+    print(f"banderas identicas: {coinciden}")
+
+
+if __name__ == "__main__":
+    main()
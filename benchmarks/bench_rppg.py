@@ -0,0 +1,192 @@
+"""Compara el motor rPPG unificado con los tres caminos rPPG originales.
+
+Los tres caminos originales (anteriores a ``modules.rppg``) se copian aqui tal
+cual para medirlos contra el codigo actual que los sustituye:
+
+* ``modules.hrv_rppg.HRVEstimator`` (RMSSD por picos, 300 muestras),
+* ``PosturaZen.utils.hrv.HRVEstimatorLote`` (compuerta SNR, 900 muestras),
+* ``modules.posture_analysis.extract_rppg_signal`` (bucle de ROI y FFT).
+
+Tambien se mide el extractor de varias regiones (frente y mejillas) frame a
+frame, que es como lo usa ``main.py``, y ``RPPGEngine.process_batch`` con
+cada metodo de señal.
+
+Uso::
+
+    python -m benchmarks.bench_rppg --frames 900
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.signal import butter, filtfilt, find_peaks, periodogram
+
+from modules.hrv_rppg import HRVEstimator
+from modules.posture_analysis import extract_rppg_signal
+from modules.rppg import FACE_REGIONS, MultiRegionEngine, RPPGEngine, batch_roi_means
+from PosturaZen.utils.hrv import HRVEstimatorLote
+
+
+def _cronometrar(nombre: str, funcion: Callable[[], object], frames: int) -> None:
+    inicio = time.perf_counter()
+    funcion()
+    total = time.perf_counter() - inicio
+    print(f"{nombre:<42} {total * 1000:9.1f} ms  {total / frames * 1e6:8.1f} us/frame")
+
+
+# --- Implementaciones originales ---------------------------------------------
+
+
+class _PicosOriginal:
+    """``modules.hrv_rppg.HRVEstimator`` original."""
+
+    def __init__(self, fps: int = 30) -> None:
+        self.fps = fps
+        self.signal: Deque[float] = deque(maxlen=300)
+
+    def update(self, frame: np.ndarray, landmarks: Sequence[Any]) -> None:
+        if len(landmarks) <= 10:
+            return
+        h, w = frame.shape[:2]
+        x, y = float(landmarks[10][0]), float(landmarks[10][1])
+        cx, cy = int(x * w), int(y * h)
+        size = 10
+        x1, x2 = max(cx - size, 0), min(cx + size, w)
+        y1, y2 = max(cy - size, 0), min(cy + size, h)
+        roi = frame[y1:y2, x1:x2]
+        if roi.size == 0:
+            return
+        green = roi[:, :, 1].astype(np.float32)
+        self.signal.append(float(np.mean(green)))
+
+    def compute(self) -> Dict[str, float]:
+        if len(self.signal) < self.fps * 2:
+            return {"bpm": 0.0, "hrv": 0.0}
+        sig = np.array(self.signal, dtype=np.float32)
+        sig = sig - np.mean(sig)
+        fs = self.fps
+        b, a = butter(2, [0.7 / (fs / 2), 4 / (fs / 2)], btype="band")
+        filtered = filtfilt(b, a, sig)
+        peaks, _ = find_peaks(filtered, distance=int(fs * 0.25))
+        if len(peaks) < 2:
+            return {"bpm": 0.0, "hrv": 0.0}
+        rr = np.diff(peaks) / fs
+        diff_rr = np.diff(rr)
+        return {"bpm": float(60.0 / np.mean(rr)), "hrv": float(np.sqrt(np.mean(diff_rr ** 2)) * 1000.0)}
+
+
+class _SnrOriginal:
+    """``PosturaZen.utils.hrv.HRVEstimatorLote`` original (con marcas de tiempo dadas)."""
+
+    def __init__(self, fps: int = 30) -> None:
+        self.fps = fps
+        self.signal: Deque[float] = deque(maxlen=fps * 30)
+        self.timestamps: Deque[float] = deque(maxlen=fps * 30)
+
+    def update(self, roi: np.ndarray, t: float) -> Optional[float]:
+        green = roi[:, :, 1].astype("float32")
+        self.signal.append(float(np.mean(green)))
+        self.timestamps.append(t)
+        if len(self.signal) < self.fps * 5:
+            return None
+        sig = np.array(self.signal, dtype="float32")
+        fs = 1.0 / np.mean(np.diff(np.array(self.timestamps)))
+        b, a = butter(1, [0.7 / (fs / 2), 4 / (fs / 2)], btype="band")
+        filtered = filtfilt(b, a, sig)
+        f, pxx = periodogram(filtered, fs)
+        if pxx.size == 0:
+            return None
+        if 10 * np.log10(np.max(pxx) / (np.mean(pxx) + 1e-8)) < 15:
+            return None
+        return float(np.sqrt(np.mean(np.diff(filtered) ** 2)))
+
+
+def _extract_original(frames: Sequence[np.ndarray], landmarks: Sequence[Sequence[Any]], fps: int = 30) -> Dict[str, float]:
+    """``modules.posture_analysis.extract_rppg_signal`` original."""
+    vals: List[float] = []
+    for frame, lms in zip(frames, landmarks):
+        if len(lms) <= 10:
+            continue
+        h, w = frame.shape[:2]
+        x, y = int(lms[10][0] * w), int(lms[10][1] * h)
+        roi = frame[max(y - 10, 0) : min(y + 10, h), max(x - 10, 0) : min(x + 10, w)]
+        if roi.size == 0:
+            continue
+        vals.append(float(np.mean(roi[:, :, 1])))
+    if len(vals) < fps:
+        return {"bpm": 0.0, "hrv": 0.0}
+    sig = np.array(vals, dtype=np.float32)
+    sig = sig - np.mean(sig)
+    freqs = np.fft.rfftfreq(len(sig), d=1.0 / fps)
+    fft = np.abs(np.fft.rfft(sig))
+    idx = np.where((freqs >= 0.75) & (freqs <= 3.0))[0]
+    bpm = float(freqs[idx[np.argmax(fft[idx])]] * 60.0) if idx.size else 0.0
+    diff = np.diff(sig)
+    return {"bpm": bpm, "hrv": float(np.sqrt(np.mean(diff ** 2))) if diff.size > 0 else 0.0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=900)
+    parser.add_argument("--alto", type=int, default=480)
+    parser.add_argument("--ancho", type=int, default=640)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 255, (args.frames, args.alto, args.ancho, 3), dtype=np.uint8)
+    centros = 0.4 + 0.2 * rng.random((args.frames, 2))
+    landmarks = [[(0.0, 0.0)] * 10 + [tuple(c)] for c in centros]
+    # Malla de 468 puntos con cada region como un anillo alrededor de su centro
+    malla = np.zeros((468, 2))
+    for (dx, dy), indices in zip([(0.0, -0.1), (-0.06, 0.0), (0.06, 0.0)], FACE_REGIONS.values()):
+        a = np.linspace(0, 2 * np.pi, len(indices), endpoint=False)
+        malla[list(indices)] = np.c_[dx + 0.04 * np.cos(a), dy + 0.05 * np.sin(a)]
+    mallas = [malla + c + rng.normal(0, 0.3 / args.ancho, malla.shape) for c in 0.45 + 0.02 * rng.random((args.frames, 2))]
+
+    def picos(clase: Callable[..., Any]) -> Callable[[], None]:
+        def correr() -> None:
+            est = clase(fps=30)
+            for frame, lms in zip(frames, landmarks):
+                est.update(frame, lms)
+                est.compute()
+
+        return correr
+
+    def snr(clase: Callable[..., Any]) -> Callable[[], None]:
+        def correr() -> None:
+            est = clase(fps=30)
+            h, w = frames.shape[1:3]
+            for k, (frame, (x, y)) in enumerate(zip(frames, centros)):
+                cx, cy = int(x * w), int(y * h)
+                est.update(frame[cy - 40 : cy + 40, cx - 40 : cx + 40], k / 30)
+
+        return correr
+
+    def multi_region() -> None:
+        est = MultiRegionEngine(window=300)
+        for frame, lms in zip(frames, mallas):
+            est.update(frame, lms)
+
+    def motor(metodo: str) -> Callable[[], None]:
+        return lambda: RPPGEngine(metodo, "spectral", window=args.frames).process_batch(frames, centros)
+
+    print(f"{args.frames} frames de {args.ancho}x{args.alto}")
+    _cronometrar("original: hrv_rppg (picos, por frame)", picos(_PicosOriginal), args.frames)
+    _cronometrar("actual:   hrv_rppg (picos, por frame)", picos(HRVEstimator), args.frames)
+    _cronometrar("original: HRVEstimatorLote (SNR)", snr(_SnrOriginal), args.frames)
+    _cronometrar("actual:   HRVEstimatorLote (SNR)", snr(HRVEstimatorLote), args.frames)
+    _cronometrar("original: extract_rppg_signal", lambda: _extract_original(frames, landmarks), args.frames)
+    _cronometrar("actual:   extract_rppg_signal", lambda: extract_rppg_signal(frames, landmarks), args.frames)
+    _cronometrar("motor: 3 regiones (por frame)", multi_region, args.frames)
+    _cronometrar("motor: solo ROI", lambda: batch_roi_means(frames, centros), args.frames)
+    for metodo in ("green", "chrom", "pos"):
+        _cronometrar(f"motor: process_batch {metodo}", motor(metodo), args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Consulta de resumenes frente a recorrer los frames crudos del almacen.
+
+Escribe ``--dias`` dias de ``--horas`` horas de frames a 30 fps con
+:class:`EscritorSeries` y mide las consultas por minuto, hora y dia sobre
+todo el rango, comparadas con mapear y resumir los frames crudos.
+
+Uso::
+
+    python -m benchmarks.bench_series --dias 21 --horas 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from PosturaZen.utils.series import FRAME_DTYPE, EscritorSeries, LectorSeries, resumir
+from PosturaZen.utils.tramas import ESTABLE, MALA_POSTURA, PERSONA
+
+
+def _minuto(rng: np.random.Generator, inicio: float, fps: int) -> np.ndarray:
+    n = 60 * fps
+    frames = np.zeros(n, FRAME_DTYPE)
+    frames["t"] = inicio + np.arange(n) / fps
+    frames["angulo_cuello"] = rng.normal(150.0, 5.0, n)
+    frames["angulo_cadera"] = rng.normal(170.0, 5.0, n)
+    frames["centro_x"] = rng.normal(0.5, 0.02, n)
+    frames["hrv"] = np.where(np.arange(n) % fps == 0, rng.normal(45.0, 8.0, n), np.nan)
+    frames["banderas"] = PERSONA | ESTABLE | np.where(rng.random(n) < 0.3, MALA_POSTURA, 0)
+    return frames
+
+
+def _cronometrar(nombre: str, funcion, repeticiones: int = 5) -> None:
+    funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    ms = (time.perf_counter() - inicio) / repeticiones * 1000.0
+    print(f"{nombre:<30} {ms:10.2f} ms  ({len(resultado)} filas)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dias", type=int, default=21)
+    parser.add_argument("--horas", type=int, default=8, help="horas de uso por dia")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    raiz = tempfile.mkdtemp(prefix="posturazen-series-")
+    try:
+        rng = np.random.default_rng(0)
+        escritor = EscritorSeries(raiz, "bench")
+        origen = time.mktime((2026, 1, 5, 9, 0, 0, 0, 0, -1))
+        inicio = time.perf_counter()
+        for dia in range(args.dias):
+            for minuto in range(args.horas * 60):
+                escritor.agregar(_minuto(rng, origen + dia * 86400 + minuto * 60, args.fps))
+        escritor.cerrar()
+        t_escritura = time.perf_counter() - inicio
+        print(f"frames escritos: {escritor.frames}  ({escritor.frames / t_escritura / 1e6:.1f} M frames/s)")
+
+        lector = LectorSeries(raiz)
+        desde, hasta = origen - 86400, origen + (args.dias + 1) * 86400
+        _cronometrar("resumen por dia", lambda: lector.resumen("bench", desde, hasta, "dia"))
+        _cronometrar("resumen por hora", lambda: lector.resumen("bench", desde, hasta, "hora"))
+        _cronometrar("resumen por minuto", lambda: lector.resumen("bench", desde, hasta, "minuto"))
+        _cronometrar("minutos de un dia", lambda: lector.resumen("bench", origen, origen + 86400, "minuto"))
+        _cronometrar("frames crudos -> horas", lambda: resumir(lector.frames("bench", desde, hasta), 3600.0), 1)
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,30 @@
 """Example usage of the HRVEstimator using MediaPipe Face Mesh."""
 
+import sys
+import time
+
 import cv2
 import mediapipe as mp
+import numpy as np
 
 from modules.hrv_rppg import HRVEstimator
+from modules.posture_analysis import OverlayRenderer, display_available
+from modules.rppg import FACE_REGIONS
+from PosturaZen.deteccion.preproceso import Preprocesador
 
 
-def main() -> None:
-    cap = cv2.VideoCapture(0)
+def main(fuente=0) -> None:
+    cap = cv2.VideoCapture(fuente)
     face_mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1)
-    estimator = HRVEstimator(fps=30)
+    # Frente y mejillas combinadas segun la calidad de su señal
+    estimator = HRVEstimator(fps=30, regions=FACE_REGIONS)
+    # La vista previa se dibuja aparte y solo si hay pantalla; el rPPG lee el frame intacto
+    renderer = OverlayRenderer(scale=0.5)
+    # FaceMesh recibe un lienzo reducido ya en RGB en lugar del frame completo;
+    # sin recorte, para no mover el sistema de coordenadas de su seguimiento
+    entrada = Preprocesador(lado=480, recorte=False, rgb=True)
+    if display_available():
+        renderer.attach()
     frame_count = 0
     bpm = 0.0
     hrv = 0.0
@@ -18,13 +33,18 @@ def main() -> None:
         ret, frame = cap.read()
         if not ret:
             break
+        # Instante de captura: posicion en el video o reloj monotono en vivo
+        if isinstance(fuente, str):
+            t_captura = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        else:
+            t_captura = time.perf_counter()
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb, transformacion = entrada.preparar(frame)
         results = face_mesh.process(rgb)
-        landmarks = []
         if results.multi_face_landmarks:
-            landmarks = results.multi_face_landmarks[0].landmark
-            estimator.update(frame, landmarks)
+            malla = np.array([(p.x, p.y) for p in results.multi_face_landmarks[0].landmark], dtype=np.float32)
+            landmarks = entrada.restaurar(malla, transformacion)
+            estimator.update(frame, landmarks, t_captura)
 
         if frame_count % 30 == 0:
             data = estimator.compute()
@@ -35,8 +55,9 @@ def main() -> None:
         if hrv > 0:
             estado = "estresado" if hrv < 25 else "relajado"
             text = f"BPM: {bpm:.1f} | HRV: {hrv:.1f} ms ({estado})"
-        cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.imshow("HRV", frame)
+        preview = renderer.render(frame, lines=[text])
+        if preview is not None:
+            cv2.imshow("HRV", preview)
 
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
@@ -48,5 +69,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    # Opcionalmente se puede pasar un video grabado en lugar de la camara
+    main(sys.argv[1] if len(sys.argv) > 1 else 0)
 
@@ -2,71 +2,70 @@
 
 This module uses a simple green channel approach over the
 forehead region to compute heart rate variability (HRV)
-and beats per minute (BPM) from a video stream.
+and beats per minute (BPM) from a video stream. Optionally
+the forehead and both cheeks are sampled and combined by
+their pulse SNR.
 """
 
 from __future__ import annotations
 
 from collections import deque
-from typing import Any, Sequence, Deque, Dict
+from typing import Any, Sequence, Deque, Dict, Optional
 
-import cv2
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks
 
+from modules.rppg import MultiRegionEngine, landmark_array, peak_estimate, resample_uniform, roi_mean
 
-Point = Sequence[float]
 
+class HRVEstimator:
+    """Estimates BPM and HRV (RMSSD) from face video frames.
 
-def _to_point(landmark: Any) -> Point:
-    """Converts a flexible landmark object to an ``(x, y)`` tuple."""
-    if hasattr(landmark, "x") and hasattr(landmark, "y"):
-        return float(landmark.x), float(landmark.y)
-    return float(landmark[0]), float(landmark[1])
-
+    When :meth:`update` receives capture timestamps, the signal is resampled
+    onto a uniform ``fps`` grid before estimating, so a frame rate that drops
+    or jitters under load does not bias BPM and RMSSD.
 
-class HRVEstimator:
-    """Estimates BPM and HRV (RMSSD) from face video frames."""
+    Args:
+        fps: Nominal frame rate of the video stream (resampling rate).
+        regions: Face-mesh polygons (e.g. ``modules.rppg.FACE_REGIONS``) to
+            sample instead of the single 20x20 patch around landmark 10.
+    """
 
-    def __init__(self, fps: int = 30) -> None:
+    def __init__(self, fps: int = 30, regions: Optional[Dict[str, Sequence[int]]] = None) -> None:
         self.fps = fps
         self.signal: Deque[float] = deque(maxlen=300)
-
-    def update(self, frame: np.ndarray, landmarks: Sequence[Any]) -> None:
-        """Update the internal green channel signal with the forehead ROI."""
-        if len(landmarks) <= 10:
+        self.timestamps: Deque[float] = deque(maxlen=300)
+        self.engine: Optional[MultiRegionEngine] = None
+        if regions is not None:
+            self.engine = MultiRegionEngine(regions, "green", "peaks", fps, window=300)
+
+    def update(self, frame: np.ndarray, landmarks: Sequence[Any], timestamp: Optional[float] = None) -> None:
+        """Update the internal green channel signal with the forehead ROI.
+
+        ``timestamp`` is the capture time in seconds; pass it for every frame
+        or for none (mixing them raises ``ValueError``).
+        """
+        if self.engine is not None:
+            self.engine.update(frame, landmarks, timestamp)
+            return
+        center = landmark_array(landmarks, 10)
+        if center is None:
             return
-        h, w = frame.shape[:2]
-        x, y = _to_point(landmarks[10])
-        cx, cy = int(x * w), int(y * h)
-        size = 10
-        x1, x2 = max(cx - size, 0), min(cx + size, w)
-        y1, y2 = max(cy - size, 0), min(cy + size, h)
-        roi = frame[y1:y2, x1:x2]
-        if roi.size == 0:
+        mean = roi_mean(frame, center, size=10)
+        if mean is None:
             return
-        green = roi[:, :, 1].astype(np.float32)
-        mean_val = float(np.mean(green))
-        self.signal.append(mean_val)
+        if self.signal and (timestamp is None) != (not self.timestamps):
+            raise ValueError("Capture timestamps must be given for every frame or for none")
+        self.signal.append(float(mean[1]))
+        if timestamp is not None:
+            self.timestamps.append(float(timestamp))
 
     def compute(self) -> Dict[str, float]:
         """Compute BPM and HRV from the stored signal."""
+        if self.engine is not None:
+            return self.engine.compute()
         if len(self.signal) < self.fps * 2:
             return {"bpm": 0.0, "hrv": 0.0}
-
         sig = np.array(self.signal, dtype=np.float32)
-        sig = sig - np.mean(sig)
-        fs = self.fps
-        b, a = butter(2, [0.7 / (fs / 2), 4 / (fs / 2)], btype="band")
-        filtered = filtfilt(b, a, sig)
-
-        peaks, _ = find_peaks(filtered, distance=int(fs * 0.25))
-        if len(peaks) < 2:
-            return {"bpm": 0.0, "hrv": 0.0}
-
-        rr = np.diff(peaks) / fs
-        bpm = 60.0 / np.mean(rr)
-        diff_rr = np.diff(rr)
-        rmssd = np.sqrt(np.mean(diff_rr ** 2)) * 1000.0  # ms
-        return {"bpm": float(bpm), "hrv": float(rmssd)}
-
+        if len(self.timestamps) == len(sig):
+            sig = resample_uniform(self.timestamps, sig, self.fps)
+        return peak_estimate(sig, self.fps)
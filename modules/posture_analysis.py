@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable, Sequence, Dict, Any, List
+import os
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Sequence, Dict, Any, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
+from modules.rppg import landmark_array, roi_mean, spectral_estimate
+
 
 # Tipo generico para un punto (x, y)
 Point = Sequence[float]
@@ -20,56 +25,228 @@ def _to_point(landmark: Any) -> Point:
     return float(landmark[0]), float(landmark[1])
 
 
-def calculate_head_inclination(frame, landmarks) -> float:
-    """Calcular la inclinación de la cabeza y dibujar la visualización.
+# Distancia interpupilar media de un adulto
+KNOWN_EYE_DISTANCE_CM = 6.3
+
+
+@dataclass
+class HeadInclination:
+    """Inclinacion de la cabeza respecto a la vertical.
+
+    ``forehead`` y ``chin`` son coordenadas normalizadas a ``[0, 1]``.
+    """
+
+    angle: float
+    status: str
+    forehead: Tuple[float, float]
+    chin: Tuple[float, float]
+
+
+@dataclass
+class UserDistance:
+    """Distancia estimada a la camara y ojos usados (normalizados)."""
+
+    distance_cm: float
+    left_eye: Tuple[float, float]
+    right_eye: Tuple[float, float]
+
+
+def inclination_status(angle: float) -> str:
+    abs_angle = abs(angle)
+    if abs_angle <= 5:
+        return "Correcto"
+    if abs_angle <= 15:
+        return "Leve inclinación"
+    return "Incorrecto"
+
+
+def measure_head_inclination(landmarks, width: int, height: int) -> Optional[HeadInclination]:
+    """Medir la inclinación de la cabeza sin tocar el frame.
 
     Args:
-        frame: Imagen BGR del frame actual.
-        landmarks: Lista o secuencia de landmarks faciales.
+        landmarks: Lista o secuencia de landmarks faciales (468 puntos).
+        width: Ancho del frame en píxeles.
+        height: Alto del frame en píxeles.
 
     Returns:
-        Ángulo de inclinación respecto a la vertical en grados.
+        La medición, o ``None`` si faltan landmarks.
     """
     if len(landmarks) <= 152:
-        return 0.0
-
-    h, w = frame.shape[:2]
+        return None
     forehead = _to_point(landmarks[10])
     chin = _to_point(landmarks[152])
-    p1 = (int(forehead[0] * w), int(forehead[1] * h))
-    p2 = (int(chin[0] * w), int(chin[1] * h))
+    dx = (chin[0] - forehead[0]) * width
+    dy = (chin[1] - forehead[1]) * height
+    angle = math.degrees(math.atan2(dx, dy))
+    return HeadInclination(angle, inclination_status(angle), forehead, chin)
 
-    cv2.line(frame, p1, p2, (0, 255, 0), 2)
-    cv2.circle(frame, p1, 4, (0, 0, 255), -1)
-    cv2.circle(frame, p2, 4, (0, 0, 255), -1)
 
-    dx = p2[0] - p1[0]
-    dy = p2[1] - p1[1]
-    angle = math.degrees(math.atan2(dx, dy))
-    abs_angle = abs(angle)
+def measure_user_distance(
+    landmarks, width: int, height: int, focal_length_pixels: float = 800.0
+) -> Optional[UserDistance]:
+    """Estimar la distancia del usuario a la cámara sin tocar el frame.
+
+    Args:
+        landmarks: Landmarks faciales detectados.
+        width: Ancho del frame en píxeles.
+        height: Alto del frame en píxeles.
+        focal_length_pixels: Focal estimada de la cámara en píxeles.
+
+    Returns:
+        La medición en centímetros, o ``None`` si faltan landmarks.
+    """
+    if len(landmarks) <= 263:
+        return None
+    left_eye = _to_point(landmarks[33])
+    right_eye = _to_point(landmarks[263])
+    measured = math.hypot((right_eye[0] - left_eye[0]) * width, (right_eye[1] - left_eye[1]) * height)
+    distance_cm = (KNOWN_EYE_DISTANCE_CM * focal_length_pixels) / max(measured, 1e-6)
+    return UserDistance(float(distance_cm), left_eye, right_eye)
 
-    if abs_angle <= 5:
-        estado = "Correcto"
-    elif abs_angle <= 15:
-        estado = "Leve inclinación"
-    else:
-        estado = "Incorrecto"
-
-    cv2.putText(
-        frame,
-        f"Inclinación: {angle:.1f}° {estado}",
-        (10, 30),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.7,
-        (0, 255, 0),
-        2,
-    )
-    return float(angle)
+
+def measure_head_inclination_batch(landmarks: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Inclinación de varios conjuntos de landmarks ``(N, 468, 2)`` en grados."""
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    delta = (landmarks[:, 152] - landmarks[:, 10]) * (width, height)
+    return np.degrees(np.arctan2(delta[:, 0], delta[:, 1]))
+
+
+def measure_user_distance_batch(
+    landmarks: np.ndarray, width: int, height: int, focal_length_pixels: float = 800.0
+) -> np.ndarray:
+    """Distancia en centímetros de varios conjuntos de landmarks ``(N, 468, 2)``."""
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    measured = np.hypot(*((landmarks[:, 263] - landmarks[:, 33]) * (width, height)).T)
+    return KNOWN_EYE_DISTANCE_CM * focal_length_pixels / np.maximum(measured, 1e-6)
+
+
+def _inclination_text(m: HeadInclination) -> str:
+    return f"Inclinación: {m.angle:.1f}° {m.status}"
+
+
+def _distance_text(m: UserDistance) -> str:
+    return f"Distancia estimada: {m.distance_cm:.1f} cm"
+
+
+_GREEN = (0, 255, 0)
+_RED = (0, 0, 255)
+_WHITE = (255, 255, 255)
+
+
+class OverlayRenderer:
+    """Dibuja las mediciones sobre una copia reducida del frame.
+
+    El análisis nunca dibuja: las mediciones se calculan con las funciones
+    ``measure_*`` y este renderizador las pinta solo si hay una ventana o un
+    flujo de vista previa conectado (:meth:`attach`). El frame original no
+    se modifica; se reduce a ``scale`` dentro de un buffer que se reutiliza
+    entre llamadas, y una sola llamada puede pintar muchas mediciones (varias
+    personas o estaciones).
+
+    Args:
+        scale: Factor de reducción de la vista previa.
+        font_scale: Tamaño del texto en la vista previa.
+    """
+
+    def __init__(self, scale: float = 0.5, font_scale: float = 0.5) -> None:
+        self.scale = scale
+        self.font_scale = font_scale
+        self.attached = 0
+        self.rendered = 0
+        self._buffer: Optional[np.ndarray] = None
+
+    @property
+    def active(self) -> bool:
+        return self.attached > 0
+
+    def attach(self) -> None:
+        """Registra un consumidor de la vista previa (ventana, stream...)."""
+        self.attached += 1
+
+    def detach(self) -> None:
+        self.attached = max(self.attached - 1, 0)
+
+    def render(
+        self,
+        frame: np.ndarray,
+        inclinations: Sequence[HeadInclination] = (),
+        distances: Sequence[UserDistance] = (),
+        lines: Sequence[str] = (),
+    ) -> Optional[np.ndarray]:
+        """Devuelve la vista previa con las mediciones, o ``None`` si nadie la ve.
+
+        El arreglo devuelto es el buffer interno: se sobrescribe en la
+        siguiente llamada.
+        """
+        if not self.active:
+            return None
+        h, w = frame.shape[:2]
+        out_w, out_h = max(int(w * self.scale), 1), max(int(h * self.scale), 1)
+        if self._buffer is None or self._buffer.shape != (out_h, out_w) + frame.shape[2:]:
+            self._buffer = np.empty((out_h, out_w) + frame.shape[2:], dtype=frame.dtype)
+        canvas = self._buffer
+        if (out_w, out_h) == (w, h):
+            np.copyto(canvas, frame)
+        else:
+            cv2.resize(frame, (out_w, out_h), dst=canvas, interpolation=cv2.INTER_AREA)
+
+        if inclinations:
+            segments = np.array([[m.forehead, m.chin] for m in inclinations]) * (out_w, out_h)
+            segments = segments.round().astype(np.int32)
+            cv2.polylines(canvas, list(segments), False, _GREEN, 1)
+            for x, y in segments.reshape(-1, 2):
+                cv2.circle(canvas, (int(x), int(y)), 2, _RED, -1)
+
+        texts = [(_inclination_text(m), _GREEN) for m in inclinations]
+        texts += [(_distance_text(m), _WHITE) for m in distances]
+        texts += [(text, _GREEN) for text in lines]
+        step = int(30 * self.font_scale / 0.7) or 1
+        for i, (text, color) in enumerate(texts):
+            cv2.putText(canvas, text, (5, step * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, color, 1)
+        self.rendered += 1
+        return canvas
+
+
+def display_available() -> bool:
+    """Indica si hay una pantalla donde abrir ventanas de OpenCV."""
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def calculate_head_inclination(frame, landmarks) -> float:
+    """Calcular la inclinación de la cabeza y dibujar la visualización.
+
+    Compatibilidad: mide con :func:`measure_head_inclination` y dibuja sobre
+    ``frame``. Para analizar sin dibujar usar esa función y, para mostrar el
+    resultado, :class:`OverlayRenderer`.
+
+    Args:
+        frame: Imagen BGR del frame actual.
+        landmarks: Lista o secuencia de landmarks faciales.
+
+    Returns:
+        Ángulo de inclinación respecto a la vertical en grados.
+    """
+    h, w = frame.shape[:2]
+    m = measure_head_inclination(landmarks, w, h)
+    if m is None:
+        return 0.0
+    p1 = (int(m.forehead[0] * w), int(m.forehead[1] * h))
+    p2 = (int(m.chin[0] * w), int(m.chin[1] * h))
+    cv2.line(frame, p1, p2, _GREEN, 2)
+    cv2.circle(frame, p1, 4, _RED, -1)
+    cv2.circle(frame, p2, 4, _RED, -1)
+    cv2.putText(frame, _inclination_text(m), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, _GREEN, 2)
+    return float(m.angle)
 
 
 def estimate_user_distance(frame, landmarks, focal_length_pixels: float = 800.0) -> float:
     """Estimar la distancia del usuario a la cámara en centímetros.
 
+    Compatibilidad: mide con :func:`measure_user_distance` y dibuja el texto
+    sobre ``frame``.
+
     Args:
         frame: Frame actual en formato BGR.
         landmarks: Landmarks faciales detectados.
@@ -78,29 +255,12 @@ def estimate_user_distance(frame, landmarks, focal_length_pixels: float = 800.0)
     Returns:
         Distancia estimada en centímetros.
     """
-    if len(landmarks) <= 263:
-        return 0.0
-
     h, w = frame.shape[:2]
-    left_eye = _to_point(landmarks[33])
-    right_eye = _to_point(landmarks[263])
-    p1 = (int(left_eye[0] * w), int(left_eye[1] * h))
-    p2 = (int(right_eye[0] * w), int(right_eye[1] * h))
-
-    measured = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
-    known_eye_distance_cm = 6.3
-    distance_cm = (known_eye_distance_cm * focal_length_pixels) / max(measured, 1e-6)
-
-    cv2.putText(
-        frame,
-        f"Distancia estimada: {distance_cm:.1f} cm",
-        (10, 60),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.7,
-        (255, 255, 255),
-        2,
-    )
-    return float(distance_cm)
+    m = measure_user_distance(landmarks, w, h, focal_length_pixels)
+    if m is None:
+        return 0.0
+    cv2.putText(frame, _distance_text(m), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, _WHITE, 2)
+    return m.distance_cm
 
 
 def is_posture_stable(past_landmarks: Iterable[Sequence[Any]], current_landmarks: Sequence[Any], threshold: float = 5) -> bool:
@@ -127,6 +287,155 @@ def is_posture_stable(past_landmarks: Iterable[Sequence[Any]], current_landmarks
     return True
 
 
+class _SlidingExtrema:
+    """Minimo y maximo de una ventana deslizante en O(1) amortizado.
+
+    Implementa una cola con dos pilas sobre arreglos NumPy preasignados. La
+    pila trasera mantiene su minimo/maximo acumulado al insertar; cuando la
+    delantera se vacia, se rellena de una vez con ``np.minimum.accumulate``,
+    de modo que cada elemento se procesa un numero constante de veces.
+    """
+
+    def __init__(self, capacity: int, shape: tuple = ()) -> None:
+        self.capacity = capacity
+        self._back = np.empty((capacity,) + shape)
+        self._back_len = 0
+        self._back_min = np.full(shape, np.inf)
+        self._back_max = np.full(shape, -np.inf)
+        self._front_min = np.empty((capacity,) + shape)
+        self._front_max = np.empty((capacity,) + shape)
+        self._front_len = 0
+
+    def __len__(self) -> int:
+        return self._back_len + self._front_len
+
+    def clear(self) -> None:
+        self._back_len = 0
+        self._front_len = 0
+        self._back_min.fill(np.inf)
+        self._back_max.fill(-np.inf)
+
+    def push(self, value: Any) -> None:
+        if len(self) == self.capacity:
+            self._pop()
+        self._back[self._back_len] = value
+        self._back_len += 1
+        np.minimum(self._back_min, value, out=self._back_min)
+        np.maximum(self._back_max, value, out=self._back_max)
+
+    def _pop(self) -> None:
+        if self._front_len == 0:
+            # El elemento mas nuevo queda en el fondo y el mas antiguo arriba
+            items = self._back[self._back_len - 1 :: -1]
+            n = self._back_len
+            np.minimum.accumulate(items, axis=0, out=self._front_min[:n])
+            np.maximum.accumulate(items, axis=0, out=self._front_max[:n])
+            self._front_len = n
+            self._back_len = 0
+            self._back_min.fill(np.inf)
+            self._back_max.fill(-np.inf)
+        self._front_len -= 1
+
+    def minimum(self) -> np.ndarray:
+        if self._front_len == 0:
+            return self._back_min
+        return np.minimum(self._front_min[self._front_len - 1], self._back_min)
+
+    def maximum(self) -> np.ndarray:
+        if self._front_len == 0:
+            return self._back_max
+        return np.maximum(self._front_max[self._front_len - 1], self._back_max)
+
+
+class StabilityTracker:
+    """Version incremental de :func:`is_posture_stable` sobre todos los puntos.
+
+    Guarda los ultimos ``window + 1`` marcos en un arreglo NumPy circular y
+    mantiene, con costo constante por frame, el maximo desplazamiento entre
+    frames consecutivos y la caja envolvente de cada punto dentro de la
+    ventana. El costo de :meth:`update` no depende del tamaño de la ventana.
+
+    Args:
+        window: Numero de desplazamientos consecutivos evaluados (equivale a
+            la longitud del historial usado con ``is_posture_stable``).
+        num_points: Puntos por marco.
+        threshold: Desplazamiento maximo permitido entre frames consecutivos.
+        max_extent: Si se indica, tambien exige que cada punto se mantenga en
+            una caja de este lado durante toda la ventana.
+    """
+
+    def __init__(
+        self,
+        window: int = 10,
+        num_points: int = 1,
+        threshold: float = 5,
+        max_extent: Optional[float] = None,
+    ) -> None:
+        self.window = window
+        self.num_points = num_points
+        self.threshold = threshold
+        self.max_extent = max_extent
+        self._history = np.zeros((window + 1, num_points, 2))
+        self._count = 0
+        self._steps = _SlidingExtrema(window)
+        self._boxes = _SlidingExtrema(window + 1, (num_points, 2))
+
+    def reset(self) -> None:
+        self._count = 0
+        self._steps.clear()
+        self._boxes.clear()
+
+    def update(self, points: Sequence[Any]) -> bool:
+        """Agrega un marco y devuelve si la postura es estable.
+
+        Args:
+            points: ``num_points`` landmarks o pares ``(x, y)``.
+
+        Returns:
+            ``False`` mientras no haya historial previo, igual que
+            :func:`is_posture_stable`.
+        """
+        current = np.asarray([_to_point(p) for p in points], dtype=float)
+        if self._count:
+            previous = self._history[(self._count - 1) % len(self._history)]
+            step = float(np.max(np.hypot(*(current - previous).T)))
+            self._steps.push(step)
+        self._history[self._count % len(self._history)] = current
+        self._boxes.push(current)
+        self._count += 1
+        return self.is_stable()
+
+    def is_stable(self) -> bool:
+        if self._count < 2:
+            return False
+        if self.max_step > self.threshold:
+            return False
+        if self.max_extent is not None and float(np.max(self.extent)) > self.max_extent:
+            return False
+        return True
+
+    @property
+    def max_step(self) -> float:
+        """Mayor desplazamiento entre frames consecutivos de la ventana."""
+        return float(self._steps.maximum()) if len(self._steps) else 0.0
+
+    @property
+    def bounding_box(self) -> tuple:
+        """Minimos y maximos ``(num_points, 2)`` de cada punto en la ventana."""
+        return self._boxes.minimum().copy(), self._boxes.maximum().copy()
+
+    @property
+    def extent(self) -> np.ndarray:
+        """Ancho y alto de la caja envolvente de cada punto."""
+        return self._boxes.maximum() - self._boxes.minimum()
+
+    def history(self) -> np.ndarray:
+        """Marcos de la ventana, del mas antiguo al mas reciente."""
+        n = min(self._count, len(self._history))
+        idx = (np.arange(self._count - n, self._count)) % len(self._history)
+        return self._history[idx]
+
+
 def extract_rppg_signal(frames: Sequence[Any], landmarks: Sequence[Sequence[Any]], fps: int = 30) -> Dict[str, float]:
     """Extrae una señal rPPG básica para estimar BPM y HRV.
 
@@ -139,36 +448,13 @@ def extract_rppg_signal(frames: Sequence[Any], landmarks: Sequence[Sequence[Any]
         Diccionario con ``bpm`` y ``hrv`` aproximados.
     """
     vals: List[float] = []
+    # ROI por frame sobre la marcha: apilar el clip copiaria todos sus frames
     for frame, lms in zip(frames, landmarks):
-        if len(lms) <= 10:
-            continue
-        h, w = frame.shape[:2]
-        pt = _to_point(lms[10])
-        x = int(pt[0] * w)
-        y = int(pt[1] * h)
-        size = 10
-        x1, x2 = max(x - size, 0), min(x + size, w)
-        y1, y2 = max(y - size, 0), min(y + size, h)
-        roi = frame[y1:y2, x1:x2]
-        if roi.size == 0:
-            continue
-        vals.append(float(np.mean(roi[:, :, 1])))
+        centro = landmark_array(lms, 10)
+        media = roi_mean(frame, centro, size=10) if centro is not None else None
+        if media is not None:
+            vals.append(float(media[1]))
 
     if len(vals) < fps:
         return {"bpm": 0.0, "hrv": 0.0}
-
-    sig = np.array(vals, dtype=np.float32)
-    sig = sig - np.mean(sig)
-    freqs = np.fft.rfftfreq(len(sig), d=1.0 / fps)
-    fft = np.abs(np.fft.rfft(sig))
-    idx = np.where((freqs >= 0.75) & (freqs <= 3.0))[0]
-    if idx.size == 0:
-        bpm = 0.0
-    else:
-        peak = idx[np.argmax(fft[idx])]
-        bpm = float(freqs[peak] * 60.0)
-
-    diff = np.diff(sig)
-    hrv = float(np.sqrt(np.mean(diff ** 2))) if diff.size > 0 else 0.0
-
-    return {"bpm": bpm, "hrv": hrv}
+    return spectral_estimate(vals, fps)
@@ -0,0 +1,562 @@
+"""Unified rPPG engine shared by every HRV/BPM estimator in the repo.
+
+The engine is split in three pluggable steps:
+
+1. ROI extraction: mean BGR of a patch around a face landmark, frame by
+   frame (no copy of the clip is ever stacked), or of several face-mesh
+   polygons at once (:class:`MultiRegionExtractor`).
+2. Signal method: turns the colour traces into a pulse signal (``green``,
+   ``chrom`` or ``pos``).
+3. Estimator: derives BPM/HRV from the pulse signal (``peaks``,
+   ``spectral`` or ``snr_rmssd``), with sub-sample peak positions.
+
+Samples can carry capture timestamps; they are then resampled onto a
+uniform ``fps`` grid before steps 2 and 3, so frame drops and jitter do not
+bias BPM or HRV.
+
+``modules.hrv_rppg.HRVEstimator``, ``modules.posture_analysis.extract_rppg_signal``
+and ``PosturaZen.utils.hrv`` are thin wrappers around these functions.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from scipy.signal import butter, filtfilt, find_peaks, periodogram
+
+
+def _to_point(landmark: Any) -> Sequence[float]:
+    """Converts a flexible landmark object to an ``(x, y)`` tuple."""
+    if hasattr(landmark, "x") and hasattr(landmark, "y"):
+        return float(landmark.x), float(landmark.y)
+    return float(landmark[0]), float(landmark[1])
+
+
+def landmark_array(landmarks: Sequence[Any], index: int = 10) -> Optional[np.ndarray]:
+    """Returns landmark ``index`` as a ``(2,)`` array, or ``None`` if missing."""
+    if len(landmarks) <= index:
+        return None
+    return np.asarray(_to_point(landmarks[index]), dtype=np.float64)
+
+
+# ---------------------------------------------------------------------------
+# ROI extraction
+# ---------------------------------------------------------------------------
+
+
+def roi_mean(frame: np.ndarray, center: Sequence[float], size: int = 10) -> Optional[np.ndarray]:
+    """Mean BGR value of the ``2*size`` square around a normalized ``center``.
+
+    The square is clipped to the frame like the original per-estimator code;
+    ``None`` is returned when nothing of it falls inside the frame.
+    """
+    h, w = frame.shape[:2]
+    cx, cy = int(center[0] * w), int(center[1] * h)
+    x1, x2 = max(cx - size, 0), min(cx + size, w)
+    y1, y2 = max(cy - size, 0), min(cy + size, h)
+    roi = frame[y1:y2, x1:x2]
+    if roi.size == 0:
+        return None
+    # cv2.mean avoids the float copy of the patch; it reports up to 4 channels
+    return np.array(cv2.mean(roi)[: roi.shape[-1]], dtype=np.float32)
+
+
+def batch_roi_means(frames: Sequence[np.ndarray], centers: np.ndarray, size: int = 10) -> np.ndarray:
+    """:func:`roi_mean` over a sequence of frames.
+
+    The frames are visited one by one: the ROIs are tiny, so gathering them
+    from a stacked ``(T, H, W, C)`` copy of the clip costs far more than the
+    per-frame slicing it replaces, and frames of different sizes are fine.
+
+    Args:
+        frames: Sequence of ``(H, W, C)`` frames (a ``(T, H, W, C)`` array works too).
+        centers: ``(T, 2)`` normalized ``(x, y)`` centers; rows with NaN are
+            treated as missing.
+        size: Half side of the square ROI in pixels.
+
+    Returns:
+        ``(T, C)`` array of means; rows without a valid ROI are NaN.
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    means = []
+    for frame, center in zip(frames, centers):
+        mean = None if np.isnan(center).any() else roi_mean(frame, center, size)
+        means.append(np.full(frame.shape[2], np.nan, dtype=np.float32) if mean is None else mean)
+    if not means:
+        return np.empty((0, 3), dtype=np.float32)
+    return np.array(means)
+
+
+# MediaPipe face-mesh polygons with little hair, eye or mouth motion
+FACE_REGIONS: Dict[str, Tuple[int, ...]] = {
+    "forehead": (109, 10, 338, 337, 336, 9, 107, 108),
+    "left_cheek": (118, 119, 100, 126, 209, 49, 129, 203, 205, 50),
+    "right_cheek": (347, 348, 329, 355, 429, 279, 358, 423, 425, 280),
+}
+
+
+class MultiRegionExtractor:
+    """Mean BGR of several face-mesh polygons per frame in a single gather.
+
+    The polygons are rasterized into pixel offsets relative to the face's
+    top-left corner, and those offsets are reused while every vertex stays
+    within ``tolerance`` pixels of the shape they were rasterized from. While
+    the head keeps its size and pose, which is the common case at a desk, a
+    frame only costs the landmark lookup plus one ``np.take`` and one
+    ``np.add.reduceat`` over the region pixels. With ``step`` > 1 only one
+    pixel out of ``step x step`` is read; regions hold thousands of pixels,
+    so the mean barely changes while the gather shrinks accordingly.
+
+    Args:
+        regions: Region name -> face-mesh landmark indices of its polygon.
+        tolerance: Maximum vertex drift in pixels before re-rasterizing.
+        step: Pixel stride inside each region.
+    """
+
+    def __init__(
+        self,
+        regions: Dict[str, Sequence[int]] = FACE_REGIONS,
+        tolerance: float = 2.0,
+        step: int = 2,
+    ) -> None:
+        self.names = list(regions)
+        self.polygons = [np.asarray(regions[n], dtype=np.intp) for n in self.names]
+        self._vertices = np.concatenate(self.polygons)
+        self._max_index = int(self._vertices.max())
+        self._splits = np.cumsum([len(p) for p in self.polygons])[:-1]
+        self.tolerance = tolerance
+        self.step = step
+        self._shape: Optional[np.ndarray] = None
+        self._offsets: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] = ()  # type: ignore[assignment]
+        self._extent = (0, 0)
+        self._lin_width = 0
+        self._lin = np.empty(0, dtype=np.intp)
+        self.hits = 0
+        self.misses = 0
+
+    def _rasterize(self, rel: np.ndarray) -> None:
+        pts = np.round(rel).astype(np.int32)
+        h, w = int(pts[:, 1].max()) + 1, int(pts[:, 0].max()) + 1
+        canvas = np.zeros((h, w), dtype=np.uint8)
+        ys, xs, counts = [], [], []
+        for poly in np.split(pts, self._splits):
+            canvas[:] = 0
+            cv2.fillPoly(canvas, [poly], 1)
+            y, x = np.nonzero(canvas[:: self.step, :: self.step])
+            y, x = y * self.step, x * self.step
+            ys.append(y)
+            xs.append(x)
+            counts.append(len(y))
+        counts_arr = np.asarray(counts)
+        starts = np.concatenate(([0], np.cumsum(counts_arr)[:-1]))
+        self._offsets = (np.concatenate(ys), np.concatenate(xs), starts, counts_arr)
+        self._extent = (h, w)
+        self._lin_width = 0
+        self._shape = rel
+
+    def means(self, frame: np.ndarray, landmarks: Sequence[Any]) -> Optional[np.ndarray]:
+        """Returns the ``(regions, C)`` mean colours, or ``None`` without a face.
+
+        Regions that fall completely outside the frame are NaN.
+        """
+        if len(landmarks) <= self._max_index:
+            return None
+        h, w = frame.shape[:2]
+        if isinstance(landmarks, np.ndarray):
+            pts = landmarks[self._vertices, :2] * (w, h)
+        else:
+            pts = np.array([_to_point(landmarks[i]) for i in self._vertices]) * (w, h)
+        origin = pts.min(axis=0)
+        rel = pts - origin
+        if self._shape is not None and np.abs(rel - self._shape).max() <= self.tolerance:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._rasterize(rel)
+        ys, xs, starts, counts = self._offsets
+        ox, oy = int(round(origin[0])), int(round(origin[1]))
+
+        channels = frame.shape[2]
+        pixels = frame.reshape(-1, channels)
+        if ox >= 0 and oy >= 0 and oy + self._extent[0] <= h and ox + self._extent[1] <= w:
+            if self._lin_width != w:
+                self._lin = ys * w + xs
+                self._lin_width = w
+            gathered = np.take(pixels, self._lin + (oy * w + ox), axis=0)
+            sums = np.add.reduceat(gathered, starts, axis=0, dtype=np.float64)
+            return (sums / counts[:, None]).astype(np.float32)
+
+        # Face partly out of frame: only average the visible pixels
+        ys = ys + oy
+        xs = xs + ox
+        inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+        out = np.full((len(counts), channels), np.nan, dtype=np.float32)
+        region = np.repeat(np.arange(len(counts)), counts)[inside]
+        lin = ys[inside] * w + xs[inside]
+        visible = np.bincount(region, minlength=len(counts))
+        for c in range(channels):
+            sums = np.bincount(region, weights=pixels[lin, c], minlength=len(counts))
+            np.divide(sums, visible, out=out[:, c], where=visible > 0)
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Timestamps and sub-sample peaks
+# ---------------------------------------------------------------------------
+
+
+def resample_uniform(timestamps: Sequence[float], values: np.ndarray, fs: float) -> np.ndarray:
+    """Linearly resamples ``(T, ...)`` ``values`` onto a uniform ``fs`` grid.
+
+    The grid starts at the first timestamp (in seconds) and ends at or before
+    the last one. The interpolation indices and weights are computed once
+    and applied to every trailing column (channels, regions) together.
+    Repeated timestamps keep the first of their samples.
+    """
+    t = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values)
+    if len(t) < 2:
+        return values.astype(np.float64)
+    n = int(np.floor((t[-1] - t[0]) * fs + 1e-6)) + 1
+    grid = t[0] + np.arange(n) / fs
+    idx = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 2)
+    span = t[idx + 1] - t[idx]
+    frac = np.divide(grid - t[idx], span, out=np.zeros(n), where=span > 0)
+    frac = np.clip(frac, 0.0, 1.0).reshape((n,) + (1,) * (values.ndim - 1))
+    return values[idx] * (1.0 - frac) + values[idx + 1] * frac
+
+
+def parabolic_offset(y: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Offset in ``[-0.5, 0.5]`` samples of the vertex of the parabola through
+    each ``y[idx]`` and its two neighbours; ``0`` at the array edges."""
+    y = np.asarray(y, dtype=np.float64)
+    idx = np.asarray(idx, dtype=np.intp)
+    out = np.zeros(len(idx))
+    inner = (idx > 0) & (idx < len(y) - 1)
+    i = idx[inner]
+    a, b, c = y[i - 1], y[i], y[i + 1]
+    den = a - 2 * b + c
+    off = np.divide(0.5 * (a - c), den, out=np.zeros(len(i)), where=den != 0)
+    out[inner] = np.clip(off, -0.5, 0.5)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Signal methods: (T, 3) BGR traces -> (T,) pulse signal
+# ---------------------------------------------------------------------------
+
+
+def _bandpass(sig: np.ndarray, fs: float, low: float = 0.7, high: float = 4.0, order: int = 2) -> np.ndarray:
+    b, a = butter(order, [low / (fs / 2), high / (fs / 2)], btype="band")
+    return filtfilt(b, a, sig, axis=0)
+
+
+def green_signal(traces: np.ndarray, fs: float) -> np.ndarray:
+    """Raw green channel trace."""
+    return np.asarray(traces, dtype=np.float32)[:, 1]
+
+
+def chrom_signal(traces: np.ndarray, fs: float) -> np.ndarray:
+    """CHROM (de Haan & Jeanne, 2013) chrominance-based pulse signal."""
+    bgr = np.asarray(traces, dtype=np.float64)
+    norm = bgr / (bgr.mean(axis=0) + 1e-9)
+    b, g, r = norm[:, 0], norm[:, 1], norm[:, 2]
+    x = 3 * r - 2 * g
+    y = 1.5 * r + g - 1.5 * b
+    xf, yf = _bandpass(x, fs), _bandpass(y, fs)
+    alpha = np.std(xf) / (np.std(yf) + 1e-9)
+    return xf - alpha * yf
+
+
+def pos_signal(traces: np.ndarray, fs: float, window_s: float = 1.6) -> np.ndarray:
+    """POS (Wang et al., 2017) plane-orthogonal-to-skin pulse signal."""
+    rgb = np.asarray(traces, dtype=np.float64)[:, ::-1]
+    n = len(rgb)
+    l = min(int(window_s * fs), n)
+    if l < 2:
+        return np.zeros(n)
+    windows = np.lib.stride_tricks.sliding_window_view(rgb, l, axis=0)  # (n-l+1, 3, l)
+    cn = windows / (windows.mean(axis=2, keepdims=True) + 1e-9)
+    s0 = cn[:, 1] - cn[:, 2]
+    s1 = -2 * cn[:, 0] + cn[:, 1] + cn[:, 2]
+    h = s0 + (s0.std(axis=1, keepdims=True) / (s1.std(axis=1, keepdims=True) + 1e-9)) * s1
+    h -= h.mean(axis=1, keepdims=True)
+    # Overlap-add of every window onto the output signal
+    out = np.zeros(n)
+    starts = np.arange(n - l + 1)
+    np.add.at(out, starts[:, None] + np.arange(l), h)
+    return out
+
+
+SIGNAL_METHODS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "green": green_signal,
+    "chrom": chrom_signal,
+    "pos": pos_signal,
+}
+
+
+# ---------------------------------------------------------------------------
+# Estimators: pulse signal -> {"bpm", "hrv"}
+# ---------------------------------------------------------------------------
+
+
+def peak_estimate(sig: np.ndarray, fs: float) -> Dict[str, float]:
+    """BPM from mean RR interval and HRV as RMSSD (ms) of detected peaks.
+
+    Peak positions are refined by parabolic interpolation, so RR intervals
+    are not quantized to whole samples.
+    """
+    sig = np.asarray(sig, dtype=np.float32)
+    sig = sig - np.mean(sig)
+    b, a = butter(2, [0.7 / (fs / 2), 4 / (fs / 2)], btype="band")
+    filtered = filtfilt(b, a, sig)
+
+    peaks, _ = find_peaks(filtered, distance=int(fs * 0.25))
+    if len(peaks) < 2:
+        return {"bpm": 0.0, "hrv": 0.0}
+
+    rr = np.diff(peaks + parabolic_offset(filtered, peaks)) / fs
+    bpm = 60.0 / np.mean(rr)
+    diff_rr = np.diff(rr)
+    rmssd = np.sqrt(np.mean(diff_rr ** 2)) * 1000.0  # ms
+    return {"bpm": float(bpm), "hrv": float(rmssd)}
+
+
+def spectral_estimate(sig: np.ndarray, fs: float) -> Dict[str, float]:
+    """BPM from the FFT peak in 0.75-3 Hz and HRV as RMS of successive differences.
+
+    The peak frequency is refined by parabolic interpolation between bins.
+    """
+    sig = np.asarray(sig, dtype=np.float32)
+    sig = sig - np.mean(sig)
+    freqs = np.fft.rfftfreq(len(sig), d=1.0 / fs)
+    fft = np.abs(np.fft.rfft(sig))
+    idx = np.where((freqs >= 0.75) & (freqs <= 3.0))[0]
+    if idx.size == 0:
+        bpm = 0.0
+    else:
+        peak = idx[np.argmax(fft[idx])]
+        offset = parabolic_offset(fft, [peak])[0]
+        bpm = float((freqs[peak] + offset * fs / len(sig)) * 60.0)
+
+    diff = np.diff(sig)
+    hrv = float(np.sqrt(np.mean(diff ** 2))) if diff.size > 0 else 0.0
+    return {"bpm": bpm, "hrv": hrv}
+
+
+def snr_rmssd_estimate(sig: np.ndarray, fs: float, min_snr_db: float = 15.0) -> Dict[str, float]:
+    """RMSSD of the band-passed signal, gated by periodogram SNR.
+
+    ``hrv`` is ``0`` when the spectral SNR is below ``min_snr_db``; ``bpm``
+    is the periodogram peak frequency, refined between bins.
+    """
+    sig = np.asarray(sig, dtype="float32")
+    b, a = butter(1, [0.7 / (fs / 2), 4 / (fs / 2)], btype="band")
+    filtered = filtfilt(b, a, sig)
+    f, pxx = periodogram(filtered, fs)
+    if pxx.size == 0:
+        return {"bpm": 0.0, "hrv": 0.0, "snr": float("-inf")}
+    snr = float(10 * np.log10(np.max(pxx) / (np.mean(pxx) + 1e-8)))
+    if snr < min_snr_db:
+        return {"bpm": 0.0, "hrv": 0.0, "snr": snr}
+    diff = np.diff(filtered)
+    rmssd = np.sqrt(np.mean(diff ** 2))
+    peak = int(np.argmax(pxx))
+    bpm = (f[peak] + parabolic_offset(pxx, [peak])[0] * fs / len(filtered)) * 60.0
+    return {"bpm": float(bpm), "hrv": float(rmssd), "snr": snr}
+
+
+ESTIMATORS: Dict[str, Callable[[np.ndarray, float], Dict[str, float]]] = {
+    "peaks": peak_estimate,
+    "spectral": spectral_estimate,
+    "snr_rmssd": snr_rmssd_estimate,
+}
+
+
+def pulse_snr(sig: np.ndarray, fs: float, low: float = 0.7, high: float = 4.0, width: float = 0.15) -> float:
+    """Linear SNR of a pulse signal: power near the dominant in-band peak
+    and its first harmonic over the rest of the ``low``-``high`` band."""
+    sig = np.asarray(sig, dtype=np.float64)
+    if len(sig) < 2:
+        return 0.0
+    f, pxx = periodogram(sig - sig.mean(), fs)
+    band = (f >= low) & (f <= high)
+    if not band.any():
+        return 0.0
+    f0 = f[band][np.argmax(pxx[band])]
+    near = (np.abs(f - f0) <= width) | (np.abs(f - 2 * f0) <= width)
+    signal = pxx[band & near].sum()
+    noise = pxx[band & ~near].sum()
+    return float(signal / (noise + 1e-12))
+
+
+def combine_by_snr(signals: np.ndarray, fs: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Weighted sum of ``(regions, T)`` pulse signals by their :func:`pulse_snr`.
+
+    Each signal is normalized to unit variance first so that bright regions
+    do not dominate. Returns the combined signal and the weights.
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    snr = np.array([pulse_snr(s, fs) for s in signals])
+    weights = snr / snr.sum() if snr.sum() > 0 else np.full(len(signals), 1.0 / len(signals))
+    centered = signals - signals.mean(axis=1, keepdims=True)
+    norm = centered / (centered.std(axis=1, keepdims=True) + 1e-9)
+    return weights @ norm, weights
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+
+class _WindowedEngine:
+    """Sliding window of per-frame samples with optional capture timestamps.
+
+    Timestamps must be given for every sample or for none (mixing them raises
+    ``ValueError``, since the resampling would misalign the window); without
+    them the samples are assumed to be exactly ``1 / fps`` apart.
+    """
+
+    def __init__(self, method: str, estimator: str, fps: float, window: int) -> None:
+        self.signal_method = SIGNAL_METHODS[method]
+        self.estimator = ESTIMATORS[estimator]
+        self.fps = fps
+        self.traces: Deque[np.ndarray] = deque(maxlen=window)
+        self.timestamps: Deque[float] = deque(maxlen=window)
+
+    def _append(self, sample: np.ndarray, timestamp: Optional[float]) -> None:
+        # Both deques share maxlen, so an empty timestamp deque means an untimed window
+        if self.traces and (timestamp is None) != (not self.timestamps):
+            raise ValueError("Capture timestamps must be given for every sample or for none")
+        self.traces.append(sample)
+        if timestamp is not None:
+            self.timestamps.append(float(timestamp))
+
+    def uniform_traces(self) -> np.ndarray:
+        """Current window, resampled to ``fps`` when timestamps are known."""
+        traces = np.array(self.traces)
+        if len(self.timestamps) == len(self.traces) > 1:
+            return resample_uniform(self.timestamps, traces, self.fps)
+        return traces
+
+    def compute(self, min_samples: Optional[int] = None) -> Dict[str, float]:
+        """Estimates BPM/HRV from the current window."""
+        min_samples = int(self.fps * 2) if min_samples is None else min_samples
+        if len(self.traces) < min_samples:
+            return {"bpm": 0.0, "hrv": 0.0}
+        return self.estimator(self.signal(), self.fps)
+
+    def signal(self) -> np.ndarray:
+        raise NotImplementedError
+
+
+class RPPGEngine(_WindowedEngine):
+    """Configurable rPPG pipeline over a sliding window of ROI means.
+
+    Args:
+        method: Key of :data:`SIGNAL_METHODS`.
+        estimator: Key of :data:`ESTIMATORS`.
+        fps: Sampling rate of the traces (the resampling rate with timestamps).
+        window: Number of frames kept for the estimate.
+        landmark: Face-mesh landmark used as ROI center (10 = forehead).
+        size: Half side of the ROI square in pixels.
+    """
+
+    def __init__(
+        self,
+        method: str = "green",
+        estimator: str = "peaks",
+        fps: float = 30,
+        window: int = 300,
+        landmark: int = 10,
+        size: int = 10,
+    ) -> None:
+        super().__init__(method, estimator, fps, window)
+        self.landmark = landmark
+        self.size = size
+
+    def update(self, frame: np.ndarray, landmarks: Sequence[Any], timestamp: Optional[float] = None) -> bool:
+        """Adds the ROI mean of one frame; returns ``False`` if there was none.
+
+        ``timestamp`` is the capture time in seconds (e.g. ``CAP_PROP_POS_MSEC
+        / 1000`` or a monotonic clock read when the frame was grabbed).
+        """
+        center = landmark_array(landmarks, self.landmark)
+        if center is None:
+            return False
+        mean = roi_mean(frame, center, self.size)
+        if mean is None:
+            return False
+        self._append(mean, timestamp)
+        return True
+
+    def extend(self, traces: np.ndarray, timestamps: Optional[Sequence[float]] = None) -> None:
+        """Adds precomputed ``(T, 3)`` ROI means, skipping NaN rows."""
+        traces = np.asarray(traces)
+        if timestamps is not None and len(timestamps) != len(traces):
+            raise ValueError(f"Got {len(timestamps)} timestamps for {len(traces)} samples")
+        stamps = [None] * len(traces) if timestamps is None else timestamps
+        for row, timestamp in zip(traces, stamps):
+            if not np.isnan(row).any():
+                self._append(row, timestamp)
+
+    def signal(self) -> np.ndarray:
+        if not self.traces:
+            return np.empty(0)
+        return self.signal_method(self.uniform_traces(), self.fps)
+
+    def process_batch(
+        self, frames: Sequence[np.ndarray], centers: np.ndarray, timestamps: Optional[Sequence[float]] = None
+    ) -> Dict[str, float]:
+        """Adds the ROI means of a sequence of frames and estimates."""
+        self.extend(batch_roi_means(frames, centers, self.size), timestamps)
+        return self.compute()
+
+
+class MultiRegionEngine(_WindowedEngine):
+    """rPPG over several face regions combined by their pulse SNR.
+
+    Each region gets its own pulse signal from ``method``; the signals are
+    merged with :func:`combine_by_snr` before running ``estimator``, so a
+    region spoiled by a shadow, hair or motion weighs little in the result.
+    The weights of the last :meth:`compute` are kept in :attr:`weights`.
+
+    Args:
+        regions: Region name -> face-mesh landmark polygon.
+        method: Key of :data:`SIGNAL_METHODS`.
+        estimator: Key of :data:`ESTIMATORS`.
+        fps: Sampling rate of the traces (the resampling rate with timestamps).
+        window: Number of frames kept for the estimate.
+    """
+
+    def __init__(
+        self,
+        regions: Dict[str, Sequence[int]] = FACE_REGIONS,
+        method: str = "green",
+        estimator: str = "peaks",
+        fps: float = 30,
+        window: int = 300,
+    ) -> None:
+        super().__init__(method, estimator, fps, window)
+        self.extractor = MultiRegionExtractor(regions)
+        self.weights: Dict[str, float] = {}
+
+    def update(self, frame: np.ndarray, landmarks: Sequence[Any], timestamp: Optional[float] = None) -> bool:
+        """Adds the region means of one frame; returns ``False`` if there were none."""
+        means = self.extractor.means(frame, landmarks)
+        if means is None or np.isnan(means).any():
+            return False
+        self._append(means, timestamp)
+        return True
+
+    def signal(self) -> np.ndarray:
+        if not self.traces:
+            return np.empty(0)
+        traces = self.uniform_traces()  # (T, regions, C)
+        signals = [self.signal_method(traces[:, r], self.fps) for r in range(traces.shape[1])]
+        combined, weights = combine_by_snr(np.array(signals), self.fps)
+        self.weights = dict(zip(self.extractor.names, weights.tolist()))
+        return combined
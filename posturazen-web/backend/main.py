@@ -1,7 +1,188 @@
-from fastapi import FastAPI
+import asyncio
+import base64
+import os
+import time
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
 
-app = FastAPI()
+from fastapi import Body, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+import PosturaZen.voz.feedback as feedback
+from PosturaZen.calibracion.almacen import RUTA_CALIBRACIONES, AlmacenCalibraciones
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.servicio import IngestaNoDisponible, PoolInferencia, Saturado, ServicioIngesta
+from PosturaZen.utils.series import RUTA_SERIES, LectorSeries, resumen_a_dicts
+from PosturaZen.utils.telemetria import RegistroFrame
+from PosturaZen.utils.tramas import a_dict, codificar, decodificar
+from stream import Broadcaster, listen_udp
+
+# Ultimos registros de telemetria enviados por los detectores
+telemetry: deque = deque(maxlen=10000)
+
+# Tramas en vivo de los detectores hacia los paneles
+broadcaster = Broadcaster()
+# Segundos maximos para entregar un lote a un cliente antes de desconectarlo
+SEND_TIMEOUT = 5.0
+
+# Historial de postura que escriben los detectores (PosturaZen.utils.series)
+series = LectorSeries(os.environ.get("POSTURAZEN_SERIES", RUTA_SERIES))
+
+# Sesiones de estaciones ligeras que envian frames para inferir aqui
+ingest = ServicioIngesta(
+    max_sesiones=int(os.environ.get("POSTURAZEN_INGESTA_SESIONES", "32")),
+    inactividad=float(os.environ.get("POSTURAZEN_INGESTA_INACTIVIDAD", "60")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Direccion UDP donde los detectores publican (POSTURAZEN_PANEL); vacia para desactivar
+    address = os.environ.get("POSTURAZEN_STREAM_UDP", "127.0.0.1:8765")
+    transport = await listen_udp(broadcaster, address) if address else None
+    # El servidor no tiene altavoz: las alertas viajan en cada veredicto
+    feedback.usar_motor(feedback.StubEngine)
+    # Backend de pose del pool de inferencia (p. ej. "onnx"); sin el solo se aceptan puntos
+    backend = os.environ.get("POSTURAZEN_INGESTA")
+    if backend:
+        ingest.pool = PoolInferencia(backend, int(os.environ.get("POSTURAZEN_INGESTA_PROCESOS", "0")) or None)
+        await ingest.pool.iniciar()
+    yield
+    if ingest.pool is not None:
+        await ingest.pool.cerrar()
+    if transport is not None:
+        transport.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get('/')
 def read_root():
     return {"status": "ok"}
+
+@app.post('/telemetry')
+def ingest_telemetry(records: List[Dict[str, Any]]):
+    telemetry.extend(records)
+    return {"received": len(records)}
+
+@app.get('/telemetry')
+def latest_telemetry(limit: int = 100):
+    return list(telemetry)[-limit:]
+
+@app.post('/stream/publish')
+async def publish_frames(request: Request):
+    # Alternativa a UDP: cuerpo binario con una o varias tramas concatenadas
+    return {"received": broadcaster.publish_many(await request.body())}
+
+@app.get('/stream/latest')
+def latest_frames():
+    return [a_dict(t) for t in decodificar(broadcaster.latest())]
+
+@app.get('/stream/stats')
+def stream_stats():
+    return broadcaster.stats()
+
+@app.websocket('/ws/posture')
+async def posture_websocket(websocket: WebSocket):
+    # Cada mensaje binario trae una o varias tramas de 48 bytes
+    await websocket.accept()
+    try:
+        async with aclosing(broadcaster.subscribe()) as batches:
+            async for batch in batches:
+                await asyncio.wait_for(websocket.send_bytes(batch), SEND_TIMEOUT)
+    except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+        pass
+
+@app.get('/stream/posture')
+async def posture_events():
+    # Server-Sent Events: cada evento es un lote de tramas en base64
+    async def events():
+        async with aclosing(broadcaster.subscribe()) as batches:
+            async for batch in batches:
+                yield b"data: " + base64.b64encode(batch) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _busy(exc: Saturado) -> HTTPException:
+    return HTTPException(503, str(exc), headers={"Retry-After": "1"})
+
+def _verdict(session_id: str, record: RegistroFrame) -> Dict[str, Any]:
+    session = ingest.sesiones.get(session_id)
+    if session is not None:
+        broadcaster.publish(codificar(record, session.estacion))
+    return asdict(record)
+
+@app.post('/sessions')
+async def open_session(body: Dict[str, Any] = Body(default={})):
+    # Calibracion explicita o la guardada para (usuario, camara)
+    user = body.get("usuario")
+    camera = str(body.get("camara", "0"))
+    if body.get("postura"):
+        try:
+            base = PosturaBase.from_dict(body["postura"])
+        except (KeyError, ValueError, TypeError):
+            raise HTTPException(422, "Calibracion invalida")
+    else:
+        store = AlmacenCalibraciones(os.environ.get("POSTURAZEN_CALIBRACIONES", RUTA_CALIBRACIONES))
+        stored = store.obtener(user, camera) if user else None
+        if stored is None:
+            raise HTTPException(404, "No hay calibracion guardada para este usuario y camara")
+        base = stored.postura
+    try:
+        session = ingest.abrir(base, user)
+    except Saturado as exc:
+        raise _busy(exc)
+    return {"session": session.id, "station": session.estacion}
+
+@app.delete('/sessions/{session_id}')
+async def close_session(session_id: str):
+    ingest.cerrar(session_id)
+    return {"closed": session_id}
+
+@app.post('/sessions/{session_id}/frame')
+async def session_frame(session_id: str, request: Request, t_captura: Optional[float] = None):
+    # Cuerpo: un frame JPEG crudo
+    try:
+        record = await ingest.procesar_jpeg(session_id, await request.body(), t_captura)
+    except KeyError:
+        raise HTTPException(404, "Sesion desconocida")
+    except Saturado as exc:
+        raise _busy(exc)
+    except IngestaNoDisponible as exc:
+        # No es transitorio: reintentar no sirve, el cliente debe enviar puntos
+        raise HTTPException(501, str(exc))
+    return _verdict(session_id, record)
+
+@app.post('/sessions/{session_id}/keypoints')
+async def session_keypoints(session_id: str, body: Dict[str, Any] = Body(...)):
+    # Puntos COCO (17 x 2, normalizados) inferidos por el propio cliente
+    try:
+        record = await ingest.procesar_puntos(session_id, body.get("puntos", []), body.get("t_captura"))
+    except KeyError:
+        raise HTTPException(404, "Sesion desconocida")
+    except ValueError:
+        raise HTTPException(422, "Se esperaban 17 puntos (x, y) por persona")
+    except Saturado as exc:
+        raise _busy(exc)
+    return _verdict(session_id, record)
+
+@app.get('/sessions/stats')
+def session_stats():
+    return ingest.estadisticas()
+
+@app.get('/series')
+def series_stations():
+    return series.estaciones()
+
+@app.get('/series/{station}')
+def series_rollups(station: str, start: Optional[float] = None, end: Optional[float] = None, resolution: str = "hora"):
+    # Solo lee resumenes precalculados (minuto, hora o dia); por defecto la ultima semana
+    end = time.time() if end is None else end
+    start = end - 7 * 86400 if start is None else start
+    try:
+        rollups = series.resumen(station, start, end, resolution)
+    except ValueError as exc:
+        raise HTTPException(422, str(exc))
+    return resumen_a_dicts(rollups)
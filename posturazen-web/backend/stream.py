@@ -0,0 +1,107 @@
+"""Difusion en vivo de las tramas de postura a los paneles conectados.
+
+Los detectores envian tramas binarias de tamaño fijo
+(``PosturaZen.utils.tramas``) por UDP. Cada trama entra en un anillo con
+numero de secuencia y se despierta a los clientes; publicar cuesta O(1) sin
+importar cuantos paneles haya conectados. Cada cliente lleva su propio
+cursor sobre el anillo y recibe las tramas pendientes agrupadas en un solo
+mensaje. Si un cliente se queda atras (red lenta, pestaña en segundo plano)
+salta a las ``max_batch`` tramas mas recientes y las intermedias se cuentan
+como descartadas: un cliente lento nunca frena a los demas ni a la ingesta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from PosturaZen.utils.tramas import TAMANO
+
+
+class Broadcaster:
+    """Anillo de tramas con un cursor por suscriptor.
+
+    Args:
+        capacity: Tramas retenidas en el anillo.
+        max_batch: Tramas maximas por mensaje a un cliente; un cliente con
+            mas atraso salta a las ultimas ``max_batch``.
+    """
+
+    def __init__(self, capacity: int = 4096, max_batch: int = 256) -> None:
+        self.capacity = capacity
+        self.max_batch = min(max_batch, capacity)
+        self.sequence = 0
+        self.clients = 0
+        self.dropped = 0
+        self._ring: List[bytes] = [b""] * capacity
+        self._latest: Dict[int, bytes] = {}
+        self._event = asyncio.Event()
+
+    def publish(self, frame: bytes) -> None:
+        """Agrega una trama y despierta a los suscriptores (solo desde el event loop)."""
+        self._ring[self.sequence % self.capacity] = frame
+        self.sequence += 1
+        # El estado mas reciente por estacion, para clientes que recien llegan
+        self._latest[int.from_bytes(frame[1:3], "little")] = frame
+        self._event.set()
+        self._event = asyncio.Event()
+
+    def publish_many(self, data: bytes) -> int:
+        """Publica todas las tramas completas de ``data``; devuelve cuantas eran."""
+        count = len(data) // TAMANO
+        for i in range(count):
+            self.publish(data[i * TAMANO : (i + 1) * TAMANO])
+        return count
+
+    def latest(self) -> bytes:
+        """Ultima trama de cada estacion, concatenadas."""
+        return b"".join(self._latest[k] for k in sorted(self._latest))
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """Genera lotes de tramas nuevas para un cliente, de la mas antigua a la mas reciente."""
+        cursor = self.sequence
+        self.clients += 1
+        try:
+            snapshot = self.latest()
+            if snapshot:
+                yield snapshot
+            while True:
+                event = self._event
+                if cursor == self.sequence:
+                    await event.wait()
+                    continue
+                behind = self.sequence - cursor
+                if behind > self.max_batch:
+                    self.dropped += behind - self.max_batch
+                    cursor = self.sequence - self.max_batch
+                end = self.sequence
+                yield b"".join(self._ring[i % self.capacity] for i in range(cursor, end))
+                cursor = end
+        finally:
+            self.clients -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clients": self.clients,
+            "sequence": self.sequence,
+            "dropped": self.dropped,
+            "stations": len(self._latest),
+        }
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, broadcaster: Broadcaster) -> None:
+        self.broadcaster = broadcaster
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.broadcaster.publish_many(data)
+
+
+async def listen_udp(broadcaster: Broadcaster, address: str) -> Optional[asyncio.DatagramTransport]:
+    """Escucha tramas UDP en ``"host:puerto"`` y las publica en ``broadcaster``."""
+    host, _, port = address.rpartition(":")
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UDPProtocol(broadcaster), local_addr=(host or "127.0.0.1", int(port))
+    )
+    return transport
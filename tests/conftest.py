@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+import PosturaZen.voz.feedback as feedback
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.utils.metricas import KEYPOINT_INDEX, metricas_frame
+
+
+@pytest.fixture(autouse=True)
+def sin_voz():
+    """Las pruebas no deben hablar ni depender de pyttsx3."""
+    feedback.usar_motor(feedback.StubEngine)
+
+
+def keypoints_sentado(adelanto: float = 0.0) -> np.ndarray:
+    """Puntos COCO ``(17, 2)`` de una persona sentada; ``adelanto`` lleva la nariz hacia delante."""
+    kp = np.zeros((17, 2), dtype=np.float32)
+    puntos = {
+        "left_shoulder": (0.42, 0.40),
+        "right_shoulder": (0.58, 0.40),
+        "left_hip": (0.44, 0.70),
+        "right_hip": (0.56, 0.70),
+        "nose": (0.50 + adelanto, 0.25),
+    }
+    for nombre, idx in KEYPOINT_INDEX.items():
+        kp[idx] = puntos[nombre]
+    return kp
+
+
+def postura_de(kp: np.ndarray) -> PosturaBase:
+    """Calibracion cuyas metricas coinciden con las de ``kp``."""
+    cuello, cadera, centro = metricas_frame({n: tuple(map(float, kp[i])) for n, i in KEYPOINT_INDEX.items()})
+    return PosturaBase(cuello, cadera, centro)
+
+
+@pytest.fixture
+def sentado():
+    return keypoints_sentado
+
+
+@pytest.fixture
+def calibracion():
+    return postura_de
@@ -0,0 +1,12 @@
+"""Backend de pose de prueba: la misma persona sentada en cualquier frame.
+
+Se carga por nombre (``"pose_fija:PoseFija"``) tambien en los procesos del
+pool de ingesta, que no heredan objetos del proceso de las pruebas.
+"""
+
+from conftest import keypoints_sentado
+
+
+class PoseFija:
+    def inferir(self, frames):
+        return [keypoints_sentado()[None] for _ in frames]
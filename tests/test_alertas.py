@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from PosturaZen.calibracion.calibrador import PosturaBase
+from PosturaZen.deteccion.alertas import (
+    FELICITACION,
+    FIN,
+    INICIO,
+    RECORDATORIO,
+    MotorAlertas,
+    Tolerancias,
+)
+from PosturaZen.deteccion.reproduccion import reproducir
+from PosturaZen.utils.grabacion import GrabadorPuntos, LectorPuntos
+from PosturaZen.utils.metricas import KEYPOINT_INDEX
+from PosturaZen.voz import feedback
+
+FPS = 30
+BASE = PosturaBase(170.0, 175.0, 0.5)
+
+
+def _tramos(*tramos):
+    """Cuello por frame a partir de ``(segundos, desviacion)``; cadera y centro en la calibracion."""
+    return np.concatenate([np.full(int(segundos * FPS), BASE.neck_back_angle + d) for segundos, d in tramos])
+
+
+def _correr(cuello, **opciones):
+    motor = MotorAlertas(BASE, FPS, **opciones)
+    eventos = []
+    for i, c in enumerate(cuello):
+        evento = motor.actualizar(float(c), BASE.shoulder_hip_angle, BASE.center_x, (i + 1) / FPS)
+        if evento is not None:
+            eventos.append(evento)
+    return motor, eventos
+
+
+def _conteo(eventos):
+    return {tipo: sum(e.tipo == tipo for e in eventos) for tipo in (INICIO, RECORDATORIO, FIN, FELICITACION)}
+
+
+def test_eventos_de_una_sesion_sintetica():
+    # Bien 60 s, mal 30 s, bien 30 s, mal 200 s, bien 680 s y un gesto breve de 3 s
+    cuello = _tramos((60, 0), (30, 25), (30, 0), (200, 25), (680, 0), (3, 25), (10, 0))
+    motor, eventos = _correr(cuello)
+    assert _conteo(eventos) == {INICIO: 2, RECORDATORIO: 1, FIN: 2, FELICITACION: 1}
+    assert motor.alertas == 3
+    inicios = [e.t for e in eventos if e.tipo == INICIO]
+    # La ventana de 5 s necesita un 90 % de frames malos: 4.5 s tras empezar cada tramo
+    assert inicios == pytest.approx([64.5, 124.5], abs=0.05)
+    recordatorio = next(e for e in eventos if e.tipo == RECORDATORIO)
+    assert recordatorio.t == pytest.approx(244.5, abs=0.05)
+    assert recordatorio.duracion == pytest.approx(120.0, abs=0.05)
+
+
+def test_enfriamiento_entre_avisos():
+    cuello = _tramos((10, 25), (10, 0), (10, 25), (10, 0))
+    motor, eventos = _correr(cuello)
+    # Se entra dos veces en mala postura pero solo se avisa la primera
+    assert _conteo(eventos) == {INICIO: 1, RECORDATORIO: 0, FIN: 2, FELICITACION: 0}
+    assert motor.alertas == 1
+    _, eventos = _correr(cuello, enfriamiento_s=0.0)
+    assert _conteo(eventos)[INICIO] == 2
+
+
+def test_histeresis_en_el_borde_de_la_tolerancia():
+    # Oscila entre 1.05 y 0.95 veces la tolerancia: sin histeresis la mitad de los frames serian buenos
+    tolerancia = Tolerancias().cuello
+    cuello = BASE.neck_back_angle + tolerancia * np.where(np.arange(20 * FPS) % 2, 0.95, 1.05)
+    motor, eventos = _correr(cuello)
+    assert motor.frame_malo is True
+    assert _conteo(eventos)[INICIO] == 1
+
+
+def test_tolerancias_desde_calibracion_no_bajan_de_las_por_defecto():
+    t = Tolerancias.desde_calibracion([0.5, 5.0, 0.001])
+    assert (t.cuello, t.cadera, t.centro) == (Tolerancias().cuello, 15.0, Tolerancias().centro)
+    with pytest.raises(ValueError):
+        Tolerancias.desde_texto("1,2")
+
+
+def _grabar(ruta, sentado):
+    grabador = GrabadorPuntos(ruta, bloque=256)
+    bien, mal = sentado(), sentado(0.15)
+    for i in range(60 * FPS):
+        kp = mal if 20 * FPS <= i < 40 * FPS else bien
+        if i % 100 == 7:
+            grabador.escribir(i / FPS)  # Frame sin persona
+        else:
+            grabador.escribir(i / FPS, {n: tuple(kp[j]) for n, j in KEYPOINT_INDEX.items()})
+    grabador.cerrar()
+
+
+def test_reproducir_grabacion(tmp_path, sentado, calibracion, capsys):
+    ruta = str(tmp_path / "sesion.bin")
+    _grabar(ruta, sentado)
+    cola = feedback.obtener_cola()
+    resultado = reproducir(ruta, calibracion(sentado()), FPS)
+    # La voz de la aplicacion vuelve al terminar
+    assert feedback.obtener_cola() is cola
+    assert resultado["frames"] == 60 * FPS
+    assert resultado["persona"] == 60 * FPS - 18
+    assert resultado["duracion_s"] == pytest.approx(60 - 1 / FPS)
+    assert resultado["conteo"] == {INICIO: 1, RECORDATORIO: 0, FIN: 1, FELICITACION: 0}
+    assert resultado["alertas"] == 1
+    assert [e.tipo for e in resultado["eventos"]] == [INICIO, FIN]
+    # La regla anterior avisaba en cada frame con la ventana entera en mala postura
+    assert resultado["alertas_anteriores"] > 400
+    # Al reproducir el detector no escribe sus avisos
+    assert "Postura incorrecta" not in capsys.readouterr().out
+
+    # El mismo flujo en .npz da las mismas alertas
+    lector = LectorPuntos(ruta)
+    npz = str(tmp_path / "sesion.npz")
+    np.savez(npz, keypoints=lector.keypoints(), t=np.asarray(lector.registros["t"]))
+    resultado_npz = reproducir(npz, calibracion(sentado()), FPS)
+    assert resultado_npz["conteo"] == resultado["conteo"]
+    assert resultado_npz["mala_postura"] == resultado["mala_postura"]
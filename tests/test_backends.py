@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from PosturaZen.deteccion.backends import VISIBILIDAD_MINIMA, BackendOnnx
+
+ALTO, ANCHO = 480, 640
+
+
+class _SesionFija:
+    """Sustituye a ``onnxruntime.InferenceSession`` devolviendo una salida grabada."""
+
+    def __init__(self, salida: np.ndarray) -> None:
+        self.salida = salida
+
+    def run(self, nombres, entradas):
+        return [self.salida]
+
+
+def _backend(salida: np.ndarray) -> BackendOnnx:
+    backend = BackendOnnx.__new__(BackendOnnx)
+    backend.sesion = _SesionFija(salida)
+    backend.entrada = "images"
+    backend.imgsz = 640
+    backend.confianza = 0.25
+    backend.iou = 0.7
+    backend.visibilidad = VISIBILIDAD_MINIMA
+    return backend
+
+
+def _candidato(confianza, centro, puntos, visibilidad):
+    """Fila ``(56,)`` de YOLOv8-pose en pixeles del lienzo 640x640 (frame 640x480 con bandas de 80)."""
+    fila = np.zeros(56, dtype=np.float32)
+    fila[:4] = (centro[0], centro[1] + 80, 200, 300)
+    fila[4] = confianza
+    kps = fila[5:].reshape(17, 3)
+    kps[:, 0] = puntos[:, 0]
+    kps[:, 1] = puntos[:, 1] + 80
+    kps[:, 2] = visibilidad
+    return fila
+
+
+@pytest.fixture
+def prediccion():
+    rng = np.random.default_rng(0)
+    puntos_a = rng.uniform((220, 90), (420, 390), (17, 2)).astype(np.float32)
+    puntos_b = rng.uniform((460, 90), (630, 390), (17, 2)).astype(np.float32)
+    vis_a = np.where(np.arange(17) % 4 == 0, 0.3, 0.9)
+    vis_b = np.where(np.arange(17) < 5, 0.49, 0.51)
+    filas = [
+        _candidato(0.6, (545, 240), puntos_b, vis_b),
+        _candidato(0.9, (320, 240), puntos_a, vis_a),
+        # Duplicado de la persona A: lo elimina el NMS
+        _candidato(0.8, (322, 241), puntos_a + 2, vis_a),
+        # Por debajo de la confianza de deteccion
+        _candidato(0.1, (100, 240), puntos_a, vis_a),
+    ]
+    salida = np.stack(filas, axis=1)[None]  # (1, 56, candidatos)
+    return salida, (puntos_a, vis_a), (puntos_b, vis_b)
+
+
+def _esperado(puntos, visibilidad):
+    xyn = puntos / (ANCHO, ALTO)
+    xyn[visibilidad < VISIBILIDAD_MINIMA] = 0.0
+    return xyn
+
+
+def test_onnx_anula_los_puntos_poco_visibles(prediccion):
+    salida, a, b = prediccion
+    kps = _backend(salida).inferir([np.zeros((ALTO, ANCHO, 3), dtype=np.uint8)])[0]
+    assert kps.shape == (2, 17, 2)
+    assert kps.dtype == np.float32
+    # Ordenadas por confianza y sin el duplicado
+    np.testing.assert_allclose(kps[0], _esperado(*a), atol=1e-6)
+    np.testing.assert_allclose(kps[1], _esperado(*b), atol=1e-6)
+    assert np.all(kps[0][a[1] < VISIBILIDAD_MINIMA] == 0.0)
+    assert np.all(kps[1][:5] == 0.0) and np.all(kps[1][5:] > 0.0)
+
+
+def test_paridad_con_keypoints_de_ultralytics(prediccion):
+    torch = pytest.importorskip("torch")
+    results = pytest.importorskip("ultralytics.engine.results")
+    salida, a, b = prediccion
+    kps = _backend(salida).inferir([np.zeros((ALTO, ANCHO, 3), dtype=np.uint8)])[0]
+    for onnx, (puntos, visibilidad) in zip(kps, (a, b)):
+        datos = np.concatenate([puntos, visibilidad[:, None]], axis=1).astype(np.float32)
+        referencia = results.Keypoints(torch.from_numpy(datos[None]), (ALTO, ANCHO)).xyn[0].numpy()
+        np.testing.assert_allclose(onnx, referencia, atol=1e-6)
+
+
+def test_sin_personas():
+    salida = np.zeros((1, 56, 3), dtype=np.float32)
+    kps = _backend(salida).inferir([np.zeros((ALTO, ANCHO, 3), dtype=np.uint8)])[0]
+    assert kps.shape == (0, 17, 2)
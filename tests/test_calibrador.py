@@ -0,0 +1,15 @@
+import pytest
+
+from PosturaZen.calibracion.almacen import AlmacenCalibraciones
+from PosturaZen.calibracion.calibrador import Calibrador
+
+
+class _SinPose:
+    def inferir(self, frames):
+        raise AssertionError("no deberia llegar a capturar")
+
+
+def test_almacen_sin_usuario_falla_antes_de_capturar(tmp_path):
+    almacen = AlmacenCalibraciones(str(tmp_path / "calibraciones.db"))
+    with pytest.raises(ValueError, match="usuario"):
+        Calibrador(backend=_SinPose()).calibrar(fuente="no-existe.mp4", almacen=almacen)
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from PosturaZen.voz.feedback import PRIORIDAD_ALTA, PRIORIDAD_BAJA, ColaVoz, StubEngine
+
+
+def _cola_bloqueada():
+    """Cola cuyo hilo queda ocupado con el primer mensaje hasta ``liberar.set()``."""
+    motor, liberar = StubEngine(), threading.Event()
+
+    def fabrica():
+        liberar.wait(2.0)
+        return motor
+
+    cola = ColaVoz(fabrica, intervalo_minimo=0.0)
+    cola.encolar("primero")
+    limite = time.monotonic() + 2.0
+    while cola.pendientes() and time.monotonic() < limite:
+        time.sleep(0.001)
+    return cola, motor, liberar
+
+
+def test_prioridad_y_fusion_de_pendientes():
+    cola, motor, liberar = _cola_bloqueada()
+    try:
+        assert cola.encolar("baja", PRIORIDAD_BAJA)
+        assert cola.encolar("normal")
+        assert cola.encolar("alta", PRIORIDAD_ALTA)
+        # El duplicado pendiente no se repite: sube de prioridad y conserva su turno
+        assert not cola.encolar("baja", PRIORIDAD_ALTA)
+        assert cola.fusionados == 1
+        assert cola.pendientes() == 3
+        liberar.set()
+        assert cola.esperar(2.0)
+        assert motor.dichos == ["primero", "baja", "alta", "normal"]
+    finally:
+        liberar.set()
+        cola.detener()
+
+
+def test_repeticiones_dentro_del_intervalo_se_descartan():
+    motor = StubEngine()
+    cola = ColaVoz(lambda: motor, intervalo_minimo=60.0)
+    try:
+        assert cola.encolar("endereza la espalda")
+        assert cola.esperar(2.0)
+        assert not cola.encolar("endereza la espalda")
+        assert cola.descartados == 1
+        assert cola.encolar("otro mensaje")
+        # Un intervalo propio permite repetir antes
+        assert cola.encolar("endereza la espalda", intervalo=0.0)
+        assert cola.esperar(2.0)
+        assert motor.dichos == ["endereza la espalda", "otro mensaje", "endereza la espalda"]
+        assert cola.fusionados == 0
+    finally:
+        cola.detener()
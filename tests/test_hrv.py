@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from PosturaZen.utils.hrv import FS_MINIMA, HRVEstimator, HRVEstimatorLote
+
+
+def test_fps_por_debajo_de_la_banda():
+    with pytest.raises(ValueError):
+        HRVEstimator(fps=8)
+
+
+def test_fps_minimo_coincide_con_el_estimador_por_lotes():
+    # A 9 fps la banda de 0.7-4 Hz aun cabe: mismo RMSSD que el calculo original
+    fps = int(np.ceil(FS_MINIMA))
+    flujo, lote = HRVEstimator(fps=fps), HRVEstimatorLote(fps=fps)
+    for ti in np.arange(40 * fps) / fps:
+        valor = 120 + 2 * np.sin(2 * np.pi * 1.2 * ti)
+        rmssd = flujo.update_valor(valor, ti)
+        referencia = lote.update(np.full((2, 2, 3), valor, dtype=np.float32), ti)
+    assert referencia is not None and referencia > 0.0
+    assert rmssd == pytest.approx(referencia, rel=0.04)
+
+
+@pytest.mark.parametrize("fps", [10, 30])
+def test_hrv_de_un_pulso_limpio(fps):
+    estimador = HRVEstimator(fps=fps)
+    t = np.arange(40 * fps) / fps
+    valores = [estimador.update_valor(120 + 2 * np.sin(2 * np.pi * 1.2 * ti), ti) for ti in t]
+    assert valores[5 * fps - 2] is None
+    assert valores[-1] is not None and valores[-1] > 0.0
@@ -0,0 +1,138 @@
+import importlib.util
+import io
+import json
+import os
+import sys
+import urllib.error
+
+import pytest
+
+from conftest import RAIZ
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+BACKEND = os.path.join(RAIZ, "posturazen-web", "backend")
+
+
+def _backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTURAZEN_STREAM_UDP", "")
+    monkeypatch.setenv("POSTURAZEN_SERIES", str(tmp_path / "series"))
+    monkeypatch.setenv("POSTURAZEN_CALIBRACIONES", str(tmp_path / "calibraciones.db"))
+    monkeypatch.syspath_prepend(BACKEND)
+    # El modulo se llama main.py como el de la raiz: se carga con otro nombre
+    spec = importlib.util.spec_from_file_location("posturazen_backend", os.path.join(BACKEND, "main.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.delenv("POSTURAZEN_INGESTA", raising=False)
+    with TestClient(_backend(tmp_path, monkeypatch).app) as c:
+        yield c
+
+
+def _abrir(cliente, postura):
+    r = cliente.post("/sessions", json={"usuario": "ana", "camara": "0", "postura": vars(postura)})
+    assert r.status_code == 200
+    return r.json()["session"]
+
+
+def test_sesion_con_puntos_da_veredicto_y_alerta(cliente, sentado, calibracion):
+    sesion = _abrir(cliente, calibracion(sentado()))
+    bien = sentado().tolist()
+    r = cliente.post(f"/sessions/{sesion}/keypoints", json={"puntos": bien, "t_captura": 0.0})
+    assert r.status_code == 200
+    veredicto = r.json()
+    assert veredicto["indice"] == 0
+    assert veredicto["mala_postura"] is False
+    assert veredicto["angulo_cuello"] == pytest.approx(180.0, abs=0.01)
+    assert veredicto["alertas"] == 0
+
+    # Seis segundos encorvado a 30 fps: la ventana de 5 s se llena y salta una alerta
+    mal = sentado(0.15).tolist()
+    for i in range(1, 181):
+        r = cliente.post(f"/sessions/{sesion}/keypoints", json={"puntos": mal, "t_captura": i / 30})
+        assert r.status_code == 200
+    veredicto = r.json()
+    assert veredicto["indice"] == 180
+    assert veredicto["mala_postura"] is True
+    assert veredicto["alertas"] == 1
+    assert cliente.get("/sessions/stats").json()["sesiones"] == 1
+
+
+def test_puntos_mal_formados(cliente, sentado, calibracion):
+    sesion = _abrir(cliente, calibracion(sentado()))
+    r = cliente.post(f"/sessions/{sesion}/keypoints", json={"puntos": [[0.5, 0.5]] * 5})
+    assert r.status_code == 422
+
+
+def test_sesion_desconocida(cliente):
+    assert cliente.post("/sessions/nada/keypoints", json={"puntos": []}).status_code == 404
+
+
+def test_sin_calibracion_guardada(cliente):
+    assert cliente.post("/sessions", json={"usuario": "ana"}).status_code == 404
+
+
+def test_frames_sin_pool_no_se_reintentan(cliente, sentado, calibracion):
+    sesion = _abrir(cliente, calibracion(sentado()))
+    r = cliente.post(f"/sessions/{sesion}/frame", content=b"\xff\xd8", headers={"Content-Type": "image/jpeg"})
+    assert r.status_code == 501
+    assert "retry-after" not in r.headers
+
+
+
+def test_estaciones_reservadas_y_reutilizadas(sentado, calibracion):
+    from PosturaZen.deteccion.servicio import ServicioIngesta
+    from PosturaZen.utils.tramas import ESTACION_INGESTA
+
+    servicio = ServicioIngesta()
+    base = calibracion(sentado())
+    primera, segunda = servicio.abrir(base), servicio.abrir(base)
+    assert (primera.estacion, segunda.estacion) == (ESTACION_INGESTA, ESTACION_INGESTA + 1)
+    servicio.cerrar(primera.id)
+    assert servicio.abrir(base).estacion == ESTACION_INGESTA
+    assert servicio.abrir(base).estacion == ESTACION_INGESTA + 2
+
+
+def _urlopen_de(http):
+    """``urlopen`` que envia las peticiones del cliente al ``TestClient``."""
+
+    class _Respuesta(io.BytesIO):
+        def __exit__(self, *exc):
+            self.close()
+
+    def urlopen(peticion, timeout=None):
+        ruta = peticion.full_url.split("://", 1)[1].partition("/")[2]
+        cabeceras = dict(peticion.header_items())
+        r = http.request(peticion.get_method(), "/" + ruta, content=peticion.data, headers=cabeceras)
+        if r.status_code >= 400:
+            raise urllib.error.HTTPError(peticion.full_url, r.status_code, r.text, r.headers, io.BytesIO(r.content))
+        return _Respuesta(r.content)
+
+    return urlopen
+
+
+def test_cliente_con_camara_falsa_y_pool(tmp_path, monkeypatch, capsys, sentado, calibracion):
+    from PosturaZen.deteccion import cliente
+
+    # El backend de pose se crea por nombre en cada proceso del pool
+    monkeypatch.setenv("POSTURAZEN_INGESTA", "pose_fija:PoseFija")
+    monkeypatch.setenv("POSTURAZEN_INGESTA_PROCESOS", "1")
+    postura = tmp_path / "postura_base.json"
+    postura.write_text(json.dumps(vars(calibracion(sentado()))))
+    modulo = _backend(tmp_path, monkeypatch)
+    with TestClient(modulo.app) as http:
+        monkeypatch.setattr(cliente.urllib.request, "urlopen", _urlopen_de(http))
+        monkeypatch.setattr(sys, "argv", ["cliente", "--sintetico", "--frames", "20", "--calibracion", str(postura)])
+        cliente.main()
+        stats = http.get("/sessions/stats").json()
+    salida = capsys.readouterr().out
+    assert "frames: 20  rechazados: 0" in salida
+    assert "Postura incorrecta" not in salida
+    assert stats["sesiones"] == 0
+    assert stats["frames"] == 20
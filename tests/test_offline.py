@@ -0,0 +1,19 @@
+import numpy as np
+
+from PosturaZen.deteccion import offline
+
+
+def test_sin_pyarrow_no_deja_un_directorio_parquet(tmp_path, monkeypatch):
+    monkeypatch.setattr(offline, "pa", None)
+    escritor = offline.EscritorColumnas(str(tmp_path / "sesiones.parquet"))
+    n = 5
+    bloque = {c: np.zeros(n, dtype=t) for c, t in offline.COLUMNAS.items()}
+    bloque["frame"] = np.arange(n)
+    escritor.escribir("a.mp4", bloque)
+    escritor.cerrar()
+
+    assert escritor.ruta == str(tmp_path / "sesiones")
+    assert not (tmp_path / "sesiones.parquet").exists()
+    columnas = offline.leer_columnas(escritor.ruta)
+    assert columnas["frame"].tolist() == list(range(n))
+    assert columnas["video"].tolist() == ["a.mp4"] * n
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from PosturaZen.deteccion.pipeline import Pipeline
+
+
+class _Fuente:
+    """``read()`` de ``n`` frames; despues falla como un video terminado o una camara sin frame."""
+
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.leidos = 0
+        self.fallos = 0
+
+    def read(self):
+        if self.leidos >= self.n:
+            self.fallos += 1
+            return False, None
+        self.leidos += 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def test_video_agotado_termina_el_pipeline():
+    fuente = _Fuente(20)
+    analizados = []
+    hilo = threading.Thread(target=Pipeline(fuente, lambda f: {}, analizados.append, en_vivo=False).ejecutar)
+    hilo.start()
+    hilo.join(timeout=5.0)
+    assert not hilo.is_alive()
+    assert fuente.leidos == 20
+    assert fuente.fallos == 1
+    assert analizados
+
+
+def test_camara_en_vivo_reintenta():
+    fuente = _Fuente(5)
+    Pipeline(fuente, lambda f: {}, lambda p: None).ejecutar(limite=0.3)
+    assert fuente.fallos > 1
+
+
+class _FuenteRota(_Fuente):
+    def read(self):
+        if self.leidos == 3:
+            raise OSError("camara desconectada")
+        return super().read()
+
+
+def _falla_al_inferir(frame):
+    raise RuntimeError("modelo roto")
+
+
+def test_error_de_inferencia_se_relanza():
+    for en_vivo in (True, False):
+        pipeline = Pipeline(_Fuente(1000), _falla_al_inferir, lambda p: None, en_vivo=en_vivo)
+        with pytest.raises(RuntimeError, match="modelo roto"):
+            pipeline.ejecutar(limite=5.0)
+        assert not pipeline.activo
+
+
+def test_error_de_captura_se_relanza():
+    analizados = []
+    inicio = time.perf_counter()
+    with pytest.raises(OSError, match="camara desconectada"):
+        Pipeline(_FuenteRota(100), lambda f: {}, analizados.append, en_vivo=False).ejecutar(limite=5.0)
+    assert time.perf_counter() - inicio < 2.0
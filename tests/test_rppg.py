@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from modules.hrv_rppg import HRVEstimator
+from modules.posture_analysis import extract_rppg_signal
+from modules.rppg import RPPGEngine, batch_roi_means, roi_mean
+
+LANDMARKS = [(0.0, 0.0)] * 10 + [(0.5, 0.5)]
+
+
+def _frame(verde: float, alto: int = 120, ancho: int = 160) -> np.ndarray:
+    frame = np.full((alto, ancho, 3), 100, dtype=np.uint8)
+    frame[:, :, 1] = np.uint8(np.clip(verde, 0, 255))
+    return frame
+
+
+def test_mezclar_marcas_de_tiempo_falla():
+    motor = RPPGEngine()
+    motor.update(_frame(120), LANDMARKS, 0.0)
+    with pytest.raises(ValueError):
+        motor.update(_frame(120), LANDMARKS)
+    motor = RPPGEngine()
+    motor.update(_frame(120), LANDMARKS)
+    with pytest.raises(ValueError):
+        motor.update(_frame(120), LANDMARKS, 0.033)
+    with pytest.raises(ValueError):
+        RPPGEngine().extend(np.zeros((3, 3)), [0.0, 0.1])
+    estimador = HRVEstimator()
+    estimador.update(_frame(120), LANDMARKS, 0.0)
+    with pytest.raises(ValueError):
+        estimador.update(_frame(120), LANDMARKS)
+
+
+def test_bpm_con_marcas_irregulares():
+    # Pulso de 72 lpm capturado a ~30 fps con jitter y frames perdidos
+    rng = np.random.default_rng(0)
+    t = np.cumsum(rng.uniform(0.025, 0.045, 600))
+    t = t[rng.random(len(t)) > 0.1]
+    motor = RPPGEngine("green", "spectral", fps=30, window=len(t))
+    for instante in t:
+        motor.update(_frame(120 + 20 * np.sin(2 * np.pi * 1.2 * instante)), LANDMARKS, instante)
+    assert motor.compute()["bpm"] == pytest.approx(72.0, abs=2.0)
+
+
+def test_roi_por_frame_con_tamanos_distintos():
+    frames = [_frame(50), _frame(150, 240, 320), _frame(200)]
+    centros = np.array([(0.5, 0.5), (np.nan, np.nan), (0.999, 0.001)])
+    medias = batch_roi_means(frames, centros)
+    np.testing.assert_allclose(medias[0], (100, 50, 100))
+    assert np.isnan(medias[1]).all()
+    np.testing.assert_allclose(medias[2], roi_mean(frames[2], centros[2]))
+    # extract_rppg_signal no apila el clip: frames de tamaños distintos no fallan
+    resultado = extract_rppg_signal(frames * 20, [LANDMARKS] * 60)
+    assert resultado["hrv"] > 0.0
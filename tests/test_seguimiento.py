@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+import pytest
+
+from PosturaZen.deteccion.seguimiento import SeguidorPuntos
+
+ANCHO, ALTO = 320, 240
+PUNTOS = {
+    "nose": (0.50, 0.25),
+    "left_shoulder": (0.40, 0.45),
+    "right_shoulder": (0.60, 0.45),
+    "left_hip": (0.42, 0.75),
+    "right_hip": (0.58, 0.75),
+}
+
+
+def _escena(semilla=0):
+    """Textura suave con detalle en todas partes, para que el flujo optico tenga que seguir."""
+    rng = np.random.default_rng(semilla)
+    ruido = rng.integers(0, 255, (ALTO, ANCHO, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(ruido, (7, 7), 2.0)
+
+
+def _desplazar(imagen, dx, dy):
+    matriz = np.float32([[1, 0, dx], [0, 1, dy]])
+    return cv2.warpAffine(imagen, matriz, (ANCHO, ALTO), borderMode=cv2.BORDER_REFLECT)
+
+
+class _Modelo:
+    """Inferencia falsa que recuerda en que frames se la llamo."""
+
+    def __init__(self):
+        self.frame = 0
+        self.llamadas = []
+
+    def __call__(self, frame):
+        self.llamadas.append(self.frame)
+        return dict(PUNTOS)
+
+
+def _correr(seguidor, frames, modelo):
+    salida = []
+    for i, frame in enumerate(frames):
+        modelo.frame = i
+        salida.append(seguidor.actualizar(frame, modelo))
+    return salida
+
+
+def test_infiere_cada_k_frames_y_k_crece_si_es_estable():
+    escena = _escena()
+    fijo, modelo = SeguidorPuntos(k_min=4, k_max=4), _Modelo()
+    _correr(fijo, [escena] * 20, modelo)
+    # K frames seguidos entre dos inferencias
+    assert modelo.llamadas == [0, 5, 10, 15]
+    assert (fijo.inferencias, fijo.seguidos) == (4, 16)
+
+    adaptativo, modelo = SeguidorPuntos(k_min=2, k_max=4), _Modelo()
+    _correr(adaptativo, [escena] * 20, modelo)
+    assert modelo.llamadas == [0, 3, 7, 12, 17]
+    assert adaptativo.k == 4
+
+
+def test_sigue_los_puntos_de_una_imagen_trasladada():
+    escena = _escena(1)
+    # 1.5 px por frame hacia la derecha y 1 px hacia abajo
+    frames = [_desplazar(escena, 1.5 * i, 1.0 * i) for i in range(7)]
+    modelo = _Modelo()
+    salida = _correr(SeguidorPuntos(k_min=10, k_max=10, umbral_movimiento=1.0), frames, modelo)
+    assert modelo.llamadas == [0]
+    for nombre, (x, y) in PUNTOS.items():
+        assert salida[-1][nombre][0] == pytest.approx(x + 9.0 / ANCHO, abs=0.5 / ANCHO)
+        assert salida[-1][nombre][1] == pytest.approx(y + 6.0 / ALTO, abs=0.5 / ALTO)
+
+
+def test_un_movimiento_grande_fuerza_la_inferencia():
+    escena = _escena(2)
+    # 10 px de golpe son un 3 % del ancho, mas que el umbral del 2 %: el frame 2
+    # tocaba seguirlo, pero se infiere
+    frames = [escena, escena, _desplazar(escena, 10, 0), _desplazar(escena, 10, 0)]
+    seguidor, modelo = SeguidorPuntos(k_min=2, k_max=15), _Modelo()
+    _correr(seguidor, frames, modelo)
+    assert modelo.llamadas == [0, 2]
+    assert seguidor.seguidos == 2
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from PosturaZen.utils.series import FRAME_DTYPE, EscritorSeries, LectorSeries
+from PosturaZen.utils.tramas import MALA_POSTURA, PERSONA
+
+# Mediodia local, alineado a la hora: la prueba no cruza de dia
+MEDIANOCHE = time.mktime((2023, 11, 14, 0, 0, 0, 0, 0, -1))
+T0 = np.floor((MEDIANOCHE + 12 * 3600) / 3600) * 3600
+
+
+def _frames(desde, hasta):
+    """Un frame por segundo en ``[T0 + desde, T0 + hasta)``; uno de cada cuatro en mala postura."""
+    t = T0 + np.arange(desde, hasta, dtype=np.float64)
+    frames = np.zeros(len(t), FRAME_DTYPE)
+    frames["t"] = t
+    frames["angulo_cuello"] = 170.0
+    frames["angulo_cadera"] = 175.0
+    frames["hrv"] = np.nan
+    frames["banderas"] = PERSONA | np.where(np.arange(len(t)) % 4 == 0, MALA_POSTURA, 0)
+    return frames
+
+
+def _escribir(escritor, desde, hasta, lote=600):
+    for inicio in range(desde, hasta, lote):
+        escritor.agregar(_frames(inicio, min(inicio + lote, hasta)))
+
+
+def _frames_por(lector, resolucion):
+    res = lector.resumen("aula", T0 - 3600, T0 + 6 * 3600, resolucion)
+    return {int(r["inicio"] - T0): int(r["frames"]) for r in res}
+
+
+def test_resumenes_por_minuto_hora_y_dia(tmp_path):
+    escritor = EscritorSeries(str(tmp_path), "aula")
+    _escribir(escritor, 0, 5400)
+    escritor.cerrar()
+    lector = LectorSeries(str(tmp_path))
+
+    minutos = lector.resumen("aula", T0, T0 + 5400, "minuto")
+    assert len(minutos) == 90
+    assert set(minutos["frames"]) == {60}
+    assert set(minutos["mala_postura"]) == {15}
+    assert _frames_por(lector, "hora") == {0: 3600, 3600: 1800}
+    horas = lector.resumen("aula", T0, T0 + 5400, "hora")
+    assert horas["suma_cuello"][0] / horas["persona"][0] == pytest.approx(170.0)
+    dia = lector.resumen("aula", T0 - 3600, T0 + 6 * 3600, "dia")
+    assert len(dia) == 1 and dia["frames"][0] == 5400 and dia["mala_postura"][0] == 1350
+
+
+def test_la_hora_en_curso_sale_de_los_minutos(tmp_path):
+    escritor = EscritorSeries(str(tmp_path), "aula")
+    _escribir(escritor, 0, 3600 + 1800)
+    lector = LectorSeries(str(tmp_path))
+    # La hora en curso y su minuto abierto aun no estan escritos como hora
+    assert _frames_por(lector, "hora") == {0: 3600, 3600: 29 * 60}
+
+
+def test_reinicio_a_mitad_de_hora_y_cambio_de_hora(tmp_path):
+    lector = LectorSeries(str(tmp_path))
+    primero = EscritorSeries(str(tmp_path), "aula")
+    _escribir(primero, 0, 1800)
+    primero.cerrar()  # Reinicio: la hora queda escrita a medias
+    assert _frames_por(lector, "hora") == {0: 1800}
+
+    segundo = EscritorSeries(str(tmp_path), "aula")
+    _escribir(segundo, 1800, 2700)
+    # Los minutos nuevos de la hora reabierta se ven sin esperar a que cierre
+    assert _frames_por(lector, "hora") == {0: 1800 + 14 * 60}
+
+    _escribir(segundo, 2700, 3600 + 600)
+    assert _frames_por(lector, "hora") == {0: 3600, 3600: 9 * 60}
+    segundo.cerrar()
+    assert _frames_por(lector, "hora") == {0: 3600, 3600: 600}
+    assert sum(_frames_por(lector, "minuto").values()) == 4200
+    assert _frames_por(lector, "dia") == {int(MEDIANOCHE - T0): 4200}